@@ -1,8 +1,26 @@
 from fastapi import APIRouter, HTTPException, Depends, BackgroundTasks, Query, Request
+from fastapi.responses import StreamingResponse
 from typing import Annotated
 
-from app.dns.dns_models import ZoneMasterResponse
-from app.core.dependencies import CurrentUser, SessionDep, RoleChecker, DNSResolver
+from app.dns.dns_models import (
+    ZoneMasterResponse,
+    DNSCacheStats,
+    NsPropagationResponse,
+    PropagationWatchProgress,
+    BulkDnsRequest,
+    ZoneMasterInventoryStatus,
+)
+from app.dns.zone_master_inventory import ZONE_MASTER_INVENTORY
+from app.dns.dns_cache import DNS_CACHE
+from app.dns.propagation_watch import WATCH_JOBS, TooManyWatchJobs
+from app.core.dependencies import (
+    CurrentUser,
+    SessionDep,
+    RoleChecker,
+    DNSResolver,
+    SshWorkPriority,
+)
+from app.signed_executor.ssh_scheduler import SshPriority
 from app.schemas import (
     UserRoles,
     DomainName,
@@ -21,6 +39,8 @@ from app.core_utils.loggers import log_dns_remove_zone, log_dns_get_zonemaster
 
 router = APIRouter(tags=["dns"], prefix="/dns")
 
+MAX_PROPAGATION_DEADLINE = 10
+
 
 @router.get(
     "/resolve/internal/a/",
@@ -63,8 +83,11 @@ async def get_zone_master_from_dns_servers(
     domain: Annotated[SubscriptionName, Depends()],
     request: Request,
     dns_service: DNSResolver,
+    refresh: Annotated[bool, Query()] = False,
 ):
-    zone_masters = await dns_service.get_zone_masters(domain)
+    zone_masters = await dns_service.lookup_zone_masters(
+        DomainName(name=domain.name), refresh=refresh
+    )
     if not zone_masters:
         raise HTTPException(
             status_code=404,
@@ -81,6 +104,33 @@ async def get_zone_master_from_dns_servers(
     return ZoneMasterResponse(zone_name=domain.name, zone_masters=zone_masters)
 
 
+@router.get(
+    "/internal/zonemaster/conflicts",
+    dependencies=[Depends(RoleChecker([UserRoles.SUPERUSER, UserRoles.ADMIN]))],
+)
+async def get_zone_master_conflicts() -> list[ZoneMasterResponse]:
+    return ZONE_MASTER_INVENTORY.index.conflicts()
+
+
+@router.get(
+    "/internal/zonemaster/inventory",
+    dependencies=[Depends(RoleChecker([UserRoles.SUPERUSER, UserRoles.ADMIN]))],
+)
+async def get_zone_master_inventory_status() -> ZoneMasterInventoryStatus:
+    return ZONE_MASTER_INVENTORY.status()
+
+
+@router.post(
+    "/internal/zonemaster/inventory/refresh",
+    dependencies=[
+        Depends(RoleChecker([UserRoles.SUPERUSER, UserRoles.ADMIN])),
+        Depends(SshWorkPriority(SshPriority.BULK)),
+    ],
+)
+async def refresh_zone_master_inventory() -> ZoneMasterInventoryStatus:
+    return await ZONE_MASTER_INVENTORY.refresh()
+
+
 @router.get(
     "/resolve/internal/mx/",
     dependencies=[
@@ -107,11 +157,16 @@ async def get_mx_record(
     ],
 )
 async def get_public_ns_propagation(
-    domain: Annotated[DomainName, Query()], dns_service: DNSResolver
-):
-    domain_str = domain.name
-
-    ns_records = await dns_service.get_ns_records_from_public_ns(domain_str)
+    domain: Annotated[DomainName, Query()],
+    dns_service: DNSResolver,
+    deadline: Annotated[float | None, Query(gt=0, le=MAX_PROPAGATION_DEADLINE)] = None,
+) -> dict[str, list[str]]:
+    propagation = await dns_service.get_ns_records_from_public_ns(
+        domain.name, deadline=deadline
+    )
+    ns_records = {
+        entry.resolver: entry.records for entry in propagation.results if entry.records
+    }
     if not ns_records:
         raise HTTPException(
             status_code=404, detail=f"NS record for {domain} not found."
@@ -119,6 +174,97 @@ async def get_public_ns_propagation(
     return ns_records
 
 
+@router.get(
+    "/resolve/public/ns/propagation/details",
+    dependencies=[
+        Depends(RoleChecker([UserRoles.USER, UserRoles.SUPERUSER, UserRoles.ADMIN]))
+    ],
+)
+async def get_public_ns_propagation_details(
+    domain: Annotated[DomainName, Query()],
+    dns_service: DNSResolver,
+    deadline: Annotated[float | None, Query(gt=0, le=MAX_PROPAGATION_DEADLINE)] = None,
+) -> NsPropagationResponse:
+    return await dns_service.get_ns_records_from_public_ns(
+        domain.name, deadline=deadline
+    )
+
+
+@router.get(
+    "/resolve/public/ns/propagation/stream",
+    dependencies=[
+        Depends(RoleChecker([UserRoles.USER, UserRoles.SUPERUSER, UserRoles.ADMIN]))
+    ],
+)
+async def stream_public_ns_propagation(
+    domain: Annotated[DomainName, Query()],
+    dns_service: DNSResolver,
+    deadline: Annotated[float | None, Query(gt=0, le=MAX_PROPAGATION_DEADLINE)] = None,
+) -> StreamingResponse:
+    async def event_stream():
+        async for entry in dns_service.stream_ns_records_from_public_ns(
+            domain.name, deadline=deadline
+        ):
+            yield f"event: result\ndata: {entry.model_dump_json()}\n\n"
+        yield "event: done\ndata: {}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
+@router.post(
+    "/propagation/watch",
+    dependencies=[
+        Depends(RoleChecker([UserRoles.USER, UserRoles.SUPERUSER, UserRoles.ADMIN]))
+    ],
+)
+async def start_propagation_watch(
+    domain: Annotated[DomainName, Query()], dns_service: DNSResolver
+) -> PropagationWatchProgress:
+    try:
+        return WATCH_JOBS.start(domain.name, dns_service).progress
+    except TooManyWatchJobs as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+
+@router.get(
+    "/propagation/watch",
+    dependencies=[
+        Depends(RoleChecker([UserRoles.USER, UserRoles.SUPERUSER, UserRoles.ADMIN]))
+    ],
+)
+async def get_propagation_watch(
+    domain: Annotated[DomainName, Query()],
+) -> PropagationWatchProgress:
+    job = WATCH_JOBS.get(domain.name)
+    if not job:
+        raise HTTPException(
+            status_code=404, detail=f"No propagation watch for {domain} found."
+        )
+    return job.progress
+
+
+@router.get(
+    "/propagation/watch/stream",
+    dependencies=[
+        Depends(RoleChecker([UserRoles.USER, UserRoles.SUPERUSER, UserRoles.ADMIN]))
+    ],
+)
+async def stream_propagation_watch(
+    domain: Annotated[DomainName, Query()],
+) -> StreamingResponse:
+    job = WATCH_JOBS.get(domain.name)
+    if not job:
+        raise HTTPException(
+            status_code=404, detail=f"No propagation watch for {domain} found."
+        )
+
+    async def event_stream():
+        async for progress in job.subscribe():
+            yield f"event: progress\ndata: {progress.model_dump_json()}\n\n"
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @router.delete(
     "/internal/zonemaster/",
     dependencies=[Depends(RoleChecker([UserRoles.SUPERUSER, UserRoles.ADMIN]))],
@@ -133,9 +279,10 @@ async def delete_zone_file_for_domain(
 ):
     try:
         zone_masters = await dns_service.get_zone_masters(domain)
-        curr_zonemaster = ", ".join([entry["ns"] for entry in zone_masters["answers"]])
+        curr_zonemaster = ", ".join(str(zone_master.ip) for zone_master in zone_masters)
 
         await dns_service.remove_zone(domain)
+        WATCH_JOBS.start(domain.name, dns_service)
 
         background_tasks.add_task(
             log_dns_remove_zone,
@@ -236,3 +383,27 @@ async def get_authoritative_ns_records(
         )
     records = [DomainName(name=domain) for domain in ns_records]
     return DomainNsRecordResponse(domain=DomainName(name=domain_str), records=records)
+
+
+@router.get(
+    "/cache/stats",
+    dependencies=[Depends(RoleChecker([UserRoles.SUPERUSER, UserRoles.ADMIN]))],
+)
+async def get_dns_cache_stats() -> DNSCacheStats:
+    return DNS_CACHE.stats()
+
+
+@router.post(
+    "/resolve/bulk",
+    dependencies=[
+        Depends(RoleChecker([UserRoles.USER, UserRoles.SUPERUSER, UserRoles.ADMIN]))
+    ],
+)
+async def resolve_bulk(
+    data: BulkDnsRequest, dns_service: DNSResolver
+) -> StreamingResponse:
+    async def result_stream():
+        async for result in dns_service.resolve_bulk(data.queries):
+            yield result.model_dump_json() + "\n"
+
+    return StreamingResponse(result_stream(), media_type="application/x-ndjson")
@@ -12,6 +12,8 @@ from typing import Annotated
 from app.plesk.plesk_schemas import (
     SubscriptionListResponseModel,
     SubscriptionLoginLinkInput,
+    SubscriptionSearchMode,
+    SubscriptionInventoryStatus,
     SetZonemasterInput,
     TestMailCredentials,
     TestMailData
@@ -26,11 +28,20 @@ from app.schemas import (
     ValidatedDomainName,
     ValidatedPleskServerDomain,
 )
-from app.core.dependencies import CurrentUser, SessionDep, RoleChecker, SignedExecutorClientDep
+from app.core.dependencies import (
+    CurrentUser,
+    SessionDep,
+    RoleChecker,
+    SignedExecutorClientDep,
+    SshWorkPriority,
+    get_dns_service,
+)
 
 from app.core_utils.loggers import log_plesk_login_link_get, log_dns_zone_master_set, log_plesk_mail_test_get
 from app.plesk.plesk_service import PleskService
-from app.dns.dns_service import DNSService
+from app.plesk.subscription_inventory import SUBSCRIPTION_INVENTORY
+from app.signed_executor.ssh_scheduler import SshPriority
+from app.dns.propagation_watch import WATCH_JOBS
 
 
 router = APIRouter(tags=["plesk"], prefix="/plesk")
@@ -39,11 +50,57 @@ router = APIRouter(tags=["plesk"], prefix="/plesk")
 @router.get("/get/subscription/", response_model=SubscriptionListResponseModel)
 async def find_plesk_subscription_by_domain(
         domain: Annotated[SubscriptionName, Query()],
+        live: bool = Query(False, description="Skip the inventory and ask every Plesk server"),
+) -> SubscriptionListResponseModel:
+    subscriptions = await PleskService().find_subscriptions(domain, live=live)
+    return SubscriptionListResponseModel(root=subscriptions)
+
+
+@router.get(
+    "/search/subscription/",
+    dependencies=[Depends(RoleChecker([UserRoles.SUPERUSER, UserRoles.ADMIN, UserRoles.USER]))],
+    response_model=SubscriptionListResponseModel,
+)
+async def search_plesk_subscriptions(
+        query: Annotated[
+            str,
+            Query(
+                min_length=2,
+                max_length=253,
+                pattern=r"^(\*\.)?[a-zA-Z0-9.\-]+$",
+                description="Domain or part of it, suffix mode also accepts *.example.kz",
+            ),
+        ],
+        mode: SubscriptionSearchMode = SubscriptionSearchMode.PREFIX,
+        limit: int = Query(50, ge=1, le=500),
 ) -> SubscriptionListResponseModel:
-    subscriptions = await PleskService().fetch_subscription_info(domain)
+    subscriptions = SUBSCRIPTION_INVENTORY.store.search(query, mode, limit)
     return SubscriptionListResponseModel(root=subscriptions)
 
 
+@router.get(
+    "/subscription/inventory",
+    dependencies=[Depends(RoleChecker([UserRoles.SUPERUSER, UserRoles.ADMIN]))],
+    response_model=SubscriptionInventoryStatus,
+)
+async def get_subscription_inventory_status() -> SubscriptionInventoryStatus:
+    return SUBSCRIPTION_INVENTORY.status()
+
+
+@router.post(
+    "/subscription/inventory/sync",
+    dependencies=[
+        Depends(RoleChecker([UserRoles.SUPERUSER, UserRoles.ADMIN])),
+        Depends(SshWorkPriority(SshPriority.BULK)),
+    ],
+    response_model=SubscriptionInventoryStatus,
+)
+async def sync_subscription_inventory(
+        full: bool = Query(False, description="Pull the full subscription list"),
+) -> SubscriptionInventoryStatus:
+    return await SUBSCRIPTION_INVENTORY.sync(full_sync=full)
+
+
 @router.post(
     "/subscription/login-link",
     dependencies=[Depends(RoleChecker([UserRoles.SUPERUSER, UserRoles.ADMIN]))],
@@ -96,12 +153,14 @@ async def set_zonemaster(
             host=PleskServerDomain(name=data.target_plesk_server),
             domain=SubscriptionName(name=data.domain),
     ):
-        current_zonemasters = await DNSService().get_zone_masters(DomainName(name=data.domain))
-        await DNSService().remove_zone(DomainName(name=data.domain))
+        dns_service = get_dns_service()
+        current_zonemasters = await dns_service.get_zone_masters(DomainName(name=data.domain))
+        await dns_service.remove_zone(DomainName(name=data.domain))
         await PleskService().restart_dns_service_for_domain(
             host=PleskServerDomain(name=data.target_plesk_server),
             domain=SubscriptionName(name=data.domain),
         )
+        WATCH_JOBS.start(data.domain, dns_service)
     else:
         raise HTTPException(
             status_code=404,
@@ -1,4 +1,14 @@
-from fastapi import APIRouter
+import os
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app.core.dependencies import RoleChecker
+from app.core_utils.loop_monitor import LOOP_MONITOR
+from app.core_utils.profiler import PROFILER, ProfilerBusy
+from app.core_utils.timing import SPAN_HISTOGRAMS
+from app.schemas import UserRoles
 
 router = APIRouter(tags=["core_utils"], prefix="/core_utils")
 
@@ -6,3 +16,72 @@ router = APIRouter(tags=["core_utils"], prefix="/core_utils")
 @router.get("/health-check/")
 async def health_check() -> bool:
     return True
+
+
+@router.get(
+    "/timings/",
+    dependencies=[Depends(RoleChecker([UserRoles.SUPERUSER, UserRoles.ADMIN]))],
+)
+async def get_request_timings() -> dict[str, dict]:
+    """
+    Histograms of the request spans (auth, db, sign, ssh_queue, ssh_connect,
+    ssh_exec, parse, audit_log, total) recorded since the process started.
+    """
+    return SPAN_HISTOGRAMS.snapshot()
+
+
+@router.get(
+    "/loop-lag/",
+    dependencies=[Depends(RoleChecker([UserRoles.SUPERUSER, UserRoles.ADMIN]))],
+)
+async def get_loop_lag() -> dict:
+    """
+    Event loop lag histogram and the code locations that blocked the loop
+    longest, with the stack last captured for each.
+    """
+    return LOOP_MONITOR.snapshot()
+
+
+def _profile_response(profile: str) -> PlainTextResponse:
+    # Every worker process profiles only itself.
+    return PlainTextResponse(profile, headers={"X-Worker-Pid": str(os.getpid())})
+
+
+@router.get(
+    "/profile/cpu/",
+    dependencies=[Depends(RoleChecker([UserRoles.SUPERUSER]))],
+    response_class=PlainTextResponse,
+)
+async def profile_cpu(
+    seconds: Annotated[float, Query(gt=0, le=60)] = 10,
+    interval_ms: Annotated[float, Query(ge=1, le=1000)] = 10,
+) -> PlainTextResponse:
+    """
+    Sample the stacks of all threads of the worker serving this request,
+    as collapsed stacks weighted by sample count, for flamegraph.pl or
+    speedscope.
+    """
+    try:
+        profile = await PROFILER.cpu(seconds, interval_ms / 1000)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return _profile_response(profile)
+
+
+@router.get(
+    "/profile/memory/",
+    dependencies=[Depends(RoleChecker([UserRoles.SUPERUSER]))],
+    response_class=PlainTextResponse,
+)
+async def profile_memory(
+    seconds: Annotated[float, Query(gt=0, le=300)] = 30,
+) -> PlainTextResponse:
+    """
+    Trace allocations for `seconds` and return the bytes still held at the
+    end, as collapsed allocation stacks weighted by size.
+    """
+    try:
+        profile = await PROFILER.memory(seconds)
+    except ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return _profile_response(profile)
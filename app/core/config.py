@@ -98,9 +98,55 @@ class Settings(BaseSettings):
     FIRST_SUPERUSER_PASSWORD: str
 
     SSH_USER: str
+    SSH_PORT: int = 22
+    # Re-run idempotent reads on a spare connection once they exceed the
+    # host's p95 execution time. The executor has to accept a signed command
+    # twice.
+    SSH_HEDGE_READS: bool = False
+    SSH_MAX_CONCURRENCY: int = 256
+    # OpenSSH allows 10 sessions per connection by default (MaxSessions).
+    SSH_MAX_PER_HOST: int = 8
+    SSH_MAX_PER_PRINCIPAL: int = 100
+    SSH_MAX_QUEUED_INTERACTIVE: int = 1000
+    SSH_MAX_QUEUED_WRITE: int = 200
+    SSH_MAX_QUEUED_BULK: int = 5000
+    # Shared directory where each worker writes its metrics for /metrics to
+    # merge, needed when running more than one worker process.
+    METRICS_MULTIPROCESS_DIR: str | None = None
+    METRICS_DUMP_INTERVAL: int = 10
+    # Bearer token Prometheus scrapes /metrics with. Without it /metrics
+    # needs a superuser's access token.
+    METRICS_TOKEN: str | None = None
+    # Records waiting for the log writer thread. When it is full, access and
+    # SSH records are dropped, audit records wait up to the block timeout.
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_QUEUE_BLOCK_TIMEOUT: float = 1.0
+    # Format of the access and SSH logs on stdout, the audit log file keeps
+    # its own format.
+    LOG_FORMAT: Literal["text", "json"] = "text"
+    # Share of successful SSH calls that are logged per host.
+    SSH_LOG_SUCCESS_SAMPLE_RATE: float = 1.0
+    # Seconds between event loop lag samples, 0 disables the monitor. A stall
+    # longer than the threshold is logged with the stack that blocked it.
+    LOOP_LAG_INTERVAL: float = 0.1
+    LOOP_SLOW_CALLBACK_THRESHOLD: float = 0.1
     PLESK_SERVERS: dict[str, list[str]] = {}
     DNS_SLAVE_SERVERS: dict[str, list[str]] = {}
     ADDITIONAL_HOSTS: dict[str, list[str]] = {}
+    SSH_MAX_OUTPUT_SIZE: int = 16 * 1024 * 1024
+    # zstd needs the optional zstandard package
+    SSH_OUTPUT_COMPRESSION: Literal["none", "gzip", "zstd"] = "none"
+
+    DNS_CACHE_MAX_TTL: int = 300
+    DNS_CACHE_NEGATIVE_TTL: int = 60
+    DNS_CACHE_MAX_ENTRIES: int = 10000
+    DNS_PROPAGATION_DEADLINE: float = 1.5
+    # Propagation watch jobs running at once per worker, more are refused.
+    DNS_PROPAGATION_MAX_WATCHES: int = 50
+    DNS_BULK_CONCURRENCY: int = 50
+    DNS_ZONE_INVENTORY_REFRESH_INTERVAL: int = 900
+    PLESK_INVENTORY_SYNC_INTERVAL: int = 300
+    PLESK_INVENTORY_FULL_SYNC_INTERVAL: int = 60 * 60 * 24
 
     def _check_default_secret(self, var_name: str, value: str | None) -> None:
         if value == "changethis":
@@ -117,6 +163,7 @@ class Settings(BaseSettings):
     def _enforce_non_default_secrets(self) -> Self:
         self._check_default_secret("SECRET_KEY", self.SECRET_KEY)
         self._check_default_secret("POSTGRES_PASSWORD", self.POSTGRES_PASSWORD)
+        self._check_default_secret("METRICS_TOKEN", self.METRICS_TOKEN)
         self._check_default_secret(
             "FIRST_SUPERUSER_PASSWORD", self.FIRST_SUPERUSER_PASSWORD
         )
@@ -1,14 +1,28 @@
-from sqlalchemy import create_engine, select
+import time
+
+from sqlalchemy import create_engine, event, select
 from sqlalchemy.orm import Session
 
 from app.db import crud
 from app.core.config import settings
 from app.schemas import UserCreate, UserRoles
 from app.db.models import User, Base
+from app.core_utils.timing import record_span
 
 engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), echo=False)
 
 
+@event.listens_for(engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(engine, "after_cursor_execute")
+def _record_query_time(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info["query_start_time"].pop()
+    record_span("db", (time.perf_counter() - start) * 1000)
+
+
 def init_db(session: Session) -> None:
     Base.metadata.create_all(engine)
 
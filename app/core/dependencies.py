@@ -1,8 +1,11 @@
+import secrets
+
 from collections.abc import Generator
+from functools import lru_cache
 from typing import Annotated
 
 import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
@@ -13,11 +16,13 @@ from sqlalchemy import exc
 from app.core import security
 from app.core.config import settings
 from app.core.db import engine
+from app.core_utils.timing import span
 from app.schemas import TokenPayload, UserRoles, UserPublic
 from typing import List
 import app.db.models
 from app.dns.dns_service import DNSService
 from app.signed_executor.signed_executor_client import SignedExecutorClient
+from app.signed_executor.ssh_scheduler import SshPriority, ssh_principal, ssh_priority
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.API_V1_STR}/login/access-token"
@@ -37,19 +42,24 @@ SessionDep = Annotated[Session, Depends(get_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
-def get_current_user(session: SessionDep, token: TokenDep) -> UserPublic:
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
-    except (InvalidTokenError, ValidationError):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Could not validate credentials",
-        )
+def get_current_user(
+    request: Request, session: SessionDep, token: TokenDep
+) -> UserPublic:
+    with span("auth"):
+        try:
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
+            )
+            token_data = TokenPayload(**payload)
+        except (InvalidTokenError, ValidationError):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Could not validate credentials",
+            )
 
-    user = session.get(app.db.models.User, token_data.sub)
+        # The SSH principal of this request, see ssh_work_context.
+        request.state.user_id = token_data.sub
+        user = session.get(app.db.models.User, token_data.sub)
 
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
@@ -71,6 +81,50 @@ def get_current_active_superuser(current_user: CurrentUser) -> UserPublic:
     return current_user
 
 
+async def ssh_work_context(request: Request) -> None:
+    """
+    Tag the request's SSH commands for the scheduler: reads are interactive,
+    everything else is a write. The principal is the authenticated user, or
+    the client address for anonymous requests. It is looked up only when a
+    command is scheduled, after get_current_user has decoded the token.
+    """
+
+    def principal() -> str | None:
+        user_id = getattr(request.state, "user_id", None)
+        if user_id is not None:
+            return f"user:{user_id}"
+        return request.client.host if request.client else None
+
+    ssh_principal.set(principal)
+    ssh_priority.set(
+        SshPriority.INTERACTIVE
+        if request.method in ("GET", "HEAD")
+        else SshPriority.WRITE
+    )
+
+
+class SshWorkPriority:
+    def __init__(self, priority: SshPriority):
+        self.priority = priority
+
+    async def __call__(self) -> None:
+        ssh_priority.set(self.priority)
+
+
+def verify_metrics_token(request: Request) -> None:
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if not (
+        scheme.lower() == "bearer"
+        and settings.METRICS_TOKEN
+        and secrets.compare_digest(token.encode(), settings.METRICS_TOKEN.encode())
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
 class RoleChecker:
     def __init__(self, allowed_roles: List):
         self.allowed_roles = allowed_roles
@@ -82,7 +136,8 @@ class RoleChecker:
             )
 
 
-async def get_dns_service() -> DNSService:
+@lru_cache
+def get_dns_service() -> DNSService:
     return DNSService()
 
 DNSResolver = Annotated[DNSService, Depends(get_dns_service)]
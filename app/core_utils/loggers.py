@@ -2,10 +2,16 @@ import logging
 import os
 import shutil
 import gzip
+import json
+import math
+import queue
+import random
+import time
 
 from datetime import datetime, timedelta
-from logging.handlers import RotatingFileHandler
-from starlette.middleware.base import BaseHTTPMiddleware
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from typing import List
 
@@ -30,6 +36,8 @@ from app.schemas import (
 )
 
 from app.core.config import settings
+from app.core_utils.metrics import CallbackMetric
+from app.core_utils.timing import timed
 
 
 USER_ACTION_LOG_SIZE_MB = 10
@@ -41,29 +49,49 @@ def round_up_seconds(dt: datetime):
     return dt.replace(microsecond=0)
 
 
+class TimestampClock:
+    def __init__(self):
+        """
+        Log timestamps rounded up to the second like round_up_seconds, with
+        the formatted string reused for every line within the same second.
+
+        The cache is one tuple swapped in a single assignment, so threads can
+        share it without a lock; a race only formats the same second twice.
+        """
+        self._cached: tuple[int, str] = (-1, "")
+
+    def format(self, timestamp: float) -> str:
+        second = math.ceil(timestamp)
+        cached_second, formatted = self._cached
+        if second != cached_second:
+            formatted = datetime.fromtimestamp(second).isoformat()
+            self._cached = (second, formatted)
+        return formatted
+
+    def now(self) -> str:
+        return self.format(time.time())
+
+
+LOG_CLOCK = TimestampClock()
+
+
 def _get_timestamp() -> str:
-    now = datetime.now()
-    rounded_time = round_up_seconds(now)
-    return rounded_time.isoformat()
+    return LOG_CLOCK.now()
 
 
 class CompactDockerFormatter(logging.Formatter):
     def format(self, record):
-        timestamp = _get_timestamp()
+        timestamp = LOG_CLOCK.format(record.created)
 
-        message = record.getMessage()
-        client = "-"
-        request_line = "-"
-        status_code = "-"
+        # Access records carry their fields as attributes, see LoggingMiddleware.
+        client = getattr(record, "client", "-")
+        status_code = getattr(record, "status_code", "-")
         duration_ms = getattr(record, "duration_ms", None)
-
-        try:
-            parts = message.split(" - ")
-            client = parts[0]
-            request_info = parts[1].strip("'")
-            request_line, status_code = request_info.rsplit(" ", 1)
-        except Exception:
-            pass
+        method = getattr(record, "method", None)
+        if method is not None:
+            request_line = f"{method} {record.path} HTTP/{record.http_version}"
+        else:
+            request_line = record.getMessage()
 
         time_str = f"{duration_ms:.2f}ms" if duration_ms is not None else "-"
 
@@ -73,36 +101,197 @@ class CompactDockerFormatter(logging.Formatter):
         )
 
 
+class _LogWriter(QueueListener):
+    def handle(self, item):
+        handlers, record = item
+        for handler in handlers:
+            if record.levelno >= handler.level:
+                handler.handle(record)
+
+    def enqueue_sentinel(self):
+        # Wait for room, a full queue must not keep the writer running.
+        self.queue.put(self._sentinel)
+
+
+class _QueueHandler(QueueHandler):
+    def __init__(self, log_queue: "LogQueue", block: bool):
+        super().__init__(log_queue.queue)
+        self.log_queue = log_queue
+        self.block = block
+        self.handlers: list[logging.Handler] = []
+
+    def prepare(self, record):
+        # Keep msg and args apart, the writer thread formats the record. Log
+        # arguments must not be mutated after the call, which holds for the
+        # strings, numbers and response models passed here.
+        return record
+
+    def enqueue(self, record):
+        item = (self.handlers, record)
+        try:
+            if self.block:
+                self.queue.put(item, timeout=settings.LOG_QUEUE_BLOCK_TIMEOUT)
+            else:
+                self.queue.put_nowait(item)
+        except queue.Full:
+            self.log_queue.dropped[record.name] = (
+                self.log_queue.dropped.get(record.name, 0) + 1
+            )
+
+
+class LogQueue:
+    def __init__(self, maxsize: int = settings.LOG_QUEUE_SIZE):
+        """
+        Hands log records to a single writer thread, which runs the actual
+        stream and file handlers, including the gzip rotation of the audit log.
+
+        Loggers with `block=False` drop records while the queue is full, the
+        others wait up to LOG_QUEUE_BLOCK_TIMEOUT for room.
+        """
+        self.queue: queue.Queue = queue.Queue(maxsize)
+        self.dropped: dict[str, int] = {}
+        self._handlers: dict[str, _QueueHandler] = {}
+        self._writer: _LogWriter | None = None
+
+    def add_handler(
+        self, logger: logging.Logger, handler: logging.Handler, block: bool = False
+    ) -> None:
+        queue_handler = self._handlers.get(logger.name)
+        if queue_handler is None:
+            queue_handler = self._handlers[logger.name] = _QueueHandler(self, block)
+            logger.addHandler(queue_handler)
+        queue_handler.handlers.append(handler)
+        self.start()
+
+    def start(self) -> None:
+        if self._writer is None:
+            self._writer = _LogWriter(self.queue)
+            self._writer.start()
+
+    def stop(self) -> None:
+        """
+        Write out the queued records and stop the writer thread.
+        """
+        if self._writer is not None:
+            self._writer.stop()
+            self._writer = None
+
+
+LOG_QUEUE = LogQueue()
+
+CallbackMetric(
+    "log_records_dropped_total",
+    "Log records dropped because the log queue was full.",
+    "counter",
+    lambda: {(name,): count for name, count in LOG_QUEUE.dropped.items()},
+    ("logger",),
+)
+CallbackMetric(
+    "log_queue_size",
+    "Log records waiting for the writer thread.",
+    "gauge",
+    lambda: {(): LOG_QUEUE.queue.qsize()},
+)
+
+
+# Attributes every LogRecord has, anything else was passed in `extra`.
+_RECORD_ATTRIBUTES = {
+    *logging.LogRecord("", 0, "", 0, "", (), None).__dict__,
+    "message",
+    "asctime",
+}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "timestamp": LOG_CLOCK.format(record.created),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def _stream_formatter(text_formatter: logging.Formatter | None = None):
+    if settings.LOG_FORMAT == "json":
+        return JsonFormatter()
+    return text_formatter
+
+
 def disable_default_uvicorn_access_logs():
     logger = logging.getLogger("uvicorn.access")
     logger.handlers.clear()
 
 
+def setup_app_logger():
+    """
+    Module loggers (`logging.getLogger(__name__)` under `app`) write through
+    the log queue too, in the root handler's format, instead of propagating
+    to the root logger's synchronous stream handler.
+    """
+    logger = logging.getLogger("app")
+    handler = logging.StreamHandler()
+    handler.setFormatter(_stream_formatter(logging.Formatter(logging.BASIC_FORMAT)))
+    LOG_QUEUE.add_handler(logger, handler)
+    logger.propagate = False
+    return logger
+
+
 def setup_custom_access_logger():
     logger = logging.getLogger("app.access")
     handler = logging.StreamHandler()
     logger.propagate = False
-    handler.setFormatter(CompactDockerFormatter())
-    logger.addHandler(handler)
+    handler.setFormatter(_stream_formatter(CompactDockerFormatter()))
+    LOG_QUEUE.add_handler(logger, handler)
     return logger
 
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        real_ip = _get_request_ip(request)
+class LoggingMiddleware:
+    def __init__(self, app: ASGIApp):
+        """
+        Access log line per HTTP request, written once the response body is
+        sent, so streamed responses are logged with their full duration.
+        """
+        self.app = app
+        self.logger = logging.getLogger("app.access")
 
-        start = datetime.now()
-        response = await call_next(request)
-        duration = (datetime.now() - start).total_seconds() * 1000  # in ms
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        request_line = f"{request.method} {request.url.path} HTTP/{request.scope.get('http_version', '1.1')}"
-        logger = logging.getLogger("app.access")
-        logger.info(
-            f"{real_ip} - '{request_line} {response.status_code}'",
-            extra={"duration_ms": duration},
-        )
+        start = time.perf_counter()
+        status_code = 500
 
-        return response
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info(
+                    "%s %s",
+                    scope["method"],
+                    scope["path"],
+                    extra={
+                        "client": _get_scope_ip(scope),
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "http_version": scope.get("http_version", "1.1"),
+                        "status_code": status_code,
+                        "duration_ms": (time.perf_counter() - start) * 1000,
+                    },
+                )
 
 
 def _mb_to_bytes(mb: int) -> int:
@@ -134,7 +323,7 @@ def setup_actions_logger():
 
     file_handler.rotator = _compressed_rotator
     file_handler.namer = _namer
-    user_action_logger.addHandler(file_handler)
+    LOG_QUEUE.add_handler(user_action_logger, file_handler, block=True)
 
 
 class LogEntry:
@@ -166,10 +355,19 @@ def _get_request_ip(request: Request) -> str:
     return ip
 
 
+def _get_scope_ip(scope: Scope) -> str:
+    forwarded_for = Headers(scope=scope).get("X-Forwarded-For")
+    if forwarded_for is not None:
+        return forwarded_for
+    client = scope.get("client")
+    return client[0] if client else "-"
+
+
 def get_user_action_logger():
     return logging.getLogger("app.user_actions")
 
 
+@timed("audit_log")
 async def log_plesk_login_link_get(
     user: UserPublic,
     plesk_server: str,
@@ -201,6 +399,7 @@ async def log_plesk_login_link_get(
 
 
 
+@timed("audit_log")
 async def log_dns_zone_master_set(
     domain: DomainName,
     current_zonemasters: List[ZoneMaster],
@@ -234,6 +433,7 @@ async def log_dns_zone_master_set(
 
 
 
+@timed("audit_log")
 async def log_plesk_mail_test_get(
     plesk_mail_server: PleskServerDomain,
     mail_domain: DomainName,
@@ -264,6 +464,7 @@ async def log_plesk_mail_test_get(
 
 
 
+@timed("audit_log")
 async def log_dns_remove_zone(
     domain: DomainName,
     current_zonemaster: str,
@@ -288,6 +489,7 @@ async def log_dns_remove_zone(
 
 
 
+@timed("audit_log")
 async def log_dns_get_zonemaster(
     domain: SubscriptionName, user: UserPublic, session: Session, request: Request
 ):
@@ -311,7 +513,8 @@ def setup_ssh_logger():
     else:
         ssh_logger.setLevel(logging.INFO)
     handler = logging.StreamHandler()
-    ssh_logger.addHandler(handler)
+    handler.setFormatter(_stream_formatter())
+    LOG_QUEUE.add_handler(ssh_logger, handler)
     ssh_logger.propagate = False
     
     asyncssh_logger = logging.getLogger("asyncssh")
@@ -325,27 +528,118 @@ def get_ssh_logger():
     return logging.getLogger("app.ssh_operations")
 
 
-def log_ssh_request(host: str, command: str):
+def sample_ssh_call() -> bool:
+    """
+    Whether to log a successful SSH call, errors are always logged.
+    """
+    rate = settings.SSH_LOG_SUCCESS_SAMPLE_RATE
+    return rate >= 1 or random.random() < rate
 
-    logger = get_ssh_logger()
-    if settings.ENVIRONMENT == "local":
-        logger.debug(f"{host} executes \"{command}\" | Awaiting result...")
-    else:
-        logger.info(f"{host} executing '{command}' | Awaiting result...")
+
+def _is_success(response) -> bool:
+    return response.code < 400
+
+
+class _ResponseDump:
+    # Dumped by the log writer thread, only when the record is formatted.
+    def __init__(self, response):
+        self.response = response
+
+    def __str__(self) -> str:
+        return self.response.model_dump_json(indent=1)
+
+
+class _FailedHosts:
+    def __init__(self, failed: list[dict]):
+        self.failed = failed
+
+    def __str__(self) -> str:
+        return "".join(
+            f" | {f['host']} {f['status']}: {f['message']}" for f in self.failed
+        )
 
 
+def _response_fields(response, execution_time: float) -> dict:
+    return {
+        "host": response.host,
+        "status": response.status.value,
+        "code": response.code,
+        "message": response.message,
+        "execution_time": round(execution_time, 3),
+    }
 
-def log_ssh_response(response, execution_time: float):
+
+def log_ssh_request(host: str, command: str, sampled: bool = True):
+    if not sampled:
+        return
     logger = get_ssh_logger()
     if settings.ENVIRONMENT == "local":
-        response_info = response.model_dump_json(indent=1)
+        logger.debug('%s executes "%s" | Awaiting result...', host, command)
+    else:
         logger.info(
-            f"{response.host} answered {response.status} ({execution_time:.2f}s): "
-            f"{response_info}"
+            "%s executing '%s' | Awaiting result...",
+            host,
+            command,
+            extra={"host": host, "command": command},
         )
+
+
+def log_ssh_response(response, execution_time: float, sampled: bool = True):
+    if not sampled and _is_success(response):
+        return
+    logger = get_ssh_logger()
+    fields = _response_fields(response, execution_time)
+    if settings.ENVIRONMENT == "local":
+        response_info = _ResponseDump(response)
     else:
-        response_info = f'{{"status": "{response.status}", "code": {response.code}, "message": "{response.message}"}}'
-        logger.info(
-            f"{response.host} answered {response.status} ({execution_time:.2f}s): "
-            f"{response_info}"
+        response_info = json.dumps(
+            {k: fields[k] for k in ("status", "code", "message")}
         )
+    # LogRecord already has a message attribute.
+    fields["response_message"] = fields.pop("message")
+    logger.info(
+        "%s answered %s (%.2fs): %s",
+        response.host,
+        response.status.value,
+        execution_time,
+        response_info,
+        extra=fields,
+    )
+
+
+def log_ssh_fanout(command: str, results: list[tuple[object, float]]):
+    """
+    One record for a command run on many hosts: the count per status, every
+    failed host and a sample of the successful ones.
+    """
+    logger = get_ssh_logger()
+    statuses: dict[str, int] = {}
+    failed = []
+    sampled = []
+    for response, execution_time in results:
+        status = response.status.value
+        statuses[status] = statuses.get(status, 0) + 1
+        if not _is_success(response):
+            failed.append(_response_fields(response, execution_time))
+        elif sample_ssh_call():
+            sampled.append(_response_fields(response, execution_time))
+
+    slowest = max(results, key=lambda result: result[1], default=None)
+    logger.log(
+        logging.ERROR if failed else logging.INFO,
+        "%d hosts executed '%s': %s%s",
+        len(results),
+        command,
+        ", ".join(f"{status}={count}" for status, count in sorted(statuses.items())),
+        _FailedHosts(failed),
+        extra={
+            "command": command,
+            "host_count": len(results),
+            "statuses": statuses,
+            "failed": failed,
+            "sampled": sampled,
+            "slowest_host": slowest[0].host if slowest else None,
+            "slowest_time": round(slowest[1], 3) if slowest else None,
+        },
+    )
+
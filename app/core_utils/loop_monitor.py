@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+from app.core.config import settings
+from app.core_utils import metrics
+from app.core_utils.timing import Histogram
+
+logger = logging.getLogger(__name__)
+
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+# Frames kept from a captured stack, innermost last.
+STACK_DEPTH = 15
+MAX_OFFENDERS = 100
+
+_APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+EVENT_LOOP_LAG = metrics.Histogram(
+    "event_loop_lag_seconds",
+    "How late the event loop ran a timer, i.e. how long it was blocked.",
+    buckets=LAG_BUCKETS,
+)
+EVENT_LOOP_SLOW_CALLBACKS = metrics.Counter(
+    "event_loop_slow_callbacks_total",
+    "Times the event loop was blocked longer than the slow callback threshold.",
+)
+
+
+def _culprit(stack: traceback.StackSummary) -> traceback.FrameSummary:
+    """
+    The innermost frame of our own code, which is the one to change even
+    when the blocking call is in a library.
+    """
+    for frame in reversed(stack):
+        if frame.filename.startswith(_APP_DIR) and frame.filename != __file__:
+            return frame
+    return stack[-1]
+
+
+def _location(frame: traceback.FrameSummary) -> str:
+    filename = os.path.relpath(frame.filename, os.path.dirname(_APP_DIR))
+    return f"{filename}:{frame.lineno} in {frame.name}"
+
+
+class LoopMonitor:
+    def __init__(
+        self,
+        interval: float = settings.LOOP_LAG_INTERVAL,
+        slow_threshold: float = settings.LOOP_SLOW_CALLBACK_THRESHOLD,
+        lag: Histogram | None = None,
+    ):
+        """
+        Measures event loop lag with a timer every `interval` seconds.
+
+        A watchdog thread notices when the timer is overdue by more than
+        `slow_threshold` and captures the loop thread's stack while it is
+        still blocked. When the loop gets back to the timer, the stall is
+        counted against the innermost app frame of that stack. Stalls ending
+        before the watchdog looks have no stack and count as "unknown".
+
+        Lag in seconds goes into `lag`, the process-wide monitor's is the
+        event_loop_lag_seconds histogram.
+        """
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.lag = lag if lag is not None else Histogram(LAG_BUCKETS)
+        self.slow_callbacks = 0
+        self._offenders: dict[str, dict] = {}
+        # perf_counter() when the current timer was scheduled, and the stack
+        # the watchdog captured for it.
+        self._scheduled_at: float | None = None
+        self._captured: tuple[float, traceback.StackSummary] | None = None
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    async def _sample(self) -> None:
+        while True:
+            scheduled_at = self._scheduled_at = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - scheduled_at - self.interval)
+            self.observe(lag, scheduled_at)
+
+    def observe(self, lag: float, scheduled_at: float | None = None) -> None:
+        self.lag.observe(lag)
+        if lag < self.slow_threshold:
+            return
+        captured = self._captured
+        stack = captured[1] if captured and captured[0] == scheduled_at else None
+        self._record_offender(lag, stack)
+
+    def _record_offender(
+        self, lag: float, stack: traceback.StackSummary | None
+    ) -> None:
+        self.slow_callbacks += 1
+        EVENT_LOOP_SLOW_CALLBACKS.inc()
+        location = _location(_culprit(stack)) if stack else "unknown"
+        logger.warning(f"Event loop blocked for {lag * 1000:.0f} ms at {location}")
+
+        offender = self._offenders.get(location)
+        if offender is None:
+            if len(self._offenders) >= MAX_OFFENDERS:
+                least = min(self._offenders.values(), key=lambda o: o["total_ms"])
+                del self._offenders[least["location"]]
+            offender = self._offenders[location] = {
+                "location": location,
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "stack": [],
+            }
+        offender["count"] += 1
+        offender["total_ms"] += lag * 1000
+        offender["max_ms"] = max(offender["max_ms"], lag * 1000)
+        if stack:
+            offender["stack"] = [_location(frame) for frame in stack[-STACK_DEPTH:]]
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            scheduled_at = self._scheduled_at
+            if scheduled_at is None or (
+                self._captured and self._captured[0] == scheduled_at
+            ):
+                continue
+            overdue = time.perf_counter() - scheduled_at - self.interval
+            if overdue < self.slow_threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is not None:
+                self._captured = (scheduled_at, traceback.extract_stack(frame))
+
+    def top_offenders(self, limit: int = 20) -> list[dict]:
+        ranked = sorted(
+            self._offenders.values(), key=lambda o: o["total_ms"], reverse=True
+        )
+        return [
+            {
+                **offender,
+                "total_ms": round(offender["total_ms"], 1),
+                "max_ms": round(offender["max_ms"], 1),
+            }
+            for offender in ranked[:limit]
+        ]
+
+    def snapshot(self) -> dict:
+        return {
+            "interval_ms": self.interval * 1000,
+            "slow_threshold_ms": self.slow_threshold * 1000,
+            "lag": self.lag.snapshot(scale=1000),
+            "slow_callbacks": self.slow_callbacks,
+            "top_offenders": self.top_offenders(),
+        }
+
+    async def start(self) -> None:
+        if self.interval <= 0:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._sample())
+        self._thread = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._thread is not None:
+            self._stop.set()
+            await asyncio.to_thread(self._thread.join)
+            self._thread = None
+        self._scheduled_at = None
+
+
+LOOP_MONITOR = LoopMonitor(lag=EVENT_LOOP_LAG.labels())
@@ -0,0 +1,319 @@
+import asyncio
+import glob
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+from app.core_utils import timing
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# A metric's values keyed by the JSON list of its label values, so the
+# snapshot can be written to and merged from the per-worker files as is.
+Snapshot = dict[str, dict]
+
+
+def _labels_key(labels: Iterable[str]) -> str:
+    return json.dumps([str(label) for label in labels])
+
+
+class Metric(ABC):
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY.register(self)
+
+    @abstractmethod
+    def values(self) -> dict[str, float | list[float]]:
+        pass
+
+    def snapshot(self) -> dict:
+        return {
+            "type": self.type,
+            "help": self.documentation,
+            "labelnames": list(self.labelnames),
+            "values": self.values(),
+        }
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        # Plain dict updates, the event loop is single threaded and the
+        # few callers in worker threads only risk losing an increment.
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def values(self) -> dict[str, float]:
+        return {_labels_key(labels): value for labels, value in self._values.items()}
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = buckets
+        self._histograms: dict[tuple[str, ...], timing.Histogram] = {}
+
+    def labels(self, *labels: str) -> timing.Histogram:
+        """
+        The histogram of one label set, for code that also wants its
+        quantiles.
+        """
+        histogram = self._histograms.get(labels)
+        if histogram is None:
+            histogram = self._histograms[labels] = timing.Histogram(self.buckets)
+        return histogram
+
+    def observe(self, value: float, *labels: str) -> None:
+        self.labels(*labels).observe(value)
+
+    def values(self) -> dict[str, list[float]]:
+        # Per label set: a count per bucket, one for +Inf, then the sum.
+        return {
+            _labels_key(labels): [*histogram.counts, histogram.sum]
+            for labels, histogram in self._histograms.items()
+        }
+
+    def snapshot(self) -> dict:
+        return {**super().snapshot(), "buckets": list(self.buckets)}
+
+
+class CallbackMetric(Metric):
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        type: str,
+        callback: Callable[[], dict[tuple[str, ...], float]],
+        labelnames: Iterable[str] = (),
+    ):
+        """
+        Values read from `callback` at collection time, for state other code
+        already keeps such as pool sizes or cache statistics.
+        """
+        self.type = type
+        self.callback = callback
+        super().__init__(name, documentation, labelnames)
+
+    def values(self) -> dict[str, float]:
+        return {
+            _labels_key(labels): float(value)
+            for labels, value in self.callback().items()
+        }
+
+
+class MetricsRegistry:
+    def __init__(
+        self,
+        multiprocess_dir: str | None = settings.METRICS_MULTIPROCESS_DIR,
+        dump_interval: int = settings.METRICS_DUMP_INTERVAL,
+    ):
+        """
+        All metrics of this process.
+
+        With `multiprocess_dir` set, every worker writes its snapshot there
+        each `dump_interval` seconds and /metrics merges the files of all
+        workers: counters and histograms add up, gauges only come from
+        workers that wrote recently.
+        """
+        self.multiprocess_dir = multiprocess_dir
+        self.dump_interval = dump_interval
+        self._metrics: dict[str, Metric] = {}
+        self._task: asyncio.Task | None = None
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def snapshot(self) -> Snapshot:
+        snapshot = {}
+        for name, metric in self._metrics.items():
+            try:
+                snapshot[name] = metric.snapshot()
+            except Exception:
+                logger.exception(f"Failed to collect metric {name}")
+        return snapshot
+
+    @property
+    def _dump_path(self) -> str:
+        return os.path.join(self.multiprocess_dir, f"metrics-{os.getpid()}.json")
+
+    def _write(self, snapshot: Snapshot) -> None:
+        os.makedirs(self.multiprocess_dir, exist_ok=True)
+        tmp_path = f"{self._dump_path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"time": time.time(), "metrics": snapshot}, f)
+        os.replace(tmp_path, self._dump_path)
+
+    async def dump(self) -> None:
+        # Snapshot on the event loop, which is the one mutating the metrics,
+        # and leave only the file IO to a thread.
+        snapshot = self.snapshot()
+        try:
+            await asyncio.to_thread(self._write, snapshot)
+        except OSError as e:
+            logger.error(f"Failed to write metrics snapshot: {e}")
+
+    def _merge_workers(self) -> Snapshot:
+        snapshots = []
+        for path in glob.glob(os.path.join(self.multiprocess_dir, "metrics-*.json")):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping metrics file {path}: {e}")
+        return merge_snapshots(snapshots, stale_after=3 * self.dump_interval)
+
+    async def collect(self) -> Snapshot:
+        if not self.multiprocess_dir:
+            return self.snapshot()
+        await self.dump()
+        return await asyncio.to_thread(self._merge_workers)
+
+    async def _dump_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.dump_interval)
+            await self.dump()
+
+    async def start(self) -> None:
+        if self.multiprocess_dir and self.dump_interval > 0:
+            self._task = asyncio.create_task(self._dump_periodically())
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self.multiprocess_dir:
+            await self.dump()
+
+
+def merge_snapshots(snapshots: list[dict], stale_after: float) -> Snapshot:
+    merged: Snapshot = {}
+    now = time.time()
+    for snapshot in snapshots:
+        fresh = now - snapshot["time"] <= stale_after
+        for name, metric in snapshot["metrics"].items():
+            if metric["type"] == "gauge" and not fresh:
+                continue
+            target = merged.setdefault(name, {**metric, "values": {}})
+            values = target["values"]
+            for key, value in metric["values"].items():
+                if isinstance(value, list):
+                    current = values.get(key, [0.0] * len(value))
+                    values[key] = [a + b for a, b in zip(current, value)]
+                else:
+                    values[key] = values.get(key, 0.0) + value
+    return merged
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: list[str], key: str, extra: str = "") -> str:
+    pairs = [
+        f'{name}="{_escape(value)}"' for name, value in zip(labelnames, json.loads(key))
+    ]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def render(snapshot: Snapshot) -> str:
+    """
+    Prometheus text exposition format.
+    """
+    lines = []
+    for name, metric in sorted(snapshot.items()):
+        labelnames = metric["labelnames"]
+        lines.append(f"# HELP {name} {metric['help']}")
+        lines.append(f"# TYPE {name} {metric['type']}")
+        for key, value in sorted(metric["values"].items()):
+            if metric["type"] != "histogram":
+                labels = _format_labels(labelnames, key)
+                lines.append(f"{name}{labels} {_format_value(value)}")
+                continue
+            cumulative = 0.0
+            for bound, count in zip([*metric["buckets"], "+Inf"], value[:-1]):
+                cumulative += count
+                labels = _format_labels(labelnames, key, f'le="{bound}"')
+                lines.append(f"{name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(labelnames, key)
+            lines.append(f"{name}_sum{labels} {_format_value(value[-1])}")
+            lines.append(f"{name}_count{labels} {_format_value(cumulative)}")
+    return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests.", ("route", "method", "status")
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time until the HTTP response started.",
+    ("route", "method"),
+)
+
+
+def _route_name(scope: Scope) -> str:
+    route = scope.get("route")
+    # APIRoute.unique_id comes from custom_generate_unique_id in app.main.
+    return getattr(route, "unique_id", None) or getattr(route, "path", "unmatched")
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_metrics(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                HTTP_REQUEST_DURATION.observe(
+                    time.perf_counter() - start, _route_name(scope), scope["method"]
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            HTTP_REQUESTS.inc(_route_name(scope), scope["method"], str(status))
@@ -0,0 +1,116 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from types import FrameType
+
+TRACEMALLOC_FRAMES = 25
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def _short_path(filename: str) -> str:
+    # Relative to the longest sys.path entry holding it, so app and library
+    # frames read as module paths instead of absolute ones.
+    roots = [p for p in sys.path if p and filename.startswith(p + os.sep)]
+    if not roots:
+        return filename
+    return filename[len(max(roots, key=len)) + 1 :]
+
+
+def _frame_name(filename: str, function: str) -> str:
+    return f"{function} ({_short_path(filename)})"
+
+
+def _collapse(frame: FrameType) -> list[str]:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame.f_code.co_filename, frame.f_code.co_name))
+        frame = frame.f_back
+    names.reverse()
+    return names
+
+
+def format_collapsed(stacks: Counter) -> str:
+    # One `frame;frame;frame weight` line per stack, root first, the format
+    # flamegraph.pl and speedscope read.
+    return "".join(
+        f"{';'.join(stack)} {weight}\n" for stack, weight in stacks.most_common()
+    )
+
+
+def sample_stacks(duration: float, interval: float) -> Counter:
+    """
+    Sample the stacks of all other threads every `interval` seconds for
+    `duration` seconds. Blocks, so run it in a thread of its own.
+    """
+    own_id = threading.get_ident()
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    stacks: Counter = Counter()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            thread = names.get(thread_id) or f"thread-{thread_id}"
+            stacks[(thread, *_collapse(frame))] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def allocation_diff(
+    before: tracemalloc.Snapshot, after: tracemalloc.Snapshot
+) -> Counter:
+    """
+    Bytes allocated between the snapshots and still alive, per traceback.
+    """
+    stacks: Counter = Counter()
+    for stat in after.compare_to(before, "traceback"):
+        if stat.size_diff > 0:
+            stack = tuple(
+                f"{_short_path(frame.filename)}:{frame.lineno}"
+                for frame in stat.traceback
+            )
+            stacks[stack] += stat.size_diff
+    return stacks
+
+
+class Profiler:
+    def __init__(self):
+        """
+        Runs one profile at a time, a second one would only measure the first.
+        """
+        self._lock = asyncio.Lock()
+
+    async def cpu(self, duration: float, interval: float) -> str:
+        if self._lock.locked():
+            raise ProfilerBusy("A profile is already running in this worker")
+        async with self._lock:
+            stacks = await asyncio.to_thread(sample_stacks, duration, interval)
+        return format_collapsed(stacks)
+
+    async def memory(self, duration: float) -> str:
+        if self._lock.locked():
+            raise ProfilerBusy("A profile is already running in this worker")
+        async with self._lock:
+            started = not tracemalloc.is_tracing()
+            if started:
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            try:
+                before = tracemalloc.take_snapshot()
+                await asyncio.sleep(duration)
+                after = tracemalloc.take_snapshot()
+            finally:
+                if started:
+                    tracemalloc.stop()
+            # Leave the comparison of possibly large snapshots to a thread.
+            stacks = await asyncio.to_thread(allocation_diff, before, after)
+        return format_collapsed(stacks)
+
+
+PROFILER = Profiler()
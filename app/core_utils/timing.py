@@ -0,0 +1,168 @@
+import bisect
+import functools
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Upper bounds of the histogram buckets, in milliseconds.
+BUCKETS_MS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+# Span name -> total milliseconds spent in it during the current request.
+# The middleware puts a fresh dict here, code running for the request (also
+# in threads and tasks started from it) adds to the same dict.
+_request_spans: ContextVar[dict[str, float] | None] = ContextVar(
+    "request_spans", default=None
+)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS_MS):
+        self.buckets = buckets
+        # The last count is for values above the largest bucket.
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> float | None:
+        """
+        Upper bound of the bucket holding the q-quantile, None when it is
+        above the largest bucket or nothing was observed.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+    def snapshot(self, scale: float = 1) -> dict:
+        """
+        Summary in milliseconds, `scale` converts the observed unit to them.
+        """
+
+        def ms(value: float | None) -> float | None:
+            return None if value is None else value * scale
+
+        return {
+            "count": self.count,
+            "sum_ms": round(self.sum * scale, 3),
+            "p50_ms": ms(self.quantile(0.5)),
+            "p95_ms": ms(self.quantile(0.95)),
+            "p99_ms": ms(self.quantile(0.99)),
+            "buckets": {
+                **{
+                    f"{bound * scale:g}": count
+                    for bound, count in zip(self.buckets, self.counts)
+                },
+                "+Inf": self.counts[-1],
+            },
+        }
+
+
+class SpanHistograms:
+    def __init__(self):
+        self._histograms: dict[str, Histogram] = {}
+
+    def observe(self, name: str, milliseconds: float) -> None:
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = Histogram()
+        histogram.observe(milliseconds)
+
+    def snapshot(self) -> dict[str, dict]:
+        return {
+            name: histogram.snapshot()
+            for name, histogram in sorted(self._histograms.items())
+        }
+
+    def clear(self) -> None:
+        self._histograms.clear()
+
+
+SPAN_HISTOGRAMS = SpanHistograms()
+
+
+def record_span(name: str, milliseconds: float) -> None:
+    spans = _request_spans.get()
+    if spans is not None:
+        spans[name] = spans.get(name, 0.0) + milliseconds
+    SPAN_HISTOGRAMS.observe(name, milliseconds)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, (time.perf_counter() - start) * 1000)
+
+
+def timed(name: str):
+    """
+    Record every call of the decorated coroutine function as a `name` span.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def server_timing_header(spans: dict[str, float]) -> str:
+    return ", ".join(f"{name};dur={duration:.1f}" for name, duration in spans.items())
+
+
+class ServerTimingMiddleware:
+    def __init__(self, app: ASGIApp):
+        """
+        Collect the request's spans and send them in a Server-Timing header,
+        along with the total time until the response started.
+
+        Spans of concurrent work, e.g. an SSH fan-out, add up, so they can
+        exceed the total. Work done after the response headers are sent (a
+        streamed body, background tasks) only reaches the histograms.
+        """
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        spans: dict[str, float] = {}
+        token = _request_spans.set(spans)
+        start = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                total = (time.perf_counter() - start) * 1000
+                SPAN_HISTOGRAMS.observe("total", total)
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    server_timing_header({**spans, "total": total}),
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_spans.reset(token)
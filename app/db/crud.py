@@ -1,6 +1,8 @@
 from typing import Any
+from datetime import datetime, timezone
 from sqlalchemy.orm import Session
-from sqlalchemy import update, select, and_, func
+from sqlalchemy import update, select, and_, func, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import with_polymorphic
 from sqlalchemy.inspection import inspect
 from fastapi.encoders import jsonable_encoder
@@ -26,8 +28,15 @@ from app.db.models import (
     GetPleskLoginLinkLog,
     UsersActivityLog,
     PleskMailGetTestMailLog,
+    DnsZoneMasterInventory,
+    PleskSubscription,
+    PleskSubscriptionDomain,
+    PleskInventorySyncState,
 )
 
+# Rows per INSERT of an inventory, a few bind parameters each.
+INVENTORY_BATCH_SIZE = 5000
+
 
 def create_user(*, session: Session, user_create: UserCreate) -> User:
     db_obj = User(
@@ -189,3 +198,92 @@ async def db_log_plesk_mail_test_get(
     )
     session.add(user_action)
     session.commit()
+
+
+def db_replace_zone_master_inventory(
+    session: Session, dns_server: str, zone_masters: dict[str, str]
+) -> None:
+    # Every worker refreshes the inventory. Upserting the zones and deleting
+    # only the ones gone from the server, in one transaction, never hits the
+    # unique constraint and never shows readers an empty table. The advisory
+    # lock, held until commit, serializes refreshes of the same server so
+    # they cannot deadlock on each other's rows.
+    session.execute(select(func.pg_advisory_xact_lock(func.hashtext(dns_server))))
+    rows = [
+        {"dns_server": dns_server, "zone": zone, "zonemaster_ip": ip}
+        for zone, ip in zone_masters.items()
+    ]
+    # Batches keep each statement well under Postgres' 65535 bind parameters.
+    for offset in range(0, len(rows), INVENTORY_BATCH_SIZE):
+        insert_stmt = pg_insert(DnsZoneMasterInventory).values(
+            rows[offset : offset + INVENTORY_BATCH_SIZE]
+        )
+        session.execute(
+            insert_stmt.on_conflict_do_update(
+                index_elements=["dns_server", "zone"],
+                set_={
+                    "zonemaster_ip": insert_stmt.excluded.zonemaster_ip,
+                    "updated_at": func.now(),
+                },
+            )
+        )
+    # now() is the transaction's start time, so every zone written above
+    # carries it and older rows are the zones gone from the server.
+    session.execute(
+        delete(DnsZoneMasterInventory).where(
+            DnsZoneMasterInventory.dns_server == dns_server,
+            DnsZoneMasterInventory.updated_at < func.now(),
+        )
+    )
+    session.commit()
+
+
+def db_get_zone_master_inventory(session: Session) -> list[DnsZoneMasterInventory]:
+    return list(session.execute(select(DnsZoneMasterInventory)).scalars())
+
+
+def db_apply_subscription_inventory(
+    session: Session,
+    host: str,
+    subscriptions: list[dict],
+    removed_ids: list[str],
+    server_time: int,
+    full_sync: bool,
+) -> None:
+    # Each subscription holds the PleskSubscription columns, with `domains`
+    # as a list of domain names. Every worker syncs the inventory, the
+    # advisory lock serializes syncs of the same host until commit so their
+    # delete and insert do not interleave on the (host, subscription_id) key.
+    session.execute(select(func.pg_advisory_xact_lock(func.hashtext(host))))
+    stale = delete(PleskSubscription).where(PleskSubscription.host == host)
+    if not full_sync:
+        changed_ids = removed_ids + [
+            subscription["subscription_id"] for subscription in subscriptions
+        ]
+        stale = stale.where(PleskSubscription.subscription_id.in_(changed_ids))
+    session.execute(stale)
+
+    for subscription in subscriptions:
+        domains = [
+            PleskSubscriptionDomain(name=domain.lower())
+            for domain in subscription["domains"]
+        ]
+        session.add(PleskSubscription(host=host, **{**subscription, "domains": domains}))
+
+    state = session.get(PleskInventorySyncState, host)
+    now = datetime.now(timezone.utc)
+    if state is None:
+        state = PleskInventorySyncState(host=host, last_full_sync=now, server_time=0)
+        session.add(state)
+    state.server_time = server_time
+    if full_sync:
+        state.last_full_sync = now
+    session.commit()
+
+
+def db_get_subscription_inventory(session: Session) -> list[PleskSubscription]:
+    return list(session.execute(select(PleskSubscription)).scalars())
+
+
+def db_get_inventory_sync_states(session: Session) -> list[PleskInventorySyncState]:
+    return list(session.execute(select(PleskInventorySyncState)).scalars())
@@ -1,7 +1,20 @@
 import uuid
 
-from sqlalchemy import ForeignKey, String, UUID, Boolean, Enum, DateTime, func, Integer
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+from sqlalchemy import (
+    ForeignKey,
+    String,
+    UUID,
+    Boolean,
+    Enum,
+    DateTime,
+    func,
+    Integer,
+    UniqueConstraint,
+    Index,
+    JSON,
+    BigInteger,
+)
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 import sqlalchemy.types as types
 from datetime import datetime
 
@@ -147,3 +160,87 @@ class PleskMailGetTestMailLog(UsersActivityLog):
         Boolean, default=True, nullable=False
     )
     __mapper_args__ = {"polymorphic_identity": UserActionType.GET_TEST_MAIL_CREDENTIALS}
+
+
+class DnsZoneMasterInventory(Base):
+    __tablename__ = "dns_zone_master_inventory"
+    __table_args__ = (UniqueConstraint("dns_server", "zone"),)
+
+    id: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    dns_server: Mapped[str] = mapped_column(String(253), nullable=False, index=True)
+    zone: Mapped[str] = mapped_column(String(253), nullable=False, index=True)
+    zonemaster_ip: Mapped[IPv4AddressType] = mapped_column(
+        IPv4AddressType, nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class PleskSubscription(Base):
+    __tablename__ = "plesk_subscription"
+    __table_args__ = (UniqueConstraint("host", "subscription_id"),)
+
+    id: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    host: Mapped[str] = mapped_column(String(253), nullable=False, index=True)
+    subscription_id: Mapped[str] = mapped_column(String(32), nullable=False)
+    name: Mapped[str] = mapped_column(String(253), nullable=False)
+    username: Mapped[str] = mapped_column(String(255), nullable=False)
+    userlogin: Mapped[str] = mapped_column(String(255), nullable=False)
+    domain_states: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+    is_space_overused: Mapped[Boolean] = mapped_column(
+        Boolean, default=False, nullable=False
+    )
+    subscription_size_mb: Mapped[int] = mapped_column(Integer, nullable=False)
+    subscription_status: Mapped[str] = mapped_column(String(64), nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    domains: Mapped[list["PleskSubscriptionDomain"]] = relationship(
+        back_populates="subscription",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+        lazy="selectin",
+    )
+
+
+class PleskSubscriptionDomain(Base):
+    __tablename__ = "plesk_subscription_domain"
+    __table_args__ = (
+        Index(
+            "ix_plesk_subscription_domain_name_pattern",
+            "name",
+            postgresql_ops={"name": "varchar_pattern_ops"},
+        ),
+    )
+
+    id: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
+    )
+    subscription_id: Mapped[UUID] = mapped_column(
+        UUID(as_uuid=True),
+        ForeignKey("plesk_subscription.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+    name: Mapped[str] = mapped_column(String(253), nullable=False)
+
+    subscription: Mapped[PleskSubscription] = relationship(back_populates="domains")
+
+
+class PleskInventorySyncState(Base):
+    __tablename__ = "plesk_inventory_sync_state"
+
+    host: Mapped[str] = mapped_column(String(253), primary_key=True)
+    server_time: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    last_full_sync: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    synced_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
@@ -0,0 +1,120 @@
+import asyncio
+import functools
+
+import aiodns
+
+from app.dns.dns_cache import TTLCache
+from app.dns.dns_resolver import RESOLVERS, DNSResolver, is_negative_answer
+
+MAX_DELEGATION_TTL = 3600
+MAX_CACHED_DELEGATIONS = 10000
+
+
+@functools.cache
+def load_public_suffix_list():
+    """
+    Parses the public suffix list snapshot bundled with tldextract, instead
+    of the default extractor downloading the live list on the first lookup,
+    which blocks the event loop. The lifespan calls this in a thread.
+    """
+    from tldextract import TLDExtract
+
+    extractor = TLDExtract(suffix_list_urls=(), cache_dir=None)
+    extractor("example.com")
+    return extractor
+
+
+def registered_domain(domain: str) -> str:
+    return load_public_suffix_list()(domain).top_domain_under_public_suffix
+
+
+class AuthoritativeResolver:
+    def __init__(self, recursive_resolver: DNSResolver):
+        """
+        Resolves NS records at the zone's own nameservers.
+
+        The zone delegation (the addresses of the zone's nameservers) is looked
+        up through `recursive_resolver` once and cached for the delegation TTL,
+        so later lookups under the same registered domain cost one query.
+        """
+        self.recursive_resolver = recursive_resolver
+        self._delegations: TTLCache[str, list[str]] = TTLCache(MAX_CACHED_DELEGATIONS)
+
+    async def _resolve_delegation(
+        self, zone: str, raise_errors: bool = False
+    ) -> list[str] | None:
+        try:
+            ns_answer = await self.recursive_resolver.query(zone, "NS")
+        except aiodns.error.DNSError as e:
+            if raise_errors and not is_negative_answer(e):
+                raise
+            return None
+        if not ns_answer:
+            return None
+
+        nameservers = sorted({str(r.host).rstrip(".") for r in ns_answer})
+        addresses = await asyncio.gather(
+            *(
+                self.recursive_resolver.resolve_a(nameserver, raise_errors=raise_errors)
+                for nameserver in nameservers
+            ),
+            return_exceptions=True,
+        )
+        nameserver_ips = list(
+            dict.fromkeys(
+                ip for ips in addresses if isinstance(ips, list) for ip in ips
+            )
+        )
+        if not nameserver_ips:
+            # Only failed lookups raise, none of the nameservers resolving
+            # is an error when one of them failed.
+            for error in addresses:
+                if isinstance(error, BaseException):
+                    raise error
+            return None
+
+        ttl = min(min(r.ttl for r in ns_answer), MAX_DELEGATION_TTL)
+        self._delegations.set(zone, nameserver_ips, ttl)
+        return nameserver_ips
+
+    async def get_delegation(
+        self, zone: str, raise_errors: bool = False
+    ) -> list[str] | None:
+        nameserver_ips = self._delegations.get(zone)
+        if nameserver_ips:
+            return nameserver_ips
+        return await self._resolve_delegation(zone, raise_errors)
+
+    async def resolve_ns(
+        self, domain: str, raise_errors: bool = False
+    ) -> list[str] | None:
+        zone = registered_domain(domain)
+        if not zone:
+            return None
+
+        nameserver_ips = await self.get_delegation(zone, raise_errors)
+        if not nameserver_ips:
+            return None
+
+        try:
+            result = await RESOLVERS.get(nameserver_ips, name="authoritative").query(
+                domain, "NS"
+            )
+        except aiodns.error.DNSError as e:
+            if is_negative_answer(e):
+                return None
+            # SERVFAIL, REFUSED or a timeout: the cached delegation may be
+            # stale, try once more with a fresh one.
+            self._delegations.invalidate(zone)
+            nameserver_ips = await self._resolve_delegation(zone, raise_errors)
+            if not nameserver_ips:
+                return None
+            try:
+                result = await RESOLVERS.get(
+                    nameserver_ips, name="authoritative"
+                ).query(domain, "NS")
+            except aiodns.error.DNSError as e:
+                if raise_errors and not is_negative_answer(e):
+                    raise
+                return None
+        return sorted([str(r.host) for r in result])
@@ -0,0 +1,73 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterable
+
+import aiodns
+
+from app.dns.dns_models import BulkDnsQuery, BulkDnsResult, PropagationStatus
+from app.dns.dns_resolver import is_negative_answer
+
+logger = logging.getLogger(__name__)
+
+ResolveQuery = Callable[[BulkDnsQuery], Awaitable[list[str] | None]]
+
+
+def deduplicate_queries(queries: Iterable[BulkDnsQuery]) -> list[BulkDnsQuery]:
+    unique: dict[tuple[str, str, str], BulkDnsQuery] = {}
+    for query in queries:
+        unique.setdefault(query.key, query)
+    return list(unique.values())
+
+
+async def resolve_bulk(
+    queries: Iterable[BulkDnsQuery], resolve: ResolveQuery, concurrency: int
+) -> AsyncIterator[BulkDnsResult]:
+    """
+    Resolve unique queries with at most `concurrency` lookups in flight and
+    yield results in completion order.
+
+    Identical queries are answered once. Workers are cancelled if the consumer
+    stops iterating early, e.g. when the HTTP client disconnects.
+    """
+    pending: asyncio.Queue[BulkDnsQuery] = asyncio.Queue()
+    unique_queries = deduplicate_queries(queries)
+    for query in unique_queries:
+        pending.put_nowait(query)
+    results: asyncio.Queue[BulkDnsResult] = asyncio.Queue()
+
+    def result(query: BulkDnsQuery, **fields) -> BulkDnsResult:
+        return BulkDnsResult(
+            name=query.name, type=query.type, resolver=query.resolver, **fields
+        )
+
+    async def lookup(query: BulkDnsQuery) -> BulkDnsResult:
+        try:
+            records = await resolve(query)
+        except aiodns.error.DNSError as e:
+            if is_negative_answer(e):
+                return result(query, status=PropagationStatus.NOT_FOUND)
+            message = e.args[1] if len(e.args) > 1 else str(e)
+            return result(query, status=PropagationStatus.ERROR, error=message)
+        except Exception:
+            logger.exception(f"Bulk DNS lookup of {query.name} {query.type} failed")
+            return result(query, status=PropagationStatus.ERROR, error="Internal error")
+        if not records:
+            return result(query, status=PropagationStatus.NOT_FOUND)
+        return result(query, status=PropagationStatus.RESOLVED, records=records)
+
+    async def worker() -> None:
+        while not pending.empty():
+            query = pending.get_nowait()
+            results.put_nowait(await lookup(query))
+
+    workers = [
+        asyncio.create_task(worker())
+        for _ in range(min(concurrency, len(unique_queries)))
+    ]
+    try:
+        for _ in range(len(unique_queries)):
+            yield await results.get()
+    finally:
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
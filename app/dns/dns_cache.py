@@ -0,0 +1,178 @@
+import time
+from collections import OrderedDict, defaultdict
+from collections.abc import Hashable, Iterable
+from typing import Any, Generic, TypeVar
+
+from app.core.config import settings
+from app.core_utils.metrics import CallbackMetric
+from app.dns.dns_models import DNSCacheStats, DNSCacheTypeStats
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+DNSCacheKey = tuple[tuple[str, ...], str, str]
+
+_MISSING = object()
+
+
+class TTLCache(Generic[K, V]):
+    def __init__(self, max_entries: int):
+        """
+        LRU cache where every entry carries its own expiry.
+
+        Args:
+            max_entries: Number of entries kept before the least recently used
+                one is evicted
+        """
+        self.max_entries = max_entries
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def get(self, key: K, default: Any = None) -> V | Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, ttl: float) -> None:
+        if ttl <= 0:
+            self._entries.pop(key, None)
+            return
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def remaining_ttl(self, key: K) -> float:
+        entry = self._entries.get(key)
+        if entry is None:
+            return 0.0
+        return max(entry[0] - time.monotonic(), 0.0)
+
+    def invalidate(self, key: K) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def keys(self) -> list[K]:
+        return list(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class DNSCache:
+    def __init__(
+        self,
+        max_ttl: int = settings.DNS_CACHE_MAX_TTL,
+        negative_ttl: int = settings.DNS_CACHE_NEGATIVE_TTL,
+        max_entries: int = settings.DNS_CACHE_MAX_ENTRIES,
+    ):
+        """
+        Shared answer cache for DNS lookups.
+
+        Positive answers live for the smallest TTL of the returned records,
+        capped at `max_ttl`. NXDOMAIN/NODATA answers are stored as `None`
+        for `negative_ttl` seconds.
+        """
+        self.max_ttl = max_ttl
+        self.negative_ttl = negative_ttl
+        self._cache: TTLCache[DNSCacheKey, list[str] | None] = TTLCache(max_entries)
+        self._hits: dict[str, int] = defaultdict(int)
+        self._negative_hits: dict[str, int] = defaultdict(int)
+        self._misses: dict[str, int] = defaultdict(int)
+
+    @staticmethod
+    def make_key(
+        nameservers: Iterable[str], name: str, record_type: str
+    ) -> DNSCacheKey:
+        return (
+            tuple(str(ns) for ns in nameservers),
+            name.lower().rstrip("."),
+            record_type.upper(),
+        )
+
+    def lookup(self, key: DNSCacheKey) -> tuple[bool, list[str] | None]:
+        record_type = key[2]
+        records = self._cache.get(key, _MISSING)
+        if records is _MISSING:
+            self._misses[record_type] += 1
+            return False, None
+        if records is None:
+            self._negative_hits[record_type] += 1
+            return True, None
+        self._hits[record_type] += 1
+        return True, list(records)
+
+    def store(self, key: DNSCacheKey, records: list[str], ttl: int) -> None:
+        self._cache.set(key, list(records), min(ttl, self.max_ttl))
+
+    def store_negative(self, key: DNSCacheKey) -> None:
+        self._cache.set(key, None, self.negative_ttl)
+
+    def invalidate_name(self, name: str) -> None:
+        name = name.lower().rstrip(".")
+        # keys() is a copy, entries can be dropped while going through it.
+        keys = self._cache.keys()
+        for key in keys:
+            if key[1] == name:
+                self._cache.invalidate(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> DNSCacheStats:
+        record_types = sorted(
+            set(self._hits) | set(self._negative_hits) | set(self._misses)
+        )
+        by_type = {
+            record_type: DNSCacheTypeStats(
+                hits=self._hits[record_type],
+                negative_hits=self._negative_hits[record_type],
+                misses=self._misses[record_type],
+            )
+            for record_type in record_types
+        }
+        return DNSCacheStats(
+            entries=len(self._cache),
+            max_entries=self._cache.max_entries,
+            max_ttl=self.max_ttl,
+            negative_ttl=self.negative_ttl,
+            hits=sum(stats.hits for stats in by_type.values()),
+            negative_hits=sum(stats.negative_hits for stats in by_type.values()),
+            misses=sum(stats.misses for stats in by_type.values()),
+            by_type=by_type,
+        )
+
+    def lookup_counts(self) -> dict[tuple[str, str], int]:
+        counts = {}
+        for result, by_type in (
+            ("hit", self._hits),
+            ("negative_hit", self._negative_hits),
+            ("miss", self._misses),
+        ):
+            for record_type, count in by_type.items():
+                counts[(record_type, result)] = count
+        return counts
+
+
+DNS_CACHE = DNSCache()
+
+DNS_CACHE_LOOKUPS = CallbackMetric(
+    "dns_cache_lookups_total",
+    "DNS cache lookups per record type and result.",
+    "counter",
+    DNS_CACHE.lookup_counts,
+    ("type", "result"),
+)
+DNS_CACHE_ENTRIES = CallbackMetric(
+    "dns_cache_entries",
+    "Entries in the DNS answer cache.",
+    "gauge",
+    lambda: {(): len(DNS_CACHE._cache)},
+)
@@ -1,9 +1,22 @@
-from typing import List
+import re
+
+from datetime import datetime
+from enum import Enum
+from typing import Annotated, List
+from typing_extensions import Self
 
 from pydantic import (
-    BaseModel
+    BaseModel,
+    Field,
+    StringConstraints,
+    computed_field,
+    model_validator,
 )
-from app.schemas import IPv4Address
+from app.schemas import IPv4Address, OPTIONALLY_FULLY_QUALIFIED_DOMAIN_NAME_PATTERN
+
+MAX_BULK_DNS_QUERIES = 5000
+
+DOMAIN_NAME_REGEX = re.compile(OPTIONALLY_FULLY_QUALIFIED_DOMAIN_NAME_PATTERN)
 
 
 class ZoneMaster(BaseModel):
@@ -14,3 +27,141 @@ class ZoneMaster(BaseModel):
 class ZoneMasterResponse(BaseModel):
     zone_name: str
     zone_masters: List[ZoneMaster]
+
+
+def _ratio(hits: int, total: int) -> float:
+    return round(hits / total, 4) if total else 0.0
+
+
+class DNSCacheTypeStats(BaseModel):
+    hits: int
+    negative_hits: int
+    misses: int
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def hit_ratio(self) -> float:
+        answered = self.hits + self.negative_hits
+        return _ratio(answered, answered + self.misses)
+
+
+class DNSCacheStats(DNSCacheTypeStats):
+    entries: int
+    max_entries: int
+    max_ttl: int
+    negative_ttl: int
+    by_type: dict[str, DNSCacheTypeStats]
+
+
+class PropagationStatus(str, Enum):
+    RESOLVED = "resolved"
+    NOT_FOUND = "not_found"
+    PENDING = "pending"
+    # The lookup failed (timeout, SERVFAIL, ...), the records are unknown.
+    ERROR = "error"
+
+
+class PublicResolver(BaseModel):
+    name: str
+    ip: str
+
+
+class NsPropagationEntry(BaseModel):
+    resolver: str
+    ip: str
+    status: PropagationStatus
+    records: list[str] | None = None
+    error: str | None = None
+    latency_ms: float | None = None
+    demoted: bool = False
+
+
+class NsPropagationResponse(BaseModel):
+    domain: str
+    complete: bool
+    results: list[NsPropagationEntry]
+
+
+class WatchJobState(str, Enum):
+    RUNNING = "running"
+    CONVERGED = "converged"
+    TIMED_OUT = "timed_out"
+    CANCELLED = "cancelled"
+
+
+class PropagationWatchProgress(BaseModel):
+    domain: str
+    state: WatchJobState
+    attempt: int = 0
+    started_at: datetime
+    updated_at: datetime
+    next_check_at: datetime | None = None
+    expected_records: list[str] | None = None
+    answered_resolvers: int = 0
+    converged_resolvers: int = 0
+    total_resolvers: int = 0
+    last_result: NsPropagationResponse | None = None
+
+
+class BulkRecordType(str, Enum):
+    A = "A"
+    MX = "MX"
+    NS = "NS"
+    PTR = "PTR"
+
+
+class BulkResolverName(str, Enum):
+    GOOGLE = "google"
+    INTERNAL = "internal"
+    AUTHORITATIVE = "authoritative"
+
+
+class BulkDnsQuery(BaseModel):
+    name: Annotated[str, StringConstraints(min_length=3, max_length=253)]
+    type: BulkRecordType
+    resolver: BulkResolverName = BulkResolverName.GOOGLE
+
+    @model_validator(mode="after")
+    def validate_name(self) -> Self:
+        if self.type is BulkRecordType.PTR:
+            IPv4Address(ip=self.name)
+        elif not DOMAIN_NAME_REGEX.match(self.name):
+            raise ValueError(f"'{self.name}' is not a valid domain name.")
+        if (
+            self.resolver is BulkResolverName.AUTHORITATIVE
+            and self.type is not BulkRecordType.NS
+        ):
+            raise ValueError("Authoritative resolver only supports NS queries.")
+        return self
+
+    @property
+    def key(self) -> tuple[str, str, str]:
+        return (self.name.lower().rstrip("."), self.type.value, self.resolver.value)
+
+
+class BulkDnsRequest(BaseModel):
+    queries: list[BulkDnsQuery] = Field(min_length=1, max_length=MAX_BULK_DNS_QUERIES)
+
+
+class BulkDnsResult(BaseModel):
+    name: str
+    type: BulkRecordType
+    resolver: BulkResolverName
+    status: PropagationStatus
+    records: list[str] | None = None
+    error: str | None = None
+
+
+class ZoneMasterPayload(BaseModel):
+    zonemaster_ip: IPv4Address
+
+
+class ZoneMasterInventoryItem(ZoneMasterPayload):
+    zone: str
+
+
+class ZoneMasterInventoryStatus(BaseModel):
+    zones: int
+    conflicts: int
+    refreshed_at: datetime | None
+    servers: dict[str, datetime]
@@ -1,38 +1,212 @@
+import asyncio
+import time
 import aiodns
+import pycares
 
-from typing import List
+from collections import OrderedDict
+from collections.abc import Callable, Sequence
+from typing import Any
+
+from app.core_utils.metrics import Counter, Histogram
+from app.dns.dns_cache import DNS_CACHE, DNSCache
+
+NEGATIVE_ANSWER_ERRNOS = {pycares.errno.ARES_ENOTFOUND, pycares.errno.ARES_ENODATA}
+PTR_DEFAULT_TTL = 300
+RESOLVER_TIMEOUT = 2
+MAX_REGISTERED_RESOLVERS = 256
+
+DNS_QUERY_DURATION = Histogram(
+    "dns_query_duration_seconds",
+    "DNS query time per resolver and record type, cache hits excluded.",
+    ("resolver", "type"),
+)
+DNS_QUERY_ERRORS = Counter(
+    "dns_query_errors_total",
+    "DNS queries answered with an error or timed out.",
+    ("resolver", "type"),
+)
+
+
+def is_negative_answer(error: aiodns.error.DNSError) -> bool:
+    """
+    The name or the record does not exist, as opposed to a failed query.
+    """
+    return bool(error.args) and error.args[0] in NEGATIVE_ANSWER_ERRNOS
 
 
 class DNSResolver:
-    def __init__(self, nameservers: List[str]):
-        self.resolver = aiodns.DNSResolver(timeout=2)
-        self.resolver.nameservers = nameservers
-        self.nameservers = nameservers
+    def __init__(
+        self,
+        nameservers: list[str],
+        cache: DNSCache = DNS_CACHE,
+        name: str = "other",
+    ):
+        self.nameservers = list(nameservers)
+        self.cache = cache
+        # Resolver label of the query metrics.
+        self.name = name
+        self._resolver: aiodns.DNSResolver | None = None
 
-    async def resolve_a(self, domain: str) -> List[str] | None:
-        try:
-            result = await self.resolver.query(domain, "A")
-            return [str(r.host) for r in result]
-        except aiodns.error.DNSError:
-            return None
+    @property
+    def resolver(self) -> aiodns.DNSResolver:
+        """
+        c-ares channel bound to the running event loop.
+
+        The channel is created on first use and kept for the lifetime of the
+        resolver; it is only recreated if the resolver is used from another loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._resolver is None or self._resolver.loop is not loop:
+            self._resolver = aiodns.DNSResolver(
+                nameservers=self.nameservers, timeout=RESOLVER_TIMEOUT, loop=loop
+            )
+        return self._resolver
 
-    async def resolve_ptr(self, ip_address: str) -> List[str] | None:
+    async def query(self, name: str, record_type: str) -> Any:
+        start = time.perf_counter()
         try:
-            result = await self.resolver.gethostbyaddr(ip_address)
-            return [str(result.name)] if result.name else None
+            return await self.resolver.query(name, record_type)
         except aiodns.error.DNSError:
-            return None
+            DNS_QUERY_ERRORS.inc(self.name, record_type)
+            raise
+        finally:
+            DNS_QUERY_DURATION.observe(
+                time.perf_counter() - start, self.name, record_type
+            )
+
+    async def close(self) -> None:
+        if self._resolver is not None:
+            await self._resolver.close()
+            self._resolver = None
+
+    async def _cached_query(
+        self,
+        name: str,
+        record_type: str,
+        extract: Callable[[list[Any]], list[str]],
+        use_cache: bool = True,
+        raise_errors: bool = False,
+    ) -> list[str] | None:
+        """
+        Records of the answer, None when the name has none. Failed queries
+        (timeouts, SERVFAIL, refusals) also give None, unless `raise_errors`
+        is set.
+        """
+        if not use_cache:
+            try:
+                result = await self.query(name, record_type)
+            except aiodns.error.DNSError as e:
+                if raise_errors and not is_negative_answer(e):
+                    raise
+                return None
+            answers = result if isinstance(result, list) else [result]
+            return extract(answers) if answers else None
+
+        key = self.cache.make_key(self.nameservers, name, record_type)
+        found, records = self.cache.lookup(key)
+        if found:
+            return records
 
-    async def resolve_mx(self, domain: str) -> List[str] | None:
         try:
-            result = await self.resolver.query(domain, "MX")
-            return [str(r.host) for r in result]
-        except aiodns.error.DNSError:
+            result = await self.query(name, record_type)
+        except aiodns.error.DNSError as e:
+            if is_negative_answer(e):
+                self.cache.store_negative(key)
+            elif raise_errors:
+                raise
             return None
 
-    async def resolve_ns(self, domain: str) -> List[str] | None:
-        try:
-            result = await self.resolver.query(domain, "NS")
-            return sorted([str(r.host) for r in result])
-        except aiodns.error.DNSError:
+        answers = result if isinstance(result, list) else [result]
+        if not answers:
+            self.cache.store_negative(key)
             return None
+        records = extract(answers)
+        self.cache.store(
+            key, records, min(getattr(r, "ttl", PTR_DEFAULT_TTL) for r in answers)
+        )
+        return records
+
+    async def resolve_a(
+        self, domain: str, raise_errors: bool = False
+    ) -> list[str] | None:
+        return await self._cached_query(
+            domain,
+            "A",
+            lambda result: [str(r.host) for r in result],
+            raise_errors=raise_errors,
+        )
+
+    async def resolve_ptr(
+        self, ip_address: str, raise_errors: bool = False
+    ) -> list[str] | None:
+        return await self._cached_query(
+            pycares.reverse_address(ip_address),
+            "PTR",
+            lambda result: [str(r.name) for r in result if r.name][:1],
+            raise_errors=raise_errors,
+        )
+
+    async def resolve_mx(
+        self, domain: str, raise_errors: bool = False
+    ) -> list[str] | None:
+        return await self._cached_query(
+            domain,
+            "MX",
+            lambda result: [str(r.host) for r in result],
+            raise_errors=raise_errors,
+        )
+
+    async def resolve_ns(
+        self, domain: str, use_cache: bool = True, raise_errors: bool = False
+    ) -> list[str] | None:
+        return await self._cached_query(
+            domain,
+            "NS",
+            lambda result: sorted([str(r.host) for r in result]),
+            use_cache=use_cache,
+            raise_errors=raise_errors,
+        )
+
+
+class ResolverRegistry:
+    def __init__(self, max_resolvers: int = MAX_REGISTERED_RESOLVERS):
+        """
+        Process-wide pool of resolvers, one per nameserver set.
+
+        Args:
+            max_resolvers: Number of resolvers kept before the least recently
+                used one is dropped from the registry
+        """
+        self.max_resolvers = max_resolvers
+        self._resolvers: OrderedDict[tuple[str, ...], DNSResolver] = OrderedDict()
+
+    def get(self, nameservers: Sequence[str], name: str = "other") -> DNSResolver:
+        """
+        Args:
+            nameservers: Nameservers the resolver queries
+            name: Metrics label, used when the resolver is created
+        """
+        key = tuple(str(ns) for ns in nameservers)
+        resolver = self._resolvers.get(key)
+        if resolver is None:
+            resolver = DNSResolver(list(key), name=name)
+            self._resolvers[key] = resolver
+            while len(self._resolvers) > self.max_resolvers:
+                # In-flight queries keep their own reference to the evicted
+                # resolver, so it is left to the garbage collector.
+                self._resolvers.popitem(last=False)
+        else:
+            self._resolvers.move_to_end(key)
+        return resolver
+
+    async def close(self) -> None:
+        resolvers = list(self._resolvers.values())
+        self._resolvers.clear()
+        for resolver in resolvers:
+            await resolver.close()
+
+    def __len__(self) -> int:
+        return len(self._resolvers)
+
+
+RESOLVERS = ResolverRegistry()
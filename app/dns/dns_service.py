@@ -1,10 +1,16 @@
-import asyncio
-import aiodns
-
+from functools import cache
+from collections.abc import AsyncIterator
 from fastapi import HTTPException
-from tldextract import extract
 
-from app.dns.dns_models import ZoneMaster
+from app.dns.dns_models import (
+    ZoneMaster,
+    NsPropagationEntry,
+    NsPropagationResponse,
+    BulkDnsQuery,
+    BulkDnsResult,
+    BulkRecordType,
+    BulkResolverName,
+)
 from app.schemas import (
     DNS_SERVER_LIST,
     ExecutionStatus,
@@ -15,7 +21,12 @@ from app.signed_executor.signed_executor_client import SignedExecutorClient
 from app.signed_executor.commands.dns_operation import DNSOperation
 from app.core.DomainMapper import HOSTS
 from app.core.config import settings
-from app.dns.dns_resolver import DNSResolver
+from app.dns.dns_cache import DNS_CACHE
+from app.dns.dns_resolver import RESOLVERS
+from app.dns.propagation import PropagationChecker
+from app.dns.authoritative_resolver import AuthoritativeResolver
+from app.dns.bulk_resolver import resolve_bulk
+from app.dns.zone_master_inventory import ZONE_MASTER_INVENTORY
 
 GOOGLE_DNS = ["8.8.8.8", "8.8.4.4"]
 
@@ -23,7 +34,6 @@ GOOGLE_DNS = ["8.8.8.8", "8.8.4.4"]
 PUBLIC_DNS = [
     {"name": "Google", "ip": "8.8.8.8"},
     {"name": "OpenDNS", "ip": "208.67.222.220"},
-    {"name": "OpenDNS", "ip": "208.67.222.220"},
     {"name": "Quad9", "ip": "9.9.9.9"},
     {"name": "Oracle Corporation", "ip": "216.146.35.35"},
     {"name": "WholeSale Internet, Inc.", "ip": "204.12.225.227"},
@@ -53,30 +63,30 @@ PUBLIC_DNS = [
 ]
 
 
-def _get_internal_nameservers() -> list[str]:
-    return [
+@cache
+def _get_internal_nameservers() -> tuple[str, ...]:
+    return tuple(
         str(HOSTS.resolve_domain(nameserver).ips[0])
         for nameserver in settings.DNS_SLAVE_SERVERS.keys()
-    ]
-
-
-async def get_ns_records(domain: str, ns_ip: str):
-    ns_resolver = aiodns.DNSResolver(timeout=2)
-    ns_resolver.nameservers = [ns_ip]
-    result = await ns_resolver.query(domain, "NS")
-    return sorted(str(r.host).rstrip(".") for r in result)
+    )
 
 
 class DNSService:
     def __init__(self):
         self.client = SignedExecutorClient()
         self.server_list = DNS_SERVER_LIST
-        self.google_resolver = DNSResolver(GOOGLE_DNS)
-        self.internal_resolver = DNSResolver(_get_internal_nameservers())
+        self.google_resolver = RESOLVERS.get(GOOGLE_DNS, name="google")
+        self.internal_resolver = RESOLVERS.get(
+            _get_internal_nameservers(), name="internal"
+        )
+        self.authoritative_resolver = AuthoritativeResolver(self.google_resolver)
+        self.propagation = PropagationChecker(PUBLIC_DNS)
 
     async def remove_zone(self, domain: DomainName) -> None:
         command = DNSOperation.remove_zone()
         await self.client.execute_on_servers(self.server_list, command, domain.name)
+        DNS_CACHE.invalidate_name(domain.name)
+        ZONE_MASTER_INVENTORY.index.remove_zone(domain.name)
 
     async def get_zone_masters(self, domain: DomainName) -> list[ZoneMaster]:
         command = DNSOperation.get_zone_master()
@@ -90,7 +100,7 @@ class DNSService:
         for response in responses:
             if response.payload:
                 zone_masters.append(
-                    ZoneMaster(host=response.host, ip=response.payload["zonemaster_ip"])
+                    ZoneMaster(host=response.host, ip=response.payload.zonemaster_ip)
                 )
 
         if not zone_masters:
@@ -101,42 +111,58 @@ class DNSService:
 
         return zone_masters
 
-    async def resolve_authoritative_ns_record(self, domain: str) -> list[str] | None:
-        try:
-            google_resolver = aiodns.DNSResolver(nameservers=GOOGLE_DNS)
-
-            top_level_domain = extract(domain).registered_domain
-            if not top_level_domain:
-                return None
+    async def lookup_zone_masters(
+        self, domain: DomainName, refresh: bool = False
+    ) -> list[ZoneMaster]:
+        if not refresh:
+            zone_masters = ZONE_MASTER_INVENTORY.index.get(domain.name)
+            if zone_masters:
+                return zone_masters
 
-            soa_record = await google_resolver.query(top_level_domain, "SOA")
-            primary_ns = str(soa_record.nsname).rstrip(".")
-
-            ns_ip_result = await google_resolver.query(primary_ns, "A")
-            primary_ns_ip = str(ns_ip_result[0].host)
-
-            auth_resolver = aiodns.DNSResolver(nameservers=[primary_ns_ip])
-            ns_records = await auth_resolver.query(domain, "NS")
-            return sorted([str(r.host) for r in ns_records])
+        try:
+            zone_masters = await self.get_zone_masters(domain)
+        except HTTPException:
+            ZONE_MASTER_INVENTORY.index.remove_zone(domain.name)
+            raise
+        ZONE_MASTER_INVENTORY.index.set_zone(domain.name, zone_masters)
+        return zone_masters
 
-        except aiodns.error.DNSError:
-            return None
+    async def resolve_authoritative_ns_record(self, domain: str) -> list[str] | None:
+        return await self.authoritative_resolver.resolve_ns(domain)
 
     async def get_ns_records_from_public_ns(
-        self, domain: str
-    ) -> dict[str, dict[str, list[str]]]:
-        async def get_ns_records(domain: str, ns_ip: str) -> list[str]:
-            ns_resolver = aiodns.DNSResolver(timeout=2)
-            ns_resolver.nameservers = [ns_ip]
-            result = await ns_resolver.query(domain, "NS")
-            return sorted(str(r.host).rstrip(".") for r in result)
-
-        tasks = [
-            get_ns_records(domain, ns_ip=nameserver["ip"]) for nameserver in PUBLIC_DNS
-        ]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        ns_dict = {}
-        for nameserver, result in zip(PUBLIC_DNS, results):
-            ns_dict[nameserver["name"]] = result
+        self, domain: str, deadline: float | None = None
+    ) -> NsPropagationResponse:
+        return await self.propagation.check(domain, deadline=deadline)
+
+    def stream_ns_records_from_public_ns(
+        self, domain: str, deadline: float | None = None
+    ) -> AsyncIterator[NsPropagationEntry]:
+        return self.propagation.stream(domain, deadline=deadline)
+
+    async def _resolve_bulk_query(self, query: BulkDnsQuery) -> list[str] | None:
+        # Failed lookups raise, so bulk results tell them from missing records.
+        if query.resolver is BulkResolverName.AUTHORITATIVE:
+            return await self.authoritative_resolver.resolve_ns(
+                query.name, raise_errors=True
+            )
 
-        return ns_dict
+        resolver = (
+            self.internal_resolver
+            if query.resolver is BulkResolverName.INTERNAL
+            else self.google_resolver
+        )
+        match query.type:
+            case BulkRecordType.A:
+                return await resolver.resolve_a(query.name, raise_errors=True)
+            case BulkRecordType.MX:
+                return await resolver.resolve_mx(query.name, raise_errors=True)
+            case BulkRecordType.NS:
+                return await resolver.resolve_ns(query.name, raise_errors=True)
+            case BulkRecordType.PTR:
+                return await resolver.resolve_ptr(query.name, raise_errors=True)
+
+    def resolve_bulk(self, queries: list[BulkDnsQuery]) -> AsyncIterator[BulkDnsResult]:
+        return resolve_bulk(
+            queries, self._resolve_bulk_query, settings.DNS_BULK_CONCURRENCY
+        )
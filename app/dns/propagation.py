@@ -0,0 +1,183 @@
+import asyncio
+import time
+from collections.abc import AsyncIterator, Iterable
+from dataclasses import dataclass
+
+import aiodns
+
+from app.core.config import settings
+from app.dns.dns_models import (
+    NsPropagationEntry,
+    NsPropagationResponse,
+    PropagationStatus,
+    PublicResolver,
+)
+from app.dns.dns_resolver import RESOLVERS
+
+LATENCY_SMOOTHING = 0.3
+SLOW_CHECKS_BEFORE_DEMOTION = 3
+
+
+@dataclass
+class ResolverLatency:
+    average_ms: float | None = None
+    slow_checks: int = 0
+
+    @property
+    def demoted(self) -> bool:
+        return self.slow_checks >= SLOW_CHECKS_BEFORE_DEMOTION
+
+
+class LatencyTracker:
+    def __init__(self, slow_threshold_ms: float):
+        """
+        Keeps a smoothed latency per resolver IP.
+
+        A resolver that misses `slow_threshold_ms` on several consecutive
+        checks is demoted; one fast answer promotes it back.
+        """
+        self.slow_threshold_ms = slow_threshold_ms
+        self._latencies: dict[str, ResolverLatency] = {}
+
+    def get(self, ip: str) -> ResolverLatency:
+        return self._latencies.setdefault(ip, ResolverLatency())
+
+    def record(self, ip: str, latency_ms: float) -> None:
+        latency = self.get(ip)
+        if latency.average_ms is None:
+            latency.average_ms = latency_ms
+        else:
+            latency.average_ms += LATENCY_SMOOTHING * (latency_ms - latency.average_ms)
+
+        if latency_ms > self.slow_threshold_ms:
+            latency.slow_checks += 1
+        else:
+            latency.slow_checks = 0
+
+    def is_demoted(self, ip: str) -> bool:
+        return self.get(ip).demoted
+
+
+def deduplicate_resolvers(resolvers: Iterable[dict[str, str]]) -> list[PublicResolver]:
+    unique: dict[str, PublicResolver] = {}
+    for resolver in resolvers:
+        unique.setdefault(resolver["ip"], PublicResolver(**resolver))
+    return list(unique.values())
+
+
+class PropagationChecker:
+    def __init__(
+        self,
+        resolvers: Iterable[dict[str, str]],
+        deadline: float = settings.DNS_PROPAGATION_DEADLINE,
+    ):
+        self.resolvers = deduplicate_resolvers(resolvers)
+        self.deadline = deadline
+        self.latency = LatencyTracker(slow_threshold_ms=deadline * 1000)
+        self._background_queries: set[asyncio.Task] = set()
+
+    async def _query(self, domain: str, resolver: PublicResolver) -> NsPropagationEntry:
+        start_time = time.perf_counter()
+        error = None
+        try:
+            records = await RESOLVERS.get([resolver.ip], name=resolver.name).resolve_ns(
+                domain, use_cache=False, raise_errors=True
+            )
+        except aiodns.error.DNSError as e:
+            records = None
+            error = e.args[1] if len(e.args) > 1 else str(e)
+        latency_ms = (time.perf_counter() - start_time) * 1000
+        self.latency.record(resolver.ip, latency_ms)
+
+        if error is not None:
+            status = PropagationStatus.ERROR
+        elif records:
+            status = PropagationStatus.RESOLVED
+        else:
+            status = PropagationStatus.NOT_FOUND
+        return NsPropagationEntry(
+            resolver=resolver.name,
+            ip=resolver.ip,
+            status=status,
+            records=sorted(record.rstrip(".") for record in records)
+            if records
+            else None,
+            error=error,
+            latency_ms=round(latency_ms, 2),
+            demoted=self.latency.is_demoted(resolver.ip),
+        )
+
+    def _pending_entry(self, resolver: PublicResolver) -> NsPropagationEntry:
+        return NsPropagationEntry(
+            resolver=resolver.name,
+            ip=resolver.ip,
+            status=PropagationStatus.PENDING,
+            demoted=self.latency.is_demoted(resolver.ip),
+        )
+
+    def _start_queries(self, domain: str) -> dict[asyncio.Task, PublicResolver]:
+        tasks: dict[asyncio.Task, PublicResolver] = {}
+        for resolver in self.resolvers:
+            task = asyncio.create_task(self._query(domain, resolver))
+            # Queries outliving the deadline are not cancelled: their answer
+            # still feeds the latency tracker so demoted resolvers can recover.
+            self._background_queries.add(task)
+            task.add_done_callback(self._background_queries.discard)
+            tasks[task] = resolver
+        return tasks
+
+    def _awaited(self, tasks: dict[asyncio.Task, PublicResolver]) -> set[asyncio.Task]:
+        return {
+            task
+            for task, resolver in tasks.items()
+            if not self.latency.is_demoted(resolver.ip)
+        }
+
+    async def check(
+        self, domain: str, deadline: float | None = None
+    ) -> NsPropagationResponse:
+        """
+        Query every public resolver and return once all non-demoted resolvers
+        answered or the deadline passed, whichever comes first.
+        """
+        tasks = self._start_queries(domain)
+        awaited = self._awaited(tasks)
+        if awaited:
+            await asyncio.wait(awaited, timeout=deadline or self.deadline)
+
+        results = [
+            task.result() if task.done() else self._pending_entry(resolver)
+            for task, resolver in tasks.items()
+        ]
+        return NsPropagationResponse(
+            domain=domain,
+            complete=all(
+                entry.status is not PropagationStatus.PENDING for entry in results
+            ),
+            results=results,
+        )
+
+    async def stream(
+        self, domain: str, deadline: float | None = None
+    ) -> AsyncIterator[NsPropagationEntry]:
+        """
+        Yield each resolver's answer as it arrives, then a pending entry for
+        every resolver that did not answer before the deadline.
+        """
+        tasks = self._start_queries(domain)
+        pending = set(tasks)
+        loop = asyncio.get_running_loop()
+        finish_at = loop.time() + (deadline or self.deadline)
+
+        while pending:
+            timeout = finish_at - loop.time()
+            if timeout <= 0:
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                yield task.result()
+
+        for task in pending:
+            yield self._pending_entry(tasks[task])
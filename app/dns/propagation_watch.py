@@ -0,0 +1,185 @@
+import asyncio
+import logging
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, timezone
+from typing import TYPE_CHECKING
+
+from app.core.config import settings
+from app.dns.dns_cache import TTLCache
+from app.dns.dns_models import (
+    NsPropagationResponse,
+    PropagationStatus,
+    PropagationWatchProgress,
+    WatchJobState,
+)
+
+if TYPE_CHECKING:
+    from app.dns.dns_service import DNSService
+
+logger = logging.getLogger(__name__)
+
+INITIAL_POLL_DELAY = 10
+MAX_POLL_DELAY = 300
+POLL_BACKOFF_FACTOR = 2
+MAX_WATCH_DURATION = 60 * 60 * 2
+FINISHED_JOB_RETENTION = 60 * 60
+MAX_FINISHED_JOBS = 1000
+
+
+class TooManyWatchJobs(Exception):
+    pass
+
+
+def _normalize_records(records: list[str] | None) -> list[str] | None:
+    if not records:
+        return None
+    return sorted(record.lower().rstrip(".") for record in records)
+
+
+def count_converged(
+    result: NsPropagationResponse, expected_records: list[str] | None
+) -> tuple[int, int]:
+    answered = 0
+    converged = 0
+    for entry in result.results:
+        # A resolver that failed or did not answer yet says nothing about
+        # propagation, it must not keep the job from converging.
+        if entry.status in (PropagationStatus.PENDING, PropagationStatus.ERROR):
+            continue
+        answered += 1
+        if _normalize_records(entry.records) == expected_records:
+            converged += 1
+    return answered, converged
+
+
+class PropagationWatchJob:
+    def __init__(self, domain: str, dns_service: "DNSService"):
+        now = datetime.now(timezone.utc)
+        self.domain = domain
+        self.dns_service = dns_service
+        self.progress = PropagationWatchProgress(
+            domain=domain,
+            state=WatchJobState.RUNNING,
+            started_at=now,
+            updated_at=now,
+            total_resolvers=len(dns_service.propagation.resolvers),
+        )
+        self._subscribers: set[asyncio.Queue[PropagationWatchProgress]] = set()
+        self.task: asyncio.Task | None = None
+
+    def _publish(self, **changes) -> None:
+        self.progress = self.progress.model_copy(
+            update={**changes, "updated_at": datetime.now(timezone.utc)}
+        )
+        for queue in self._subscribers:
+            # Subscribers only care about the latest progress, so a slow
+            # consumer gets the newest snapshot instead of a backlog.
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(self.progress)
+
+    async def _poll(self) -> bool:
+        expected_records = _normalize_records(
+            await self.dns_service.resolve_authoritative_ns_record(self.domain)
+        )
+        result = await self.dns_service.get_ns_records_from_public_ns(self.domain)
+        answered, converged = count_converged(result, expected_records)
+        self._publish(
+            attempt=self.progress.attempt + 1,
+            expected_records=expected_records,
+            answered_resolvers=answered,
+            converged_resolvers=converged,
+            last_result=result,
+        )
+        # Resolvers still pending at the deadline (usually demoted ones) do not
+        # hold the job back; every resolver that did answer has to agree.
+        return answered > 0 and converged == answered
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        give_up_at = loop.time() + MAX_WATCH_DURATION
+        delay = INITIAL_POLL_DELAY
+        try:
+            while True:
+                if await self._poll():
+                    self._publish(state=WatchJobState.CONVERGED, next_check_at=None)
+                    return
+                if loop.time() + delay > give_up_at:
+                    self._publish(state=WatchJobState.TIMED_OUT, next_check_at=None)
+                    return
+                self._publish(
+                    next_check_at=datetime.now(timezone.utc) + timedelta(seconds=delay)
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * POLL_BACKOFF_FACTOR, MAX_POLL_DELAY)
+        except asyncio.CancelledError:
+            self._publish(state=WatchJobState.CANCELLED, next_check_at=None)
+            raise
+        except Exception:
+            logger.exception(f"Propagation watch for {self.domain} failed")
+            self._publish(state=WatchJobState.CANCELLED, next_check_at=None)
+
+    async def subscribe(self) -> AsyncIterator[PropagationWatchProgress]:
+        queue: asyncio.Queue[PropagationWatchProgress] = asyncio.Queue(maxsize=1)
+        self._subscribers.add(queue)
+        try:
+            progress = self.progress
+            yield progress
+            while progress.state is WatchJobState.RUNNING:
+                progress = await queue.get()
+                yield progress
+        finally:
+            self._subscribers.discard(queue)
+
+
+class PropagationWatchManager:
+    def __init__(self, max_running: int = settings.DNS_PROPAGATION_MAX_WATCHES):
+        """
+        One shared watch job per domain, at most `max_running` at once.
+
+        Running jobs are kept until they finish, finished jobs stay readable
+        for `FINISHED_JOB_RETENTION` seconds.
+        """
+        self.max_running = max_running
+        self._running: dict[str, PropagationWatchJob] = {}
+        self._finished: TTLCache[str, PropagationWatchJob] = TTLCache(MAX_FINISHED_JOBS)
+
+    @staticmethod
+    def _key(domain: str) -> str:
+        return domain.lower().rstrip(".")
+
+    def start(self, domain: str, dns_service: "DNSService") -> PropagationWatchJob:
+        key = self._key(domain)
+        job = self._running.get(key)
+        if job is not None:
+            return job
+        if len(self._running) >= self.max_running:
+            raise TooManyWatchJobs(
+                f"{len(self._running)} propagation watches are already running"
+            )
+
+        job = PropagationWatchJob(key, dns_service)
+        job.task = asyncio.create_task(job.run())
+        job.task.add_done_callback(lambda _: self._on_finished(key, job))
+        self._running[key] = job
+        self._finished.invalidate(key)
+        return job
+
+    def _on_finished(self, key: str, job: PropagationWatchJob) -> None:
+        if self._running.get(key) is job:
+            del self._running[key]
+        self._finished.set(key, job, FINISHED_JOB_RETENTION)
+
+    def get(self, domain: str) -> PropagationWatchJob | None:
+        key = self._key(domain)
+        return self._running.get(key) or self._finished.get(key)
+
+    async def shutdown(self) -> None:
+        tasks = [job.task for job in self._running.values() if job.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._running.clear()
+
+
+WATCH_JOBS = PropagationWatchManager()
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.db import engine
+from app.db.crud import db_get_zone_master_inventory, db_replace_zone_master_inventory
+from app.dns.dns_models import (
+    ZoneMaster,
+    ZoneMasterInventoryStatus,
+    ZoneMasterResponse,
+)
+from app.schemas import DNS_SERVER_LIST, ExecutionStatus
+from app.signed_executor.commands.dns_operation import DNSOperation
+from app.signed_executor.signed_executor_client import SignedExecutorClient
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_zone(zone: str) -> str:
+    return zone.lower().rstrip(".")
+
+
+class ZoneMasterIndex:
+    def __init__(self):
+        """
+        In-memory zone -> zone master map built from every DNS slave's
+        inventory.
+        """
+        self._by_server: dict[str, dict[str, str]] = {}
+        self._by_zone: dict[str, dict[str, str]] = defaultdict(dict)
+        self.server_refreshed_at: dict[str, datetime] = {}
+
+    def replace_server(
+        self,
+        dns_server: str,
+        zone_masters: dict[str, str],
+        refreshed_at: datetime | None = None,
+    ) -> None:
+        for zone in self._by_server.get(dns_server, {}):
+            self._drop(zone, dns_server)
+        self._by_server[dns_server] = dict(zone_masters)
+        for zone, ip in zone_masters.items():
+            self._by_zone[zone][dns_server] = ip
+        self.server_refreshed_at[dns_server] = refreshed_at or datetime.now(
+            timezone.utc
+        )
+
+    def _drop(self, zone: str, dns_server: str) -> None:
+        masters = self._by_zone.get(zone)
+        if masters is None:
+            return
+        masters.pop(dns_server, None)
+        if not masters:
+            del self._by_zone[zone]
+
+    def set_zone(self, zone: str, zone_masters: list[ZoneMaster]) -> None:
+        zone = _normalize_zone(zone)
+        self.remove_zone(zone)
+        for zone_master in zone_masters:
+            self._by_server.setdefault(zone_master.host, {})[zone] = str(zone_master.ip)
+            self._by_zone[zone][zone_master.host] = str(zone_master.ip)
+
+    def remove_zone(self, zone: str) -> None:
+        zone = _normalize_zone(zone)
+        for dns_server in self._by_zone.pop(zone, {}):
+            self._by_server.get(dns_server, {}).pop(zone, None)
+
+    def get(self, zone: str) -> list[ZoneMaster] | None:
+        masters = self._by_zone.get(_normalize_zone(zone))
+        if not masters:
+            return None
+        return [ZoneMaster(host=host, ip=ip) for host, ip in sorted(masters.items())]
+
+    def conflicts(self) -> list[ZoneMasterResponse]:
+        return [
+            ZoneMasterResponse(
+                zone_name=zone,
+                zone_masters=[
+                    ZoneMaster(host=host, ip=ip) for host, ip in sorted(masters.items())
+                ],
+            )
+            for zone, masters in sorted(self._by_zone.items())
+            if len(set(masters.values())) > 1
+        ]
+
+    def __len__(self) -> int:
+        return len(self._by_zone)
+
+
+class ZoneMasterInventory:
+    def __init__(
+        self,
+        server_list: list[str] = DNS_SERVER_LIST,
+        refresh_interval: int = settings.DNS_ZONE_INVENTORY_REFRESH_INTERVAL,
+    ):
+        self.server_list = server_list
+        self.refresh_interval = refresh_interval
+        self.index = ZoneMasterIndex()
+        self._client: SignedExecutorClient | None = None
+        self._refresh_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def client(self) -> SignedExecutorClient:
+        if self._client is None:
+            self._client = SignedExecutorClient()
+        return self._client
+
+    @staticmethod
+    def _store(dns_server: str, zone_masters: dict[str, str]) -> None:
+        with Session(engine) as session:
+            db_replace_zone_master_inventory(session, dns_server, zone_masters)
+
+    @staticmethod
+    def _load() -> dict[str, tuple[dict[str, str], datetime]]:
+        zone_masters: dict[str, dict[str, str]] = defaultdict(dict)
+        refreshed_at: dict[str, datetime] = {}
+        with Session(engine) as session:
+            for row in db_get_zone_master_inventory(session):
+                zone_masters[row.dns_server][row.zone] = str(row.zonemaster_ip)
+                refreshed_at[row.dns_server] = max(
+                    refreshed_at.get(row.dns_server, row.updated_at), row.updated_at
+                )
+        return {
+            dns_server: (zones, refreshed_at[dns_server])
+            for dns_server, zones in zone_masters.items()
+        }
+
+    async def load(self) -> None:
+        try:
+            inventory = await asyncio.to_thread(self._load)
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to load zone master inventory from database: {e}")
+            return
+        for dns_server, (zone_masters, refreshed_at) in inventory.items():
+            self.index.replace_server(dns_server, zone_masters, refreshed_at)
+
+    async def refresh(self) -> ZoneMasterInventoryStatus:
+        async with self._refresh_lock:
+            responses = await self.client.execute_on_servers(
+                self.server_list, DNSOperation.get_zone_master_inventory()
+            )
+            for response in responses:
+                if response.status is not ExecutionStatus.OK or not response.payload:
+                    logger.warning(
+                        f"Zone master inventory from {response.host} skipped: "
+                        f"{response.status} {response.message}"
+                    )
+                    continue
+                zone_masters = {
+                    _normalize_zone(item.zone): str(item.zonemaster_ip)
+                    for item in response.payload
+                }
+                self.index.replace_server(response.host, zone_masters)
+                try:
+                    await asyncio.to_thread(self._store, response.host, zone_masters)
+                except SQLAlchemyError as e:
+                    logger.error(
+                        f"Failed to store zone master inventory of {response.host}: {e}"
+                    )
+        return self.status()
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Zone master inventory refresh failed")
+            await asyncio.sleep(self.refresh_interval)
+
+    async def start(self) -> None:
+        await self.load()
+        if self.refresh_interval > 0:
+            self._task = asyncio.create_task(self._refresh_periodically())
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def status(self) -> ZoneMasterInventoryStatus:
+        refreshed = self.index.server_refreshed_at
+        return ZoneMasterInventoryStatus(
+            zones=len(self.index),
+            conflicts=len(self.index.conflicts()),
+            refreshed_at=min(refreshed.values()) if refreshed else None,
+            servers=dict(refreshed),
+        )
+
+
+ZONE_MASTER_INVENTORY = ZoneMasterInventory()
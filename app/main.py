@@ -1,26 +1,44 @@
-import sentry_sdk
+import asyncio
 
-from fastapi import FastAPI, APIRouter
+from fastapi import Depends, FastAPI, APIRouter, Request
+from fastapi.responses import JSONResponse, Response
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.core.config import settings
-from app.core_utils.loggers import LoggingMiddleware
+from app.core.dependencies import RoleChecker, ssh_work_context, verify_metrics_token
+from app.core_utils.timing import ServerTimingMiddleware
+from app.core_utils.loop_monitor import LOOP_MONITOR
+from app.core_utils.metrics import (
+    MetricsMiddleware,
+    PROMETHEUS_CONTENT_TYPE,
+    REGISTRY,
+    render,
+)
 from app.users import users_router as users
 from app.auth import auth_router as login, password_reset
 from app.api import utils_router as utils, plesk_router as plesk, dns_router as dns
 from app.core_utils.loggers import (
+    LOG_QUEUE,
+    LoggingMiddleware,
     disable_default_uvicorn_access_logs,
     setup_actions_logger,
+    setup_app_logger,
     setup_custom_access_logger,
     setup_ssh_logger,
 )
-from app.schemas import PLESK_SERVER_LIST, DNS_SERVER_LIST
+from app.schemas import PLESK_SERVER_LIST, DNS_SERVER_LIST, UserRoles
 from app.signed_executor.async_ssh_handler import (
     initialize_connection_pool,
     close_all_connections,
 )
+from app.dns.authoritative_resolver import load_public_suffix_list
+from app.dns.dns_resolver import RESOLVERS
+from app.dns.propagation_watch import WATCH_JOBS
+from app.dns.zone_master_inventory import ZONE_MASTER_INVENTORY
+from app.plesk.subscription_inventory import SUBSCRIPTION_INVENTORY
+from app.signed_executor.ssh_scheduler import SshOverloaded
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -28,18 +46,36 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 
 
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
+    # Imported only when enabled, it is one of the slowest imports.
+    import sentry_sdk
+
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     disable_default_uvicorn_access_logs()
+    setup_app_logger()
     setup_custom_access_logger()
     setup_actions_logger()
     setup_ssh_logger()
-    await initialize_connection_pool(PLESK_SERVER_LIST + DNS_SERVER_LIST)
+    await LOOP_MONITOR.start()
+    await asyncio.gather(
+        initialize_connection_pool(PLESK_SERVER_LIST + DNS_SERVER_LIST),
+        asyncio.to_thread(load_public_suffix_list),
+    )
+    await ZONE_MASTER_INVENTORY.start()
+    await SUBSCRIPTION_INVENTORY.start()
+    await REGISTRY.start()
     yield
+    await REGISTRY.shutdown()
+    await SUBSCRIPTION_INVENTORY.shutdown()
+    await ZONE_MASTER_INVENTORY.shutdown()
+    await WATCH_JOBS.shutdown()
     await close_all_connections()
+    await RESOLVERS.close()
+    await LOOP_MONITOR.shutdown()
+    LOG_QUEUE.stop()
 
 
 app = FastAPI(
@@ -60,7 +96,22 @@ if settings.all_cors_origins:
     )
 
 app.add_middleware(LoggingMiddleware)
-api_router = APIRouter(prefix=settings.API_V1_STR)
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(SshOverloaded)
+async def ssh_overloaded_handler(request: Request, exc: SshOverloaded):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": str(exc)},
+        headers={"Retry-After": "5"},
+    )
+
+
+api_router = APIRouter(
+    prefix=settings.API_V1_STR, dependencies=[Depends(ssh_work_context)]
+)
 
 api_router.include_router(dns.router)
 api_router.include_router(users.router)
@@ -70,3 +121,23 @@ api_router.include_router(password_reset.router)
 api_router.include_router(login.router)
 
 app.include_router(api_router)
+
+
+# The metrics name internal hosts. Prometheus scrapes with METRICS_TOKEN,
+# without one set only superusers can read them.
+metrics_auth = (
+    verify_metrics_token
+    if settings.METRICS_TOKEN
+    else RoleChecker([UserRoles.SUPERUSER])
+)
+
+
+@app.get(
+    "/metrics",
+    tags=["metrics"],
+    include_in_schema=False,
+    dependencies=[Depends(metrics_auth)],
+)
+async def metrics() -> Response:
+    snapshot = await REGISTRY.collect()
+    return Response(content=render(snapshot), media_type=PROMETHEUS_CONTENT_TYPE)
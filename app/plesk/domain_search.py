@@ -0,0 +1,133 @@
+import bisect
+from collections import Counter, defaultdict
+
+from app.plesk.plesk_schemas import SubscriptionSearchMode
+
+FUZZY_MIN_SIMILARITY = 0.3
+
+
+def trigrams(value: str, padded: bool = True) -> set[str]:
+    """
+    pg_trgm style trigrams: padded values get two leading blanks and one
+    trailing blank so the start and end of the name weigh more.
+    """
+    if padded:
+        value = f"  {value} "
+    return {value[i : i + 3] for i in range(len(value) - 2)}
+
+
+def reverse_labels(domain: str) -> str:
+    return ".".join(reversed(domain.split(".")))
+
+
+def normalize_query(query: str) -> str:
+    return query.strip().lower().rstrip(".")
+
+
+class DomainSearchIndex:
+    def __init__(self):
+        """
+        Domain names indexed by trigram for fuzzy and substring search, and
+        kept sorted by name and by reversed labels for prefix and suffix
+        search. The sorted lists are rebuilt lazily after changes, which come
+        in bursts from inventory syncs.
+        """
+        self._trigrams: dict[str, set[str]] = defaultdict(set)
+        # domain -> number of its trigrams
+        self._domains: dict[str, int] = {}
+        self._sorted: list[str] | None = None
+        self._sorted_reversed: list[str] | None = None
+
+    def add(self, domain: str) -> None:
+        if domain in self._domains:
+            return
+        domain_trigrams = trigrams(domain)
+        self._domains[domain] = len(domain_trigrams)
+        for trigram in domain_trigrams:
+            self._trigrams[trigram].add(domain)
+        self._sorted = self._sorted_reversed = None
+
+    def remove(self, domain: str) -> None:
+        if domain not in self._domains:
+            return
+        del self._domains[domain]
+        for trigram in trigrams(domain):
+            domains = self._trigrams.get(trigram)
+            if domains is None:
+                continue
+            domains.discard(domain)
+            if not domains:
+                del self._trigrams[trigram]
+        self._sorted = self._sorted_reversed = None
+
+    @staticmethod
+    def _range(values: list[str], prefix: str) -> list[str]:
+        start = bisect.bisect_left(values, prefix)
+        end = bisect.bisect_left(values, prefix + "\uffff")
+        return values[start:end]
+
+    def prefix(self, query: str) -> list[str]:
+        if self._sorted is None:
+            self._sorted = sorted(self._domains)
+        return self._range(self._sorted, query)
+
+    def suffix(self, query: str) -> list[str]:
+        """
+        The zone itself and every name under it, `*.example.kz` and
+        `example.kz` are the same query.
+        """
+        query = query.removeprefix("*.")
+        if self._sorted_reversed is None:
+            self._sorted_reversed = sorted(reverse_labels(d) for d in self._domains)
+        reversed_query = reverse_labels(query)
+        matches = self._range(self._sorted_reversed, reversed_query + ".")
+        if query in self._domains:
+            matches.insert(0, reversed_query)
+        return [reverse_labels(match) for match in matches]
+
+    def substring(self, query: str) -> list[str]:
+        query_trigrams = trigrams(query, padded=False)
+        if not query_trigrams:
+            candidates = self._domains.keys()
+        else:
+            candidates = set.intersection(
+                *(self._trigrams.get(trigram, set()) for trigram in query_trigrams)
+            )
+        return sorted(domain for domain in candidates if query in domain)
+
+    def fuzzy(
+        self, query: str, min_similarity: float = FUZZY_MIN_SIMILARITY
+    ) -> list[str]:
+        """
+        Names ranked by trigram similarity to the query, best match first.
+        """
+        query_trigrams = trigrams(query)
+        shared = Counter(
+            domain
+            for trigram in query_trigrams
+            for domain in self._trigrams.get(trigram, ())
+        )
+        ranked = []
+        for domain, count in shared.items():
+            similarity = count / (len(query_trigrams) + self._domains[domain] - count)
+            if similarity >= min_similarity:
+                ranked.append((-similarity, domain))
+        ranked.sort()
+        return [domain for _, domain in ranked]
+
+    def search(self, query: str, mode: SubscriptionSearchMode) -> list[str]:
+        query = normalize_query(query)
+        match mode:
+            case SubscriptionSearchMode.EXACT:
+                return [query] if query in self._domains else []
+            case SubscriptionSearchMode.PREFIX:
+                return self.prefix(query)
+            case SubscriptionSearchMode.SUFFIX:
+                return self.suffix(query)
+            case SubscriptionSearchMode.SUBSTRING:
+                return self.substring(query)
+            case SubscriptionSearchMode.FUZZY:
+                return self.fuzzy(query)
+
+    def __len__(self) -> int:
+        return len(self._domains)
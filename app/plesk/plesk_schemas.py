@@ -1,6 +1,9 @@
 import re
 import string
 
+from datetime import datetime
+from enum import Enum
+
 from pydantic import (
     BaseModel,
     RootModel,
@@ -53,8 +56,7 @@ class SubscriptionLoginLinkInput(BaseModel):
         return v
 
 
-class SubscriptionDetailsModel(BaseModel):
-    host: HostIpData   
+class SubscriptionItem(BaseModel):
     id: str
     name: str
     username: str
@@ -66,10 +68,34 @@ class SubscriptionDetailsModel(BaseModel):
     subscription_status: str
 
 
+class SubscriptionDetailsModel(SubscriptionItem):
+    host: HostIpData
+
+
 class SubscriptionListResponseModel(RootModel):
     root: List[SubscriptionDetailsModel]
 
 
+class SubscriptionInventoryPayload(BaseModel):
+    server_time: int
+    subscriptions: list[SubscriptionItem]
+    removed_ids: list[str] = []
+
+
+class SubscriptionSearchMode(str, Enum):
+    EXACT = "exact"
+    PREFIX = "prefix"
+    SUFFIX = "suffix"
+    SUBSTRING = "substring"
+    FUZZY = "fuzzy"
+
+
+class SubscriptionInventoryStatus(BaseModel):
+    subscriptions: int
+    domains: int
+    servers: dict[str, datetime]
+
+
 class SetZonemasterInput(BaseModel):
     target_plesk_server: Annotated[
         str,
@@ -12,6 +12,8 @@ from app.plesk.plesk_schemas import SubscriptionDetailsModel, TestMailData, Logi
 from app.signed_executor.signed_executor_client import SignedExecutorClient
 from app.signed_executor.commands.plesk_operation import PleskOperation
 from app.core.DomainMapper import HOSTS
+from app.plesk.subscription_inventory import SUBSCRIPTION_INVENTORY
+from app.plesk.plesk_schemas import SubscriptionSearchMode
 
 
 class PleskService:
@@ -57,14 +59,29 @@ class PleskService:
 
         results = []
         for response in responses:
-            host_name = response.host
             if response.payload:
-                for item in response.payload:
-                    model_data = {"host": HOSTS.resolve_domain(host_name), **item}
-                    model = SubscriptionDetailsModel.model_validate(model_data)
-                    results.append(model)
+                host_data = HOSTS.resolve_domain(response.host)
+                results.extend(
+                    SubscriptionDetailsModel.model_construct(host=host_data, **dict(item))
+                    for item in response.payload
+                )
         return results
 
+    async def find_subscriptions(
+        self, domain: SubscriptionName, live: bool = False
+    ) -> list[SubscriptionDetailsModel]:
+        """
+        Answer from the subscription inventory and only ask every Plesk server
+        when the domain is not in it or `live` is set.
+        """
+        if not live:
+            subscriptions = SUBSCRIPTION_INVENTORY.store.search(
+                domain.name, SubscriptionSearchMode.EXACT
+            )
+            if subscriptions:
+                return subscriptions
+        return await self.fetch_subscription_info(domain)
+
     async def generate_subscription_login_link(
         self, host: PleskServerDomain, subscription_id: int, ssh_username: LinuxUsername
     ) -> LoginLinkData:
@@ -0,0 +1,286 @@
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.DomainMapper import HOSTS
+from app.db.crud import (
+    db_apply_subscription_inventory,
+    db_get_inventory_sync_states,
+    db_get_subscription_inventory,
+)
+from app.db.models import PleskSubscription
+from app.plesk.domain_search import DomainSearchIndex
+from app.plesk.plesk_schemas import (
+    SubscriptionDetailsModel,
+    SubscriptionInventoryPayload,
+    SubscriptionInventoryStatus,
+    SubscriptionItem,
+    SubscriptionSearchMode,
+)
+from app.schemas import PLESK_SERVER_LIST, ExecutionStatus, SubscriptionName
+from app.signed_executor.commands.plesk_operation import PleskOperation
+from app.signed_executor.signed_executor_client import SignedExecutorClient
+
+logger = logging.getLogger(__name__)
+
+SubscriptionKey = tuple[str, str]
+
+
+class SubscriptionStore:
+    def __init__(self):
+        """
+        In-memory copy of every Plesk server's subscriptions, indexed by
+        domain name.
+        """
+        self._subscriptions: dict[SubscriptionKey, SubscriptionDetailsModel] = {}
+        self._by_domain: dict[str, set[SubscriptionKey]] = defaultdict(set)
+        self.index = DomainSearchIndex()
+
+    @staticmethod
+    def _domain_names(subscription: SubscriptionDetailsModel) -> set[str]:
+        return {domain.name.lower() for domain in subscription.domains}
+
+    def _add(self, host: str, subscription: SubscriptionDetailsModel) -> None:
+        key = (host, subscription.id)
+        self._remove(key)
+        self._subscriptions[key] = subscription
+        for domain in self._domain_names(subscription):
+            self._by_domain[domain].add(key)
+            self.index.add(domain)
+
+    def _remove(self, key: SubscriptionKey) -> None:
+        subscription = self._subscriptions.pop(key, None)
+        if subscription is None:
+            return
+        for domain in self._domain_names(subscription):
+            keys = self._by_domain.get(domain)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self._by_domain[domain]
+                self.index.remove(domain)
+
+    def replace_host(
+        self, host: str, subscriptions: list[SubscriptionDetailsModel]
+    ) -> None:
+        for key in [key for key in self._subscriptions if key[0] == host]:
+            self._remove(key)
+        for subscription in subscriptions:
+            self._add(host, subscription)
+
+    def apply_changes(
+        self,
+        host: str,
+        subscriptions: list[SubscriptionDetailsModel],
+        removed_ids: list[str],
+    ) -> None:
+        for subscription_id in removed_ids:
+            self._remove((host, subscription_id))
+        for subscription in subscriptions:
+            self._add(host, subscription)
+
+    def _subscriptions_for(
+        self, domains: list[str], limit: int
+    ) -> list[SubscriptionDetailsModel]:
+        keys: dict[SubscriptionKey, None] = {}
+        for domain in domains:
+            for key in sorted(self._by_domain.get(domain, ())):
+                keys[key] = None
+                if len(keys) >= limit:
+                    return [self._subscriptions[key] for key in keys]
+        return [self._subscriptions[key] for key in keys]
+
+    def search(
+        self, query: str, mode: SubscriptionSearchMode, limit: int = 50
+    ) -> list[SubscriptionDetailsModel]:
+        return self._subscriptions_for(self.index.search(query, mode), limit)
+
+    @property
+    def domain_count(self) -> int:
+        return len(self._by_domain)
+
+    def __len__(self) -> int:
+        return len(self._subscriptions)
+
+
+def _to_details_model(
+    host: str, subscription: PleskSubscription
+) -> SubscriptionDetailsModel:
+    return SubscriptionDetailsModel(
+        host=HOSTS.resolve_domain(host),
+        id=subscription.subscription_id,
+        name=subscription.name,
+        username=subscription.username,
+        userlogin=subscription.userlogin,
+        domains=[SubscriptionName(name=domain.name) for domain in subscription.domains],
+        domain_states=subscription.domain_states,
+        is_space_overused=subscription.is_space_overused,
+        subscription_size_mb=subscription.subscription_size_mb,
+        subscription_status=subscription.subscription_status,
+    )
+
+
+def _to_row(subscription: SubscriptionItem) -> dict:
+    row = subscription.model_dump(exclude={"id", "domains"})
+    row["subscription_id"] = subscription.id
+    row["domains"] = [domain.name for domain in subscription.domains]
+    return row
+
+
+class SubscriptionInventorySync:
+    def __init__(
+        self,
+        server_list: list[str] = PLESK_SERVER_LIST,
+        sync_interval: int = settings.PLESK_INVENTORY_SYNC_INTERVAL,
+        full_sync_interval: int = settings.PLESK_INVENTORY_FULL_SYNC_INTERVAL,
+    ):
+        """
+        Keeps `store` in sync with the Plesk servers.
+
+        The first sync of a server and every `full_sync_interval` seconds pull
+        the full subscription list, other syncs only pull subscriptions
+        changed since the server time of the previous sync.
+        """
+        self.server_list = server_list
+        self.sync_interval = sync_interval
+        self.full_sync_interval = timedelta(seconds=full_sync_interval)
+        self.store = SubscriptionStore()
+        self._server_time: dict[str, int] = {}
+        self._last_full_sync: dict[str, datetime] = {}
+        self.server_synced_at: dict[str, datetime] = {}
+        self._client: SignedExecutorClient | None = None
+        self._sync_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def client(self) -> SignedExecutorClient:
+        if self._client is None:
+            self._client = SignedExecutorClient()
+        return self._client
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.server_synced_at)
+
+    def _needs_full_sync(self, host: str) -> bool:
+        last_full_sync = self._last_full_sync.get(host)
+        return (
+            host not in self._server_time
+            or last_full_sync is None
+            or datetime.now(timezone.utc) - last_full_sync > self.full_sync_interval
+        )
+
+    async def sync_host(self, host: str, full_sync: bool = False) -> None:
+        full_sync = full_sync or self._needs_full_sync(host)
+        args = [] if full_sync else [str(self._server_time[host])]
+        response = await self.client.execute_on_server(
+            host, PleskOperation.fetch_subscription_inventory(), *args
+        )
+        if response is None or response.status is not ExecutionStatus.OK:
+            logger.warning(
+                f"Subscription inventory from {host} skipped: "
+                f"{response.status if response else None}"
+            )
+            return
+
+        payload = SubscriptionInventoryPayload.model_validate(response.payload)
+        host_data = HOSTS.resolve_domain(host)
+        subscriptions = [
+            SubscriptionDetailsModel.model_construct(host=host_data, **dict(item))
+            for item in payload.subscriptions
+        ]
+        if full_sync:
+            self.store.replace_host(host, subscriptions)
+        else:
+            self.store.apply_changes(host, subscriptions, payload.removed_ids)
+
+        now = datetime.now(timezone.utc)
+        self._server_time[host] = payload.server_time
+        self.server_synced_at[host] = now
+        if full_sync:
+            self._last_full_sync[host] = now
+
+        try:
+            await asyncio.to_thread(self._store, host, payload, full_sync)
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to store subscription inventory of {host}: {e}")
+
+    @staticmethod
+    def _store(
+        host: str, payload: SubscriptionInventoryPayload, full_sync: bool
+    ) -> None:
+        with Session(engine) as session:
+            db_apply_subscription_inventory(
+                session,
+                host=host,
+                subscriptions=[_to_row(item) for item in payload.subscriptions],
+                removed_ids=payload.removed_ids,
+                server_time=payload.server_time,
+                full_sync=full_sync,
+            )
+
+    async def sync(self, full_sync: bool = False) -> SubscriptionInventoryStatus:
+        async with self._sync_lock:
+            results = await asyncio.gather(
+                *(self.sync_host(host, full_sync) for host in self.server_list),
+                return_exceptions=True,
+            )
+        for host, result in zip(self.server_list, results):
+            if isinstance(result, Exception):
+                logger.error(f"Subscription inventory sync of {host} failed: {result}")
+        return self.status()
+
+    def _load(self) -> None:
+        with Session(engine) as session:
+            by_host: dict[str, list[SubscriptionDetailsModel]] = defaultdict(list)
+            for subscription in db_get_subscription_inventory(session):
+                by_host[subscription.host].append(
+                    _to_details_model(subscription.host, subscription)
+                )
+            states = db_get_inventory_sync_states(session)
+
+        for host, subscriptions in by_host.items():
+            self.store.replace_host(host, subscriptions)
+        for state in states:
+            self._server_time[state.host] = state.server_time
+            self._last_full_sync[state.host] = state.last_full_sync
+            self.server_synced_at[state.host] = state.synced_at
+
+    async def load(self) -> None:
+        try:
+            await asyncio.to_thread(self._load)
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to load subscription inventory from database: {e}")
+
+    async def _sync_periodically(self) -> None:
+        while True:
+            await self.sync()
+            await asyncio.sleep(self.sync_interval)
+
+    async def start(self) -> None:
+        await self.load()
+        if self.sync_interval > 0:
+            self._task = asyncio.create_task(self._sync_periodically())
+
+    async def shutdown(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def status(self) -> SubscriptionInventoryStatus:
+        return SubscriptionInventoryStatus(
+            subscriptions=len(self.store),
+            domains=self.store.domain_count,
+            servers=dict(self.server_synced_at),
+        )
+
+
+SUBSCRIPTION_INVENTORY = SubscriptionInventorySync()
@@ -1,5 +1,4 @@
 import uuid
-import json
 
 from pydantic import (
     EmailStr,
@@ -11,6 +10,8 @@ from pydantic import (
     Field,
     model_validator,
     RootModel,
+    ValidationError,
+    ValidationInfo,
 )
 from pydantic.json_schema import SkipJsonSchema
 from enum import Enum
@@ -26,6 +27,7 @@ from typing import (
 )
 from typing_extensions import Annotated
 from datetime import datetime
+from functools import cache
 from pydantic.networks import IPvAnyAddress
 from app.core.config import settings
 
@@ -363,7 +365,7 @@ T = TypeVar("T")
 
 class SshResponse(TypedDict):
     host: str
-    stdout: str | None
+    stdout: bytes | str | None
     stderr: str | None
     returncode: int | None
     execution_time: float | None
@@ -443,19 +445,31 @@ class SignedExecutorResponse(BaseModel, Generic[T]):
 
     @model_validator(mode="before")
     @classmethod
-    def convert_status(cls, data):
+    def convert_status(cls, data, info: ValidationInfo):
         if isinstance(data, dict):
             if isinstance(data.get("status"), str):
                 data["status"] = ExecutionStatus.from_string(data["status"])
+            # The host we connected to, never one claimed in the output.
+            if info.context and "host" in info.context:
+                data["host"] = info.context["host"]
         return data
 
     @classmethod
     def from_ssh_response(
-        cls: Type["SignedExecutorResponse[T]"], response: SshResponse
+        cls: Type["SignedExecutorResponse[T]"],
+        response: SshResponse,
+        payload_type: Any = None,
     ) -> "SignedExecutorResponse[T] | None":
+        """
+        Validate the executor's JSON output in one pass, straight into
+        `payload_type` when the operation declares one.
+
+        Error responses may carry any payload, so a non-OK response whose
+        payload does not fit `payload_type` is kept untyped.
+        """
         stdout = response.get("stdout")
+        host = response.get("host")
         if not stdout:
-            host = response.get("host")
             return SignedExecutorResponse(
                 host=host,
                 status=ExecutionStatus.INTERNAL_ERROR,
@@ -463,11 +477,28 @@ class SignedExecutorResponse(BaseModel, Generic[T]):
                 message=f"Host {host} returned no stdout message",
             )
 
+        context = {"host": host}
         try:
-            parsed_response = json.loads(stdout)
-            parsed_response["host"] = response.get("host")
-            return cls.model_validate(parsed_response)
-        except json.JSONDecodeError:
-            raise ValueError("Failed to parse JSON from SSH response.")
-        except Exception as e:
-            raise ValueError(f"Error while parsing SSH response: {e}")
+            return _response_model(payload_type).model_validate_json(
+                stdout, context=context
+            )
+        except ValidationError as e:
+            error = e
+        if payload_type is not None:
+            try:
+                untyped = SignedExecutorResponse.model_validate_json(
+                    stdout, context=context
+                )
+            except ValidationError:
+                pass
+            else:
+                if untyped.status is not ExecutionStatus.OK:
+                    return untyped
+        raise ValueError(f"Error while parsing SSH response: {error}")
+
+
+@cache
+def _response_model(payload_type: Any) -> type[SignedExecutorResponse]:
+    if payload_type is None:
+        return SignedExecutorResponse
+    return SignedExecutorResponse[payload_type]
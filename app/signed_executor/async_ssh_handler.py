@@ -1,22 +1,74 @@
 import asyncio
 import asyncssh
+import shlex
 import time
+import zlib
 
+from functools import cache
 from typing import List, Callable, Coroutine, Any
 
 from app.schemas import SshResponse
 from app.core.DomainMapper import HOSTS
 from app.core.config import settings
 from app.core_utils.loggers import get_ssh_logger
+from app.core_utils.metrics import CallbackMetric, Counter, Histogram
+from app.core_utils.timing import record_span, span
+from app.signed_executor.ssh_latency import ADDRESS_LATENCY, HOST_LATENCY
+from app.signed_executor.ssh_scheduler import SSH_SCHEDULER
+
+try:
+    import zstandard
+except ImportError:  # only needed for SSH_OUTPUT_COMPRESSION=zstd
+    zstandard = None
 
 logger = get_ssh_logger()
 
 _connection_pool = {}
+# Address each pooled connection went to, and the spare connections used to
+# hedge slow reads, preferably to another address.
+_connection_address: dict[str, str] = {}
+_hedge_pool = {}
+# So concurrent hedges to a host wait for one spare connection instead of
+# each opening (and leaking) their own.
+_hedge_locks: dict[str, asyncio.Lock] = {}
 
 LOGIN_TIMEOUT = 3
 CONNECTION_TIMEOUT = 15
 MAX_CONNECTION_TIMEOUT = 30
 EXECUTION_TIMEOUT = 5
+HAPPY_EYEBALLS_DELAY = 0.25
+MIN_HEDGE_DELAY = 0.05
+
+OUTPUT_CHUNK_SIZE = 64 * 1024
+MAX_STDERR_SIZE = 64 * 1024
+KNOWN_HOSTS_WARNING = b"warning: permanently added"
+SSH_COMMAND_DURATION = Histogram(
+    "ssh_command_duration_seconds",
+    "SSH command time, connection included, per host.",
+    ("host",),
+)
+SSH_COMMAND_ERRORS = Counter(
+    "ssh_command_errors_total", "Failed SSH commands per host.", ("host", "error")
+)
+SSH_HEDGE_WINS = Counter(
+    "ssh_hedge_wins_total",
+    "Hedged reads answered by the spare connection first, per host.",
+    ("host",),
+)
+SSH_POOL_CONNECTIONS = CallbackMetric(
+    "ssh_pool_connections",
+    "Open pooled SSH connections.",
+    "gauge",
+    lambda: {
+        ("primary",): len(_connection_pool),
+        ("hedge",): len(_hedge_pool),
+    },
+    ("pool",),
+)
+COMPRESS_COMMANDS = {
+    "gzip": "gzip -1 -c",
+    "zstd": "zstd -1 -c -q",
+}
 
 
 async def run_with_adaptive_timeout(
@@ -44,22 +96,87 @@ async def run_with_adaptive_timeout(
             timeout = min(timeout * factor, max_timeout)
 
 
+async def _connect(ip: str) -> tuple[str, asyncssh.SSHClientConnection]:
+    start_time = time.monotonic()
+    try:
+        connection = await asyncssh.connect(
+            ip,
+            port=settings.SSH_PORT,
+            username=settings.SSH_USER,
+            known_hosts=None,
+            login_timeout=LOGIN_TIMEOUT,
+        )
+    except Exception:
+        ADDRESS_LATENCY.record_failure(ip)
+        raise
+    ADDRESS_LATENCY.record(ip, time.monotonic() - start_time)
+    return ip, connection
+
+
+async def _discard_connections(tasks: set[asyncio.Task]) -> None:
+    for task in tasks:
+        task.cancel()
+    for result in await asyncio.gather(*tasks, return_exceptions=True):
+        if isinstance(result, tuple):
+            result[1].close()
+
+
+async def _connect_fastest(
+    addresses: list[str],
+) -> tuple[str, asyncssh.SSHClientConnection]:
+    """
+    Happy eyeballs over the host's addresses: try them fastest first and
+    start the next one whenever the previous attempts fail or take longer
+    than HAPPY_EYEBALLS_DELAY. The first connection made wins.
+    """
+    remaining = list(addresses)
+    pending: set[asyncio.Task] = set()
+    error: BaseException | None = None
+    try:
+        while remaining or pending:
+            if remaining:
+                pending.add(asyncio.create_task(_connect(remaining.pop(0))))
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=HAPPY_EYEBALLS_DELAY if remaining else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            winner = None
+            for task in done:
+                if task.exception() is not None:
+                    error = task.exception()
+                elif winner is None:
+                    winner = task.result()
+                else:
+                    task.result()[1].close()
+            if winner is not None:
+                return winner
+        raise error or ConnectionError("No addresses to connect to")
+    finally:
+        await _discard_connections(pending)
+
+
+def _host_addresses(host: str, avoid: str | None = None) -> list[str]:
+    addresses = ADDRESS_LATENCY.order(
+        [str(ip) for ip in HOSTS.resolve_domain(host).ips]
+    )
+    if avoid in addresses and len(addresses) > 1:
+        addresses.remove(avoid)
+        addresses.append(avoid)
+    return addresses
+
+
 async def _create_connection(host: str):
     start_time = time.time()
     try:
-        host_ip = str(HOSTS.resolve_domain(host).ips[0])
-        connection = await run_with_adaptive_timeout(
-            lambda: asyncssh.connect(
-                host_ip,
-                username=settings.SSH_USER,
-                known_hosts=None,
-                login_timeout=LOGIN_TIMEOUT,
-            ),
+        host_ip, connection = await run_with_adaptive_timeout(
+            lambda: _connect_fastest(_host_addresses(host)),
             base_timeout=CONNECTION_TIMEOUT,
             max_timeout=MAX_CONNECTION_TIMEOUT,
             max_retries=3,
         )
         _connection_pool[host] = connection
+        _connection_address[host] = host_ip
         return connection
     except asyncio.TimeoutError as e:
         execution_time = time.time() - start_time
@@ -121,11 +238,15 @@ async def close_all_connections():
             return False
 
     close_tasks = [
-        _close_single_connection(host, conn) for host, conn in _connection_pool.items()
+        _close_single_connection(host, conn)
+        for pool in (_connection_pool, _hedge_pool)
+        for host, conn in pool.items()
     ]
     await asyncio.gather(*close_tasks, return_exceptions=True)
 
     _connection_pool.clear()
+    _hedge_pool.clear()
+    _connection_address.clear()
     logger.info("All SSH connections closed")
 
 
@@ -145,73 +266,265 @@ async def _get_connection(host: str):
 
 
 class SshExecutionError(Exception):
-    def __init__(self, host: str, message: str | None):
+    def __init__(self, host: str, message: str | None, kind: str = "error"):
         super().__init__(f"SSH access denied for {host}: {message}")
         self.host = host
         self.message = message
+        # Error class for the ssh_command_errors_total metric.
+        self.kind = kind
+
+
+class OutputLimitExceeded(Exception):
+    pass
+
+
+@cache
+def _output_compression() -> str:
+    compression = settings.SSH_OUTPUT_COMPRESSION
+    if compression == "zstd" and zstandard is None:
+        logger.warning("zstandard is not installed, falling back to gzip")
+        return "gzip"
+    return compression
+
+
+class OutputBuffer:
+    def __init__(self, limit: int, compression: str = "none", truncate: bool = False):
+        """
+        Collects a stream's output, decompressing it as it arrives.
+
+        Going over `limit` decompressed bytes raises OutputLimitExceeded, or
+        drops the rest of the output when `truncate` is set.
+        """
+        self.limit = limit
+        self.truncate = truncate
+        self._data = bytearray()
+        self._gzip = None
+        self._zstd = None
+        if compression == "gzip":
+            self._gzip = zlib.decompressobj(wbits=31)
+        elif compression == "zstd":
+            # Hands the output to write() in OUTPUT_CHUNK_SIZE pieces, so
+            # going over the limit stops the decompression early.
+            self._zstd = zstandard.ZstdDecompressor().stream_writer(
+                self, write_size=OUTPUT_CHUNK_SIZE, closefd=False
+            )
 
+    def feed(self, chunk: bytes) -> None:
+        if self._gzip is not None:
+            # Bounded so a small compressed chunk can't inflate past the limit.
+            chunk = self._gzip.decompress(chunk, self.limit - len(self._data) + 1)
+        elif self._zstd is not None:
+            self._zstd.write(chunk)
+            return
+        self._append(chunk)
+
+    def write(self, data: bytes) -> int:
+        self._append(data)
+        return len(data)
+
+    def _append(self, data: bytes) -> None:
+        remaining = self.limit - len(self._data)
+        if len(data) > remaining:
+            if not self.truncate:
+                raise OutputLimitExceeded(f"Output exceeds {self.limit} bytes")
+            data = data[:remaining]
+        self._data += data
+
+    def finish(self) -> bytes:
+        if self._gzip is not None:
+            self._append(self._gzip.flush())
+        return bytes(self._data)
+
+
+async def _read_stream(stream, buffer: OutputBuffer) -> bytes:
+    while chunk := await stream.read(OUTPUT_CHUNK_SIZE):
+        buffer.feed(chunk)
+    return buffer.finish()
+
+
+def _filter_stderr(stderr: bytes) -> str | None:
+    lines = [
+        line
+        for line in stderr.decode(errors="replace").strip().splitlines()
+        if not line.lower().startswith(KNOWN_HOSTS_WARNING.decode())
+    ]
+    return "\n".join(lines) if any(line.strip() for line in lines) else None
+
+
+async def _run_streaming(
+    conn: asyncssh.SSHClientConnection, command: str
+) -> tuple[bytes, bytes, int | None]:
+    compression = _output_compression()
+    if compression != "none":
+        # pipefail keeps the executor's exit status instead of the compressor's.
+        # bash runs it explicitly, the login shell may be one without pipefail.
+        pipeline = f"set -o pipefail; {command} | {COMPRESS_COMMANDS[compression]}"
+        command = f"bash -c {shlex.quote(pipeline)}"
+
+    async with conn.create_process(command, encoding=None) as process:
+        stdout, stderr = await asyncio.gather(
+            _read_stream(
+                process.stdout,
+                OutputBuffer(settings.SSH_MAX_OUTPUT_SIZE, compression),
+            ),
+            _read_stream(process.stderr, OutputBuffer(MAX_STDERR_SIZE, truncate=True)),
+        )
+        await process.wait()
+        return stdout, stderr, process.exit_status
 
-async def _execute_ssh_command(host: str, command: str) -> SshResponse:
-    start_time = time.time()
+
+async def _get_hedge_connection(host: str) -> asyncssh.SSHClientConnection:
+    async with _hedge_locks.setdefault(host, asyncio.Lock()):
+        conn = _hedge_pool.get(host)
+        if conn is None or conn.is_closed():
+            _, conn = await _connect_fastest(
+                _host_addresses(host, avoid=_connection_address.get(host))
+            )
+            _hedge_pool[host] = conn
+        return conn
+
+
+async def _run_timed(
+    conn: asyncssh.SSHClientConnection,
+    host: str,
+    command: str,
+    hedge_delay: float = 0.0,
+) -> tuple[bytes, bytes, int | None]:
+    # Only runs on the primary connection are samples for the hedge delay,
+    # hedge wins would pull the host's p95 down and hedge ever earlier.
+    start_time = time.monotonic()
     try:
-        conn = await _get_connection(host)
-        result = await asyncio.wait_for(conn.run(command), timeout=EXECUTION_TIMEOUT)
-        end_time = time.time()
-        execution_time = end_time - start_time
+        result = await _run_streaming(conn, command)
+    except asyncio.CancelledError:
+        # Cancelled because the hedge won: the primary took at least this
+        # long, dropping the sample would bias the p95 towards fast runs.
+        HOST_LATENCY.record(host, max(time.monotonic() - start_time, hedge_delay))
+        raise
+    HOST_LATENCY.record(host, time.monotonic() - start_time)
+    return result
 
-        stdout_output: str | None = (
-            result.stdout.strip()
-            if result.stdout and result.stdout.strip() != ""
-            else None
-        )
-        stderr_output: str | None = (
-            result.stderr.strip()
-            if result.stderr and result.stderr.strip() != ""
-            else None
-        )
 
-        filtered_stderr_output = None
-        if stderr_output:
-            stderr_lines = stderr_output.splitlines()
-            filtered_stderr_output = "\n".join(
-                line
-                for line in stderr_lines
-                if not line.lower().startswith("Warning: Permanently added".lower())
+async def _run_hedged_on_spare(host: str, command: str):
+    return await _run_streaming(await _get_hedge_connection(host), command)
+
+
+async def _run_hedged(
+    conn: asyncssh.SSHClientConnection, host: str, command: str
+) -> tuple[bytes, bytes, int | None]:
+    """
+    Run an idempotent command and, once it takes longer than the host's p95,
+    run it again on a spare connection. The first successful run wins.
+    """
+    p95 = HOST_LATENCY.p95(host)
+    if p95 is None:
+        return await _run_timed(conn, host, command)
+
+    hedge_delay = max(p95, MIN_HEDGE_DELAY)
+    primary = asyncio.create_task(_run_timed(conn, host, command, hedge_delay))
+    pending: set[asyncio.Task] = {primary}
+    try:
+        done, _ = await asyncio.wait(pending, timeout=hedge_delay)
+        if not done:
+            logger.info(f"Hedging slow command on {host} after {p95:.3f}s")
+            pending.add(asyncio.create_task(_run_hedged_on_spare(host, command)))
+        error: BaseException | None = None
+        while pending:
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
             )
-            filtered_stderr_output = (
-                filtered_stderr_output if filtered_stderr_output.strip() else None
+            for task in done:
+                if task.exception() is None:
+                    if task is not primary:
+                        SSH_HEDGE_WINS.inc(host)
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def _execute_ssh_command(
+    host: str, command: str, hedge: bool = False
+) -> SshResponse:
+    queued_at = time.perf_counter()
+    async with SSH_SCHEDULER.slot(host):
+        record_span("ssh_queue", (time.perf_counter() - queued_at) * 1000)
+        try:
+            response = await _execute_scheduled_ssh_command(host, command, hedge)
+        except SshExecutionError as e:
+            SSH_COMMAND_ERRORS.inc(host, e.kind)
+            raise
+        except Exception:
+            SSH_COMMAND_ERRORS.inc(host, "connect")
+            raise
+    if response["returncode"] == -1 and response["stdout"] is None:
+        SSH_COMMAND_ERRORS.inc(host, "ssh_error")
+    SSH_COMMAND_DURATION.observe(response["execution_time"], host)
+    return response
+
+
+async def _execute_scheduled_ssh_command(
+    host: str, command: str, hedge: bool
+) -> SshResponse:
+    start_time = time.time()
+    try:
+        with span("ssh_connect"):
+            conn = await _get_connection(host)
+        run = (
+            _run_hedged(conn, host, command)
+            if hedge and settings.SSH_HEDGE_READS
+            else _run_timed(conn, host, command)
+        )
+        with span("ssh_exec"):
+            stdout, stderr, returncode_output = await asyncio.wait_for(
+                run, timeout=EXECUTION_TIMEOUT
             )
+        end_time = time.time()
+        execution_time = end_time - start_time
 
-        returncode_output: int | None = result.exit_status
+        # Kept as bytes, the response is validated straight from them.
+        stdout_output: bytes | None = stdout.strip() or None
 
         return {
             "host": host,
             "stdout": stdout_output,
-            "stderr": filtered_stderr_output,
+            "stderr": _filter_stderr(stderr),
             "returncode": returncode_output,
             "execution_time": execution_time,
         }
 
+    except OutputLimitExceeded as e:
+        raise SshExecutionError(host, str(e), kind="output_too_large")
+
     except asyncssh.PermissionDenied as e:
         end_time = time.time()
         execution_time = end_time - start_time
-        raise SshExecutionError(host, f"Permission denied: {str(e)}")
+        raise SshExecutionError(
+            host, f"Permission denied: {str(e)}", kind="permission_denied"
+        )
 
     except asyncssh.ConnectionLost as e:
         end_time = time.time()
         execution_time = end_time - start_time
-        raise SshExecutionError(host, f"Connection lost: {str(e)}")
+        raise SshExecutionError(
+            host, f"Connection lost: {str(e)}", kind="connection_lost"
+        )
 
     except asyncssh.TimeoutError as e:
         end_time = time.time()
         execution_time = end_time - start_time
-        raise SshExecutionError(host, f"Connection timed out: {str(e)}")
+        raise SshExecutionError(
+            host, f"Connection timed out: {str(e)}", kind="connection_timeout"
+        )
 
     except asyncio.TimeoutError as e:
         end_time = time.time()
         execution_time = end_time - start_time
         raise SshExecutionError(
-            host, f"Execution timed out in {execution_time}s: {str(e)}"
+            host,
+            f"Execution timed out in {execution_time}s: {str(e)}",
+            kind="execution_timeout",
         )
 
     except asyncssh.Error as e:
@@ -223,7 +536,7 @@ async def _execute_ssh_command(host: str, command: str) -> SshResponse:
             "permission denied" in error_message
             or "authentication failed" in error_message
         ):
-            raise SshExecutionError(host, str(e))
+            raise SshExecutionError(host, str(e), kind="permission_denied")
 
         return {
             "host": host,
@@ -235,17 +548,16 @@ async def _execute_ssh_command(host: str, command: str) -> SshResponse:
 
 
 async def execute_ssh_commands_in_batch(
-    server_list: List[str], command: str
+    server_list: List[str], command: str, hedge: bool = False
 ) -> List[SshResponse | Exception]:
     start_time = time.time()
-    semaphore = asyncio.Semaphore(100)
+    SSH_SCHEDULER.admit()
 
     async def worker(host: str):
-        async with semaphore:
-            try:
-                return await _execute_ssh_command(host, command)
-            except Exception as e:
-                return e
+        try:
+            return await _execute_ssh_command(host, command, hedge)
+        except Exception as e:
+            return e
 
     results = await asyncio.gather(*(worker(host) for host in server_list))
     end_time = time.time()
@@ -254,5 +566,8 @@ async def execute_ssh_commands_in_batch(
     return results
 
 
-async def execute_ssh_command(host: str, command: str) -> SshResponse:
-    return await _execute_ssh_command(host, command)
+async def execute_ssh_command(
+    host: str, command: str, hedge: bool = False
+) -> SshResponse:
+    SSH_SCHEDULER.admit()
+    return await _execute_ssh_command(host, command, hedge)
@@ -1,11 +1,16 @@
 from __future__ import annotations
+from typing import Any
+
+from app.dns.dns_models import ZoneMasterInventoryItem, ZoneMasterPayload
 from app.signed_executor.commands.signed_operation import SignedOperation
 
 
 class DNSOperation(SignedOperation):
 
-    def __init__(self, operation: str):
-        super().__init__("DNS", operation)
+    def __init__(
+        self, operation: str, payload_type: Any = None, idempotent: bool = False
+    ):
+        super().__init__("DNS", operation, payload_type, idempotent)
 
     @classmethod
     def remove_zone(cls) -> DNSOperation:
@@ -13,4 +18,10 @@ class DNSOperation(SignedOperation):
 
     @classmethod
     def get_zone_master(cls) -> DNSOperation:
-        return cls("GET_ZONE_MASTER")
+        return cls("GET_ZONE_MASTER", ZoneMasterPayload, idempotent=True)
+
+    @classmethod
+    def get_zone_master_inventory(cls) -> DNSOperation:
+        return cls(
+            "GET_ZONE_MASTER_INVENTORY", list[ZoneMasterInventoryItem], idempotent=True
+        )
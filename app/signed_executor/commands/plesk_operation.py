@@ -1,22 +1,34 @@
+from typing import Any
+
+from app.plesk.plesk_schemas import (
+    LoginLinkData,
+    SubscriptionItem,
+    SubscriptionInventoryPayload,
+    TestMailData,
+)
 from app.signed_executor.commands.signed_operation import SignedOperation
 
 class PleskOperation(SignedOperation):
     """Commands for Plesk operations."""
     
-    def __init__(self, operation: str):
-        super().__init__("PLESK", operation)
+    def __init__(
+        self, operation: str, payload_type: Any = None, idempotent: bool = False
+    ):
+        super().__init__("PLESK", operation, payload_type, idempotent)
     
     @classmethod
     def get_login_link(cls) -> "PleskOperation":
-        return cls("GET_LOGIN_LINK")
+        return cls("GET_LOGIN_LINK", LoginLinkData)
     
     @classmethod
     def fetch_subscription_info(cls) -> "PleskOperation":
-        return cls("FETCH_SUBSCRIPTION_INFO")
+        return cls(
+            "FETCH_SUBSCRIPTION_INFO", list[SubscriptionItem], idempotent=True
+        )
     
     @classmethod
     def get_testmail_credentials(cls) -> "PleskOperation":
-        return cls("GET_TESTMAIL_CREDENTIALS")
+        return cls("GET_TESTMAIL_CREDENTIALS", TestMailData)
     
     @classmethod
     def restart_dns_service(cls) -> "PleskOperation":
@@ -24,4 +36,10 @@ class PleskOperation(SignedOperation):
     
     @classmethod
     def get_subscription_id_by_domain(cls) -> "PleskOperation":
-        return cls("GET_SUBSCRIPTION_ID_BY_DOMAIN")
+        return cls("GET_SUBSCRIPTION_ID_BY_DOMAIN", idempotent=True)
+
+    @classmethod
+    def fetch_subscription_inventory(cls) -> "PleskOperation":
+        return cls(
+            "FETCH_SUBSCRIPTION_INVENTORY", SubscriptionInventoryPayload, idempotent=True
+        )
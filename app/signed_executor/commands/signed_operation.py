@@ -1,10 +1,22 @@
+from typing import Any
+
 
 class SignedOperation:
 
-    def __init__(self, namespace: str, operation: str):
+    def __init__(
+        self,
+        namespace: str,
+        operation: str,
+        payload_type: Any = None,
+        idempotent: bool = False,
+    ):
 
         self.namespace = namespace
         self.operation = operation
+        # Type the executor's payload is validated into, None keeps it untyped.
+        self.payload_type = payload_type
+        # Read-only operations that are safe to run twice, see SSH_HEDGE_READS.
+        self.idempotent = idempotent
 
     def __str__(self) -> str:
 
@@ -6,7 +6,13 @@ from app.signed_executor.async_ssh_handler import (
     execute_ssh_command,
     execute_ssh_commands_in_batch,
 )
-from app.core_utils.loggers import log_ssh_response, log_ssh_request
+from app.core_utils.loggers import (
+    log_ssh_fanout,
+    log_ssh_request,
+    log_ssh_response,
+    sample_ssh_call,
+)
+from app.core_utils.timing import span
 
 from app.core.token_signer import ToKenSigner
 
@@ -19,7 +25,8 @@ class SignedExecutorClient:
         self._token_signer = SignedExecutorClient._token_signer_instance
 
     def _sign_operation(self, command_str: str) -> str:
-        return "execute " + self._token_signer.create_signed_token(command_str)
+        with span("sign"):
+            return "execute " + self._token_signer.create_signed_token(command_str)
 
     async def execute_on_server(
         self, host: str, operation: SignedOperation, *args: str
@@ -27,10 +34,12 @@ class SignedExecutorClient:
         command_str = operation.with_args(*args)
         signed_command = self._sign_operation(command_str)
 
-        log_ssh_request(host, signed_command)
+        sampled = sample_ssh_call()
+        log_ssh_request(host, signed_command, sampled)
         ssh_response = await execute_ssh_command(
             host=host,
             command=signed_command,
+            hedge=operation.idempotent,
         )
         if isinstance(ssh_response, BaseException):
             response = SignedExecutorResponse(
@@ -42,9 +51,12 @@ class SignedExecutorClient:
             )
             execution_time = 0
         else:
-            response = SignedExecutorResponse.from_ssh_response(ssh_response)
+            with span("parse"):
+                response = SignedExecutorResponse.from_ssh_response(
+                    ssh_response, operation.payload_type
+                )
             execution_time = ssh_response["execution_time"] or 0.0
-        log_ssh_response(response, execution_time)
+        log_ssh_response(response, execution_time, sampled)
         return response
 
     async def execute_on_servers(
@@ -53,14 +65,13 @@ class SignedExecutorClient:
         command_str = command.with_args(*args)
         signed_command = self._sign_operation(command_str)
 
-        for host in server_list:
-            log_ssh_request(host, signed_command)
-
         ssh_responses = await execute_ssh_commands_in_batch(
             server_list,
             command=signed_command,
+            hedge=command.idempotent,
         )
         executor_responses: List[SignedExecutorResponse] = []
+        logged_results = []
 
         for host, result in zip(server_list, ssh_responses):
             execution_time = 0
@@ -73,14 +84,17 @@ class SignedExecutorClient:
                     payload=None,
                 )
             else:
-                response = SignedExecutorResponse.from_ssh_response(result)
+                with span("parse"):
+                    response = SignedExecutorResponse.from_ssh_response(
+                        result, command.payload_type
+                    )
                 execution_time = result["execution_time"] or 0.0
 
-            log_ssh_response(response, execution_time)
             if response is not None:
-                log_ssh_response(response, execution_time)
+                logged_results.append((response, execution_time))
                 executor_responses.append(response)
 
+        log_ssh_fanout(signed_command, logged_results)
         return executor_responses
     async def get_public_key_base64(self):
         return self._token_signer.get_public_key_base64()
\ No newline at end of file
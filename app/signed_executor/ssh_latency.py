@@ -0,0 +1,78 @@
+import math
+from collections import deque
+
+ADDRESS_EWMA_ALPHA = 0.3
+CONNECT_FAILURE_PENALTY = 5.0
+HOST_LATENCY_WINDOW = 200
+HOST_LATENCY_MIN_SAMPLES = 20
+
+
+class AddressLatency:
+    def __init__(
+        self,
+        alpha: float = ADDRESS_EWMA_ALPHA,
+        failure_penalty: float = CONNECT_FAILURE_PENALTY,
+    ):
+        """
+        Moving average of SSH connect time per IP address. A failed connect
+        counts as a `failure_penalty` seconds sample.
+        """
+        self.alpha = alpha
+        self.failure_penalty = failure_penalty
+        self._ewma: dict[str, float] = {}
+
+    def record(self, ip: str, seconds: float) -> None:
+        previous = self._ewma.get(ip)
+        self._ewma[ip] = (
+            seconds
+            if previous is None
+            else self.alpha * seconds + (1 - self.alpha) * previous
+        )
+
+    def record_failure(self, ip: str) -> None:
+        self.record(ip, self.failure_penalty)
+
+    def get(self, ip: str) -> float | None:
+        return self._ewma.get(ip)
+
+    def order(self, addresses: list[str]) -> list[str]:
+        """
+        Fastest address first. Addresses never tried yet go first so they
+        get measured, ties keep the configured order.
+        """
+        return sorted(addresses, key=lambda ip: self._ewma.get(ip, 0.0))
+
+
+class HostLatency:
+    def __init__(
+        self,
+        window: int = HOST_LATENCY_WINDOW,
+        min_samples: int = HOST_LATENCY_MIN_SAMPLES,
+    ):
+        """
+        Recent command execution times per host.
+        """
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: dict[str, deque[float]] = {}
+
+    def record(self, host: str, seconds: float) -> None:
+        samples = self._samples.get(host)
+        if samples is None:
+            samples = self._samples[host] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, host: str, percentile: float) -> float | None:
+        samples = self._samples.get(host)
+        if samples is None or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, math.ceil(percentile / 100 * len(ordered)) - 1)
+        return ordered[index]
+
+    def p95(self, host: str) -> float | None:
+        return self.percentile(host, 95)
+
+
+ADDRESS_LATENCY = AddressLatency()
+HOST_LATENCY = HostLatency()
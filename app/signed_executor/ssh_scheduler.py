@@ -0,0 +1,176 @@
+import asyncio
+import bisect
+import itertools
+from collections import Counter
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from enum import IntEnum
+
+from app.core.config import settings
+
+
+class SshPriority(IntEnum):
+    INTERACTIVE = 0
+    WRITE = 1
+    BULK = 2
+
+
+# Who the SSH work is done for and how urgent it is. Set per request by
+# app.core.dependencies.ssh_work_context and by background jobs for their task.
+# A callable principal is only called when a command is scheduled, so requests
+# that run no SSH command never work it out.
+ssh_principal: ContextVar[str | Callable[[], str | None] | None] = ContextVar(
+    "ssh_principal", default=None
+)
+ssh_priority: ContextVar[SshPriority] = ContextVar(
+    "ssh_priority", default=SshPriority.BULK
+)
+
+
+def current_principal() -> str | None:
+    principal = ssh_principal.get()
+    return principal() if callable(principal) else principal
+
+
+class SshOverloaded(Exception):
+    def __init__(self, priority: SshPriority, queued: int):
+        super().__init__(
+            f"Too many queued {priority.name.lower()} SSH commands ({queued})"
+        )
+        self.priority = priority
+        self.queued = queued
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: SshPriority
+    seq: int
+    host: str = field(compare=False)
+    principal: str | None = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+
+
+class SshScheduler:
+    def __init__(
+        self,
+        max_concurrency: int = settings.SSH_MAX_CONCURRENCY,
+        max_per_host: int = settings.SSH_MAX_PER_HOST,
+        max_per_principal: int = settings.SSH_MAX_PER_PRINCIPAL,
+        max_queued: dict[SshPriority, int] | None = None,
+    ):
+        """
+        Process-wide admission control for SSH commands.
+
+        A command runs once the global, per-host and per-principal limits
+        allow it. Waiting commands are started in priority order, then in
+        arrival order. `admit` sheds new work of a priority whose queue is
+        already `max_queued` long.
+        """
+        self.max_concurrency = max_concurrency
+        self.max_per_host = max_per_host
+        self.max_per_principal = max_per_principal
+        self.max_queued = max_queued or {
+            SshPriority.INTERACTIVE: settings.SSH_MAX_QUEUED_INTERACTIVE,
+            SshPriority.WRITE: settings.SSH_MAX_QUEUED_WRITE,
+            SshPriority.BULK: settings.SSH_MAX_QUEUED_BULK,
+        }
+        self._running = 0
+        self._running_by_host: Counter[str] = Counter()
+        self._running_by_principal: Counter[str | None] = Counter()
+        self._queued: Counter[SshPriority] = Counter()
+        self._waiters: list[_Waiter] = []
+        self._seq = itertools.count()
+
+    def admit(self) -> None:
+        priority = ssh_priority.get()
+        queued = self._queued[priority]
+        if queued >= self.max_queued[priority]:
+            raise SshOverloaded(priority, queued)
+
+    def _can_run(self, host: str, principal: str | None) -> bool:
+        return (
+            self._running < self.max_concurrency
+            and self._running_by_host[host] < self.max_per_host
+            and (
+                principal is None
+                or self._running_by_principal[principal] < self.max_per_principal
+            )
+        )
+
+    def _start(self, host: str, principal: str | None) -> None:
+        self._running += 1
+        self._running_by_host[host] += 1
+        self._running_by_principal[principal] += 1
+
+    def _release(self, host: str, principal: str | None) -> None:
+        self._running -= 1
+        self._running_by_host[host] -= 1
+        if not self._running_by_host[host]:
+            del self._running_by_host[host]
+        self._running_by_principal[principal] -= 1
+        if not self._running_by_principal[principal]:
+            del self._running_by_principal[principal]
+        self._wake()
+
+    def _wake(self) -> None:
+        waiting = []
+        for waiter in self._waiters:
+            if self._can_run(waiter.host, waiter.principal):
+                self._queued[waiter.priority] -= 1
+                self._start(waiter.host, waiter.principal)
+                waiter.future.set_result(None)
+            else:
+                waiting.append(waiter)
+        self._waiters = waiting
+
+    async def _acquire(self, host: str) -> str | None:
+        principal = current_principal()
+        # Waiters left in the queue are blocked by their host or principal
+        # limit or by the global one, so running right away skips nobody
+        # who could run instead.
+        if self._can_run(host, principal):
+            self._start(host, principal)
+            return principal
+
+        priority = ssh_priority.get()
+        waiter = _Waiter(
+            priority,
+            next(self._seq),
+            host,
+            principal,
+            asyncio.get_running_loop().create_future(),
+        )
+        bisect.insort(self._waiters, waiter)
+        self._queued[priority] += 1
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release(host, principal)
+            else:
+                self._waiters.remove(waiter)
+                self._queued[priority] -= 1
+            raise
+        return principal
+
+    @asynccontextmanager
+    async def slot(self, host: str) -> AsyncIterator[None]:
+        principal = await self._acquire(host)
+        try:
+            yield
+        finally:
+            self._release(host, principal)
+
+    def stats(self) -> dict:
+        return {
+            "running": self._running,
+            "queued": {
+                priority.name.lower(): self._queued[priority]
+                for priority in SshPriority
+            },
+        }
+
+
+SSH_SCHEDULER = SshScheduler()
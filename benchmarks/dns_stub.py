@@ -0,0 +1,123 @@
+"""
+Minimal authoritative DNS server for the benchmark zone, standing in for the
+internal DNS servers the backend resolves against.
+
+c-ares only talks to nameservers on port 53, so the stub has to bind it:
+run as root or lower net.ipv4.ip_unprivileged_port_start.
+"""
+
+import asyncio
+import struct
+import zlib
+
+from benchmarks.fake_fleet import BENCH_ZONE
+
+TYPE_A = 1
+TYPE_NS = 2
+TYPE_MX = 15
+CLASS_IN = 1
+RCODE_NXDOMAIN = 3
+TTL = 60
+# Name in the answer records points back at the question (offset 12).
+QUESTION_NAME_POINTER = b"\xc0\x0c"
+
+
+def _encode_name(name: str) -> bytes:
+    return (
+        b"".join(
+            bytes([len(label)]) + label.encode()
+            for label in name.rstrip(".").split(".")
+        )
+        + b"\x00"
+    )
+
+
+def _parse_question(query: bytes) -> tuple[str, int, int]:
+    """
+    Name and type of the first question, and the offset where it ends.
+    """
+    labels = []
+    offset = 12
+    while query[offset]:
+        length = query[offset]
+        labels.append(query[offset + 1 : offset + 1 + length].decode())
+        offset += length + 1
+    qtype, _ = struct.unpack_from("!HH", query, offset + 1)
+    return ".".join(labels).lower(), qtype, offset + 5
+
+
+def _address(name: str) -> bytes:
+    # Stable per name, in TEST-NET-2 so nothing real is ever pointed at.
+    return bytes([198, 51, 100, zlib.crc32(name.encode()) % 254 + 1])
+
+
+def _rdata(name: str, qtype: int) -> list[bytes]:
+    if qtype == TYPE_A:
+        return [_address(name)]
+    if qtype == TYPE_MX:
+        return [struct.pack("!H", 10) + _encode_name(f"mail.{name}")]
+    if qtype == TYPE_NS:
+        return [_encode_name(f"ns{i}.{BENCH_ZONE}") for i in range(2)]
+    return []
+
+
+def build_response(query: bytes) -> bytes:
+    query_id, flags = struct.unpack_from("!HH", query)
+    name, qtype, question_end = _parse_question(query)
+    in_zone = name == BENCH_ZONE or name.endswith(f".{BENCH_ZONE}")
+    answers = _rdata(name, qtype) if in_zone else []
+
+    # QR and AA set, RD copied from the query.
+    response_flags = 0x8400 | (flags & 0x0100)
+    if not in_zone:
+        response_flags |= RCODE_NXDOMAIN
+    header = struct.pack("!HHHHHH", query_id, response_flags, 1, len(answers), 0, 0)
+    records = b"".join(
+        QUESTION_NAME_POINTER
+        + struct.pack("!HHIH", qtype, CLASS_IN, TTL, len(rdata))
+        + rdata
+        for rdata in answers
+    )
+    return header + query[12:question_end] + records
+
+
+class _DnsStubProtocol(asyncio.DatagramProtocol):
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.transport: asyncio.DatagramTransport | None = None
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        try:
+            response = build_response(data)
+        except (IndexError, struct.error, UnicodeDecodeError):
+            return
+        if self.latency:
+            asyncio.get_running_loop().call_later(
+                self.latency, self.transport.sendto, response, addr
+            )
+        else:
+            self.transport.sendto(response, addr)
+
+
+class DnsStub:
+    def __init__(self, addresses: list[str], latency: float = 0.0, port: int = 53):
+        self.addresses = addresses
+        self.latency = latency
+        self.port = port
+        self._transports: list[asyncio.DatagramTransport] = []
+
+    async def start(self) -> None:
+        loop = asyncio.get_running_loop()
+        for address in self.addresses:
+            transport, _ = await loop.create_datagram_endpoint(
+                lambda: _DnsStubProtocol(self.latency), local_addr=(address, self.port)
+            )
+            self._transports.append(transport)
+
+    async def stop(self) -> None:
+        for transport in self._transports:
+            transport.close()
+        self._transports = []
@@ -0,0 +1,262 @@
+"""
+In-process SSH servers answering like the signed executor on Plesk and DNS
+servers, so the backend can be benchmarked without a real fleet.
+
+Every fake host listens on its own loopback address (127.1.x.y for Plesk,
+127.2.x.y for DNS) on the same port, because the backend connects to every
+host on SSH_PORT. Linux routes all of 127.0.0.0/8 to the loopback interface,
+other systems need the addresses added to it first.
+
+Run on its own to keep the fleet's CPU use out of the measured process:
+
+    python -m benchmarks.fake_fleet --plesk-hosts 100 --dns-hosts 4
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import random
+import resource
+from dataclasses import dataclass
+
+import asyncssh
+
+PLESK_DOMAIN = "plesk{}.bench.test"
+DNS_DOMAIN = "ns{}.bench.test"
+BENCH_ZONE = "bench.test"
+DEFAULT_PORT = 2222
+
+
+def fleet_address(group: int, index: int) -> str:
+    return f"127.{group}.{index // 250}.{index % 250 + 1}"
+
+
+def plesk_hosts(count: int) -> dict[str, list[str]]:
+    return {PLESK_DOMAIN.format(i): [fleet_address(1, i)] for i in range(count)}
+
+
+def dns_hosts(count: int) -> dict[str, list[str]]:
+    return {DNS_DOMAIN.format(i): [fleet_address(2, i)] for i in range(count)}
+
+
+def subscription_domain(index: int) -> str:
+    return f"site{index}.{BENCH_ZONE}"
+
+
+@dataclass
+class ExecutorBehaviour:
+    # Seconds every command takes, plus up to `jitter` more.
+    latency: float = 0.01
+    jitter: float = 0.0
+    # Share of commands answered with INTERNAL_ERROR.
+    failure_rate: float = 0.0
+    # Subscriptions per Plesk server in inventory answers, and extra domains
+    # per subscription, which together set the payload size.
+    subscriptions_per_host: int = 100
+    domains_per_subscription: int = 1
+
+
+def _response(status: str, code: int, message: str, payload=None) -> str:
+    return json.dumps(
+        {"status": status, "code": code, "message": message, "payload": payload}
+    )
+
+
+def fake_subscription(index: int, extra_domains: int = 0) -> dict:
+    domain = subscription_domain(index)
+    return {
+        "id": str(index),
+        "name": domain,
+        "username": f"user{index}",
+        "userlogin": f"login{index}",
+        "domains": [{"name": domain}]
+        + [{"name": f"alias{n}.{domain}"} for n in range(extra_domains)],
+        "domain_states": [{"domain": domain, "state": "active"}],
+        "is_space_overused": False,
+        "subscription_size_mb": 100 + index % 900,
+        "subscription_status": "active",
+    }
+
+
+class FakeExecutor:
+    def __init__(self, plesk_count: int, dns_count: int, behaviour: ExecutorBehaviour):
+        """
+        Answers the executor operations the backend sends. Subscription
+        `siteN.bench.test` lives on Plesk server N modulo the fleet size.
+        """
+        self.plesk_count = plesk_count
+        self.dns_count = dns_count
+        self.behaviour = behaviour
+
+    def _owner(self, domain: str) -> int | None:
+        label = domain.split(".", 1)[0]
+        if not label.startswith("site") or not label[4:].isdigit():
+            return None
+        return int(label[4:]) % self.plesk_count
+
+    def _subscriptions(self, host_index: int) -> list[dict]:
+        behaviour = self.behaviour
+        return [
+            fake_subscription(
+                host_index + n * self.plesk_count,
+                behaviour.domains_per_subscription - 1,
+            )
+            for n in range(behaviour.subscriptions_per_host)
+        ]
+
+    def answer(self, host_index: int, operation: str) -> str:
+        name, *args = operation.split()
+        domain = args[0] if args else ""
+        if name == "PLESK.FETCH_SUBSCRIPTION_INFO":
+            if self._owner(domain) != host_index:
+                return _response("NOT_FOUND", 404, f"{domain} not found")
+            index = int(domain.split(".", 1)[0][4:])
+            return _response("OK", 200, "OK", [fake_subscription(index)])
+        if name == "PLESK.FETCH_SUBSCRIPTION_INVENTORY":
+            return _response(
+                "OK",
+                200,
+                "OK",
+                {
+                    "server_time": 0,
+                    "subscriptions": self._subscriptions(host_index),
+                    "removed_ids": [],
+                },
+            )
+        if name == "DNS.GET_ZONE_MASTER":
+            owner = self._owner(domain)
+            if owner is None:
+                return _response("NOT_FOUND", 404, f"No zone {domain}")
+            return _response(
+                "OK", 200, "OK", {"zonemaster_ip": fleet_address(1, owner)}
+            )
+        if name == "DNS.GET_ZONE_MASTER_INVENTORY":
+            zones = [
+                {
+                    "zone": subscription_domain(i),
+                    "zonemaster_ip": fleet_address(1, i % self.plesk_count),
+                }
+                for i in range(self.plesk_count * self.behaviour.subscriptions_per_host)
+            ]
+            return _response("OK", 200, "OK", zones)
+        return _response("OK", 200, "OK")
+
+    async def run(self, host_index: int, command: str) -> str:
+        behaviour = self.behaviour
+        await asyncio.sleep(behaviour.latency + random.uniform(0, behaviour.jitter))
+        if random.random() < behaviour.failure_rate:
+            return _response("INTERNAL_ERROR", 500, "Injected failure")
+        _, _, token = command.partition(" ")
+        operation = json.loads(base64.b64decode(token))["operation"]
+        return self.answer(host_index, operation)
+
+
+class _NoAuthServer(asyncssh.SSHServer):
+    def begin_auth(self, username: str) -> bool:
+        return False
+
+
+class FakeFleet:
+    def __init__(
+        self,
+        plesk_count: int,
+        dns_count: int,
+        behaviour: ExecutorBehaviour | None = None,
+        port: int = DEFAULT_PORT,
+    ):
+        self.executor = FakeExecutor(
+            plesk_count, dns_count, behaviour or ExecutorBehaviour()
+        )
+        self.port = port
+        self.plesk = plesk_hosts(plesk_count)
+        self.dns = dns_hosts(dns_count)
+        self._servers: list[asyncssh.SSHAcceptor] = []
+
+    def _process_factory(self, host_index: int):
+        async def handle(process: asyncssh.SSHServerProcess) -> None:
+            process.stdout.write(
+                await self.executor.run(host_index, process.command or "")
+            )
+            process.exit(0)
+
+        return handle
+
+    async def start(self) -> None:
+        host_key = asyncssh.generate_private_key("ssh-ed25519")
+        addresses = [
+            (index, ips[0]) for index, ips in enumerate(self.plesk.values())
+        ] + [(index, ips[0]) for index, ips in enumerate(self.dns.values())]
+        self._servers = await asyncio.gather(
+            *(
+                asyncssh.create_server(
+                    _NoAuthServer,
+                    address,
+                    self.port,
+                    server_host_keys=[host_key],
+                    process_factory=self._process_factory(index),
+                )
+                for index, address in addresses
+            )
+        )
+
+    async def stop(self) -> None:
+        for server in self._servers:
+            server.close()
+        await asyncio.gather(*(server.wait_closed() for server in self._servers))
+        self._servers = []
+
+
+def raise_open_file_limit() -> None:
+    """
+    Every fake host needs a listening socket and every pooled connection a
+    socket on both ends, more than the usual soft limit of 1024 files.
+    """
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft < hard:
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    fleet = FakeFleet(
+        args.plesk_hosts,
+        args.dns_hosts,
+        ExecutorBehaviour(
+            latency=args.latency,
+            jitter=args.jitter,
+            failure_rate=args.failure_rate,
+            subscriptions_per_host=args.subscriptions_per_host,
+            domains_per_subscription=args.domains_per_subscription,
+        ),
+        port=args.port,
+    )
+    raise_open_file_limit()
+    await fleet.start()
+    print(
+        json.dumps({"PLESK_SERVERS": fleet.plesk, "DNS_SLAVE_SERVERS": fleet.dns}),
+        flush=True,
+    )
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await fleet.stop()
+
+
+def add_behaviour_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--plesk-hosts", type=int, default=10)
+    parser.add_argument("--dns-hosts", type=int, default=2)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--subscriptions-per-host", type=int, default=100)
+    parser.add_argument("--domains-per-subscription", type=int, default=1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_behaviour_arguments(parser)
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
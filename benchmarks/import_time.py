@@ -0,0 +1,74 @@
+"""
+Import time report: what `import app.main` spends its time on, per top-level
+package, measured with `python -X importtime` in a fresh process:
+
+    python -m benchmarks.import_time --top 15
+
+Fails when one of the LAZY_MODULES gets imported at startup again.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from collections import defaultdict
+
+# Only imported when the feature is used, see their call sites.
+LAZY_MODULES = ("sentry_sdk", "emails", "jinja2", "tldextract")
+
+
+def import_times(module: str = "app.main") -> dict[str, int]:
+    """
+    Self time in microseconds of every module imported by `module`.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(self_us)
+    return times
+
+
+def by_package(times: dict[str, int]) -> dict[str, int]:
+    packages: dict[str, int] = defaultdict(int)
+    for name, self_us in times.items():
+        packages[name.split(".")[0]] += self_us
+    return dict(sorted(packages.items(), key=lambda item: item[1], reverse=True))
+
+
+def main() -> None:
+    from benchmarks.load import format_rows
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--json", help="Also write the per-package times to this file")
+    args = parser.parse_args()
+
+    times = import_times(args.module)
+    packages = by_package(times)
+    total = sum(packages.values())
+    rows = [
+        {"package": name, "ms": round(us / 1000, 1), "share": f"{us / total:.0%}"}
+        for name, us in list(packages.items())[: args.top]
+    ]
+    print(format_rows(rows))
+    print(f"\n{len(times)} modules, {total / 1000:.0f} ms")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(packages, f, indent=2)
+
+    eager = [name for name in LAZY_MODULES if name in times]
+    if eager:
+        sys.exit(f"Imported at startup, should be lazy: {', '.join(eager)}")
+
+
+if __name__ == "__main__":
+    main()
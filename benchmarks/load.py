@@ -0,0 +1,146 @@
+"""
+Closed-loop load generator: a fixed number of workers send requests
+back to back, and the latency of each request is recorded.
+"""
+
+import asyncio
+import itertools
+import resource
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import dataclass, field
+
+import httpx
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    # Request path for the n-th request, so requests can vary their domain.
+    path: Callable[[int], str]
+    json: Callable[[int], dict] | None = None
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    requests: int
+    concurrency: int
+    elapsed: float
+    latencies: list[float] = field(repr=False)
+    statuses: dict[int, int]
+    errors: int
+    memory_peak_kb: float | None
+    max_rss_kb: float
+
+    def percentile(self, p: float) -> float:
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+    def summary(self) -> dict:
+        return {
+            "scenario": self.name,
+            "requests": self.requests,
+            "concurrency": self.concurrency,
+            "throughput_rps": round(self.requests / self.elapsed, 1),
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p95_ms": round(self.percentile(95) * 1000, 2),
+            "p99_ms": round(self.percentile(99) * 1000, 2),
+            "statuses": self.statuses,
+            "errors": self.errors,
+            "memory_peak_kb": self.memory_peak_kb,
+            "max_rss_kb": self.max_rss_kb,
+        }
+
+
+def _max_rss_kb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return rss / 1024 if sys.platform == "darwin" else float(rss)
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    requests: int,
+    concurrency: int,
+    trace_memory: bool = False,
+) -> ScenarioResult:
+    counter = itertools.count()
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+        while (n := next(counter)) < requests:
+            kwargs = {"json": scenario.json(n)} if scenario.json else {}
+            start = time.perf_counter()
+            try:
+                response = await client.request(
+                    scenario.method, scenario.path(n), **kwargs
+                )
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    memory_peak_kb = None
+    if trace_memory:
+        memory_peak_kb = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+        tracemalloc.stop()
+
+    return ScenarioResult(
+        name=scenario.name,
+        requests=requests,
+        concurrency=concurrency,
+        elapsed=elapsed,
+        latencies=latencies,
+        statuses=dict(sorted(statuses.items())),
+        errors=errors,
+        memory_peak_kb=memory_peak_kb,
+        max_rss_kb=_max_rss_kb(),
+    )
+
+
+SUMMARY_COLUMNS = [
+    "scenario",
+    "requests",
+    "concurrency",
+    "throughput_rps",
+    "p50_ms",
+    "p95_ms",
+    "p99_ms",
+    "statuses",
+    "errors",
+    "memory_peak_kb",
+    "max_rss_kb",
+]
+
+
+def format_rows(rows: list[dict], columns: list[str] | None = None) -> str:
+    if columns is None:
+        columns = list(rows[0]) if rows else []
+    cells = [[str(row.get(column)) for column in columns] for row in rows]
+    widths = [
+        max([len(column)] + [len(row[i]) for row in cells])
+        for i, column in enumerate(columns)
+    ]
+    lines = ["  ".join(c.ljust(w) for c, w in zip(columns, widths))]
+    lines += ["  ".join(v.ljust(w) for v, w in zip(row, widths)) for row in cells]
+    return "\n".join(lines)
+
+
+def format_table(summaries: list[dict]) -> str:
+    return format_rows(summaries, SUMMARY_COLUMNS)
@@ -0,0 +1,53 @@
+from app.core.DomainMapper import HOSTS
+from app.plesk.plesk_schemas import (
+    SubscriptionDetailsModel,
+    SubscriptionInventoryPayload,
+    SubscriptionItem,
+)
+from app.schemas import PLESK_SERVER_LIST, SignedExecutorResponse
+from benchmarks.micro.conftest import executor_stdout
+
+
+def test_parse_subscription_info(benchmark, subscriptions):
+    response = {"host": "plesk.example.kz", "stdout": executor_stdout(subscriptions)}
+
+    parsed = benchmark(
+        SignedExecutorResponse.from_ssh_response, response, list[SubscriptionItem]
+    )
+
+    assert len(parsed.payload) == len(subscriptions)
+
+
+def test_parse_untyped_subscription_info(benchmark, subscriptions):
+    response = {"host": "plesk.example.kz", "stdout": executor_stdout(subscriptions)}
+
+    parsed = benchmark(SignedExecutorResponse.from_ssh_response, response)
+
+    assert len(parsed.payload) == len(subscriptions)
+
+
+def test_parse_subscription_inventory(benchmark, subscriptions):
+    stdout = executor_stdout(
+        {"server_time": 0, "subscriptions": subscriptions, "removed_ids": []}
+    )
+    response = {"host": "plesk.example.kz", "stdout": stdout}
+
+    parsed = benchmark(
+        SignedExecutorResponse.from_ssh_response,
+        response,
+        SubscriptionInventoryPayload,
+    )
+
+    assert len(parsed.payload.subscriptions) == len(subscriptions)
+
+
+def test_validate_subscription_details(benchmark, subscriptions):
+    host = HOSTS.resolve_domain(PLESK_SERVER_LIST[0]).model_dump()
+
+    def validate():
+        return [
+            SubscriptionDetailsModel.model_validate({"host": host, **subscription})
+            for subscription in subscriptions
+        ]
+
+    assert len(benchmark(validate)) == len(subscriptions)
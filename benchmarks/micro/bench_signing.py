@@ -0,0 +1,21 @@
+from app.core.token_signer import ToKenSigner
+from app.signed_executor.commands.plesk_operation import PleskOperation
+from app.signed_executor.signed_executor_client import SignedExecutorClient
+
+
+def test_create_signed_token(benchmark):
+    signer = ToKenSigner()
+    operation = PleskOperation.fetch_subscription_info().with_args("example.kz")
+
+    token = benchmark(signer.create_signed_token, operation)
+
+    assert token
+
+
+def test_sign_operation(benchmark):
+    client = SignedExecutorClient()
+    operation = PleskOperation.fetch_subscription_info().with_args("example.kz")
+
+    command = benchmark(client._sign_operation, operation)
+
+    assert command.startswith("execute ")
@@ -0,0 +1,59 @@
+import pytest
+
+from app.core.DomainMapper import DomainMapper
+from app.schemas import (
+    PLESK_SERVER_LIST,
+    DomainName,
+    IPv4Address,
+    PleskServerDomain,
+    SubscriptionName,
+)
+
+DOMAINS = [f"site{i}.example.kz" for i in range(1000)]
+
+
+@pytest.mark.parametrize(
+    "model, field",
+    [(SubscriptionName, "name"), (DomainName, "name")],
+    ids=["subscription_name", "domain_name"],
+)
+def test_validate_domain_names(benchmark, model, field):
+    def validate():
+        return [model.model_validate({field: domain}) for domain in DOMAINS]
+
+    assert len(benchmark(validate)) == len(DOMAINS)
+
+
+def test_validate_plesk_server_domain(benchmark):
+    server = PLESK_SERVER_LIST[0]
+
+    validated = benchmark(PleskServerDomain.model_validate, {"name": server})
+
+    assert validated.name == server
+
+
+def test_validate_ipv4_address(benchmark):
+    validated = benchmark(IPv4Address.model_validate, {"ip": "192.0.2.10"})
+
+    assert str(validated.ip) == "192.0.2.10"
+
+
+@pytest.fixture(scope="module")
+def mapper() -> DomainMapper:
+    return DomainMapper(
+        {f"host{i}.example.kz": [f"10.0.{i // 250}.{i % 250 + 1}"] for i in range(1000)}
+    )
+
+
+def test_domain_mapper_resolve_domain(benchmark, mapper):
+    resolved = benchmark(mapper.resolve_domain, "host500.example.kz")
+
+    assert resolved.name == "host500.example.kz"
+
+
+def test_domain_mapper_resolve_ip(benchmark, mapper):
+    ip = IPv4Address(ip="10.0.2.1")
+
+    resolved = benchmark(mapper.resolve_ip, ip)
+
+    assert resolved.name == "host500.example.kz"
@@ -0,0 +1,19 @@
+import json
+
+import pytest
+
+from benchmarks.fake_fleet import fake_subscription
+
+
+def executor_stdout(payload) -> str:
+    return json.dumps(
+        {"status": "OK", "code": 200, "message": "OK", "payload": payload}
+    )
+
+
+@pytest.fixture(params=[1, 100, 1000], ids=lambda n: f"{n}_subscriptions")
+def subscriptions(request) -> list[dict]:
+    """
+    Subscriptions as a Plesk executor returns them, with three domains each.
+    """
+    return [fake_subscription(i, extra_domains=2) for i in range(request.param)]
@@ -0,0 +1,248 @@
+"""
+Load test of the backend against a fake fleet.
+
+Starts the fake SSH executors and the DNS stub, then drives the real FastAPI
+app in-process over httpx's ASGI transport and reports latency percentiles,
+throughput and memory per scenario:
+
+    python -m benchmarks.run --plesk-hosts 50 --concurrency 20 --requests 2000
+
+Authentication is replaced by a fixed superuser and the database by an
+in-memory SQLite one, so no Postgres is needed. Inventory syncs still try
+to persist to POSTGRES_SERVER and only log when that fails.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+
+from benchmarks.fake_fleet import (
+    DEFAULT_PORT,
+    ExecutorBehaviour,
+    FakeFleet,
+    add_behaviour_arguments,
+    dns_hosts,
+    plesk_hosts,
+    subscription_domain,
+)
+
+
+def configure_environment(args: argparse.Namespace) -> None:
+    """
+    The settings and the host lists are read when the app is imported, so
+    this has to run first.
+    """
+    os.environ["PLESK_SERVERS"] = json.dumps(plesk_hosts(args.plesk_hosts))
+    os.environ["DNS_SLAVE_SERVERS"] = json.dumps(dns_hosts(args.dns_hosts))
+    os.environ["SSH_PORT"] = str(args.port)
+    for name, value in {
+        "PROJECT_NAME": "benchmark",
+        "ENVIRONMENT": "staging",
+        "POSTGRES_SERVER": "localhost",
+        "POSTGRES_USER": "benchmark",
+        "FIRST_SUPERUSER": "bench@example.com",
+        "FIRST_SUPERUSER_PASSWORD": "benchmark",
+        "SSH_USER": "benchmark",
+    }.items():
+        os.environ.setdefault(name, value)
+
+
+def build_scenarios(args: argparse.Namespace) -> dict:
+    from benchmarks.load import Scenario
+
+    domains = args.plesk_hosts * args.subscriptions_per_host
+    api = "/api/v1"
+
+    def domain(n: int) -> str:
+        return subscription_domain(n % domains)
+
+    return {
+        "public_key": Scenario("public_key", "GET", lambda n: f"{api}/plesk/publickey"),
+        "subscription_search": Scenario(
+            "subscription_search",
+            "GET",
+            lambda n: (
+                f"{api}/plesk/search/subscription/?query=site{n % 100}&mode=prefix"
+            ),
+        ),
+        "zonemaster": Scenario(
+            "zonemaster",
+            "GET",
+            lambda n: f"{api}/dns/internal/zonemaster/?name={domain(n)}&refresh=true",
+        ),
+        "zonemaster_inventory": Scenario(
+            "zonemaster_inventory",
+            "GET",
+            lambda n: f"{api}/dns/internal/zonemaster/?name={domain(n)}",
+        ),
+        "resolve_a": Scenario(
+            "resolve_a",
+            "GET",
+            lambda n: f"{api}/dns/resolve/internal/a/?name={domain(n)}",
+        ),
+        "resolve_mx": Scenario(
+            "resolve_mx",
+            "GET",
+            lambda n: f"{api}/dns/resolve/internal/mx/?name={domain(n)}",
+        ),
+    }
+
+
+DNS_SCENARIOS = {"resolve_a", "resolve_mx"}
+
+
+def override_dependencies(app) -> None:
+    import uuid
+
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from sqlalchemy.pool import StaticPool
+
+    from app.core.dependencies import get_current_user, get_db
+    from app.db.models import Base
+    from app.schemas import UserPublic, UserRoles
+
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    user = UserPublic(
+        id=uuid.uuid4(), email="bench@example.com", role=UserRoles.SUPERUSER
+    )
+
+    def get_sqlite_db():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_db] = get_sqlite_db
+    app.dependency_overrides[get_current_user] = lambda: user
+
+
+async def run(args: argparse.Namespace) -> list[dict]:
+    import httpx
+
+    from app.core_utils.loggers import setup_custom_access_logger, setup_ssh_logger
+    from app.dns.zone_master_inventory import ZONE_MASTER_INVENTORY
+    from app.main import app
+    from app.plesk.subscription_inventory import SUBSCRIPTION_INVENTORY
+    from app.schemas import DNS_SERVER_LIST, PLESK_SERVER_LIST
+    from app.signed_executor.async_ssh_handler import (
+        close_all_connections,
+        initialize_connection_pool,
+    )
+    from benchmarks.dns_stub import DnsStub
+    from benchmarks.load import run_scenario
+
+    scenarios = build_scenarios(args)
+    selected = args.scenario or list(scenarios)
+    override_dependencies(app)
+    if args.logs:
+        setup_custom_access_logger()
+        setup_ssh_logger()
+    else:
+        logging.disable(logging.INFO)
+
+    fleet = None
+    if not args.external_fleet:
+        fleet = FakeFleet(
+            args.plesk_hosts,
+            args.dns_hosts,
+            ExecutorBehaviour(
+                latency=args.latency,
+                jitter=args.jitter,
+                failure_rate=args.failure_rate,
+                subscriptions_per_host=args.subscriptions_per_host,
+                domains_per_subscription=args.domains_per_subscription,
+            ),
+            port=args.port,
+        )
+        await fleet.start()
+
+    dns_stub = DnsStub(
+        [ips[0] for ips in dns_hosts(args.dns_hosts).values()],
+        latency=args.dns_latency,
+    )
+    try:
+        await dns_stub.start()
+    except PermissionError:
+        print("No permission to bind port 53, skipping DNS scenarios", file=sys.stderr)
+        selected = [name for name in selected if name not in DNS_SCENARIOS]
+
+    summaries = []
+    try:
+        await initialize_connection_pool(PLESK_SERVER_LIST + DNS_SERVER_LIST)
+        if "subscription_search" in selected:
+            await SUBSCRIPTION_INVENTORY.sync(full_sync=True)
+        if "zonemaster_inventory" in selected:
+            await ZONE_MASTER_INVENTORY.refresh()
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark"
+        ) as client:
+            for name in selected:
+                result = await run_scenario(
+                    client,
+                    scenarios[name],
+                    args.requests,
+                    args.concurrency,
+                    trace_memory=args.trace_memory,
+                )
+                summaries.append(result.summary())
+    finally:
+        await close_all_connections()
+        await dns_stub.stop()
+        if fleet is not None:
+            await fleet.stop()
+    return summaries
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    add_behaviour_arguments(parser)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        help="Scenario to run, repeat for several. Defaults to all of them.",
+    )
+    parser.add_argument("--dns-latency", type=float, default=0.0)
+    parser.add_argument(
+        "--external-fleet",
+        action="store_true",
+        help=f"Use a fleet started with `python -m benchmarks.fake_fleet` "
+        f"(same host counts and port, {DEFAULT_PORT} by default)",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Report the peak of Python allocations, slows down every request",
+    )
+    parser.add_argument(
+        "--logs", action="store_true", help="Write the app logs, not only warnings"
+    )
+    parser.add_argument("--json", help="Also write the results to this file")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    configure_environment(args)
+
+    from benchmarks.load import format_table
+
+    summaries = asyncio.run(run(args))
+    print(format_table(summaries))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summaries, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+Fleet scaling benchmark: how startup, memory, fan-out latency and event-loop
+lag grow with the number of managed hosts.
+
+For every size a fake fleet is started in its own process, and the backend
+side is measured in another fresh process, because the host lists are read
+from the settings when the app is imported:
+
+    python -m benchmarks.scaling --sizes 10 100 1000
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+from typing_extensions import Self
+
+from benchmarks.fake_fleet import DEFAULT_PORT, raise_open_file_limit
+
+
+def _rss_kb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1024
+    except OSError:
+        # Peak instead of current, still growing with the connections made.
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / 1024 if sys.platform == "darwin" else float(rss)
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(p / 100 * len(ordered)))]
+
+
+class LoopLag:
+    def __init__(self, interval: float = 0.01):
+        """
+        How late a `interval` sleep wakes up, i.e. how long the event loop
+        was busy with other callbacks.
+        """
+        self.interval = interval
+        self.lags: list[float] = []
+        self._task: asyncio.Task | None = None
+
+    async def _sample(self) -> None:
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(time.perf_counter() - start - self.interval)
+
+    def __enter__(self) -> Self:
+        self._task = asyncio.create_task(self._sample())
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._task.cancel()
+
+    def summary(self, prefix: str) -> dict:
+        lags = self.lags or [0.0]
+        return {
+            f"{prefix}_lag_p99_ms": round(_percentile(lags, 99) * 1000, 2),
+            f"{prefix}_lag_max_ms": round(max(lags) * 1000, 2),
+        }
+
+
+async def measure(args: argparse.Namespace) -> dict:
+    from app.core.config import settings
+    from app.core.DomainMapper import DomainMapper
+    from app.schemas import DNS_SERVER_LIST, PLESK_SERVER_LIST, ExecutionStatus
+    from app.signed_executor import async_ssh_handler
+    from app.signed_executor.commands.plesk_operation import PleskOperation
+    from app.signed_executor.signed_executor_client import SignedExecutorClient
+
+    result: dict = {"hosts": len(PLESK_SERVER_LIST) + len(DNS_SERVER_LIST)}
+
+    start = time.perf_counter()
+    mapper = DomainMapper(settings.PLESK_SERVERS)
+    mapper.update_mappings(settings.DNS_SLAVE_SERVERS)
+    result["mapper_build_ms"] = round((time.perf_counter() - start) * 1000, 2)
+    lookups = [random.choice(PLESK_SERVER_LIST) for _ in range(10000)]
+    start = time.perf_counter()
+    for host in lookups:
+        mapper.resolve_domain(host)
+    result["mapper_lookup_us"] = round(
+        (time.perf_counter() - start) / len(lookups) * 1e6, 2
+    )
+
+    rss_before = _rss_kb()
+    start = time.perf_counter()
+    with LoopLag() as startup_lag:
+        await async_ssh_handler.initialize_connection_pool(
+            PLESK_SERVER_LIST + DNS_SERVER_LIST
+        )
+    result["startup_s"] = round(time.perf_counter() - start, 2)
+    connected = len(async_ssh_handler._connection_pool)
+    result["connected"] = connected
+    result["rss_per_connection_kb"] = (
+        round((_rss_kb() - rss_before) / connected, 1) if connected else None
+    )
+    result.update(startup_lag.summary("startup"))
+
+    client = SignedExecutorClient()
+    operation = PleskOperation.fetch_subscription_info()
+    latencies = []
+    failed = 0
+    with LoopLag() as fanout_lag:
+        for n in range(args.rounds):
+            start = time.perf_counter()
+            responses = await client.execute_on_servers(
+                PLESK_SERVER_LIST, operation, f"site{n}.bench.test"
+            )
+            latencies.append(time.perf_counter() - start)
+            failed += sum(
+                response.status is ExecutionStatus.INTERNAL_ERROR
+                for response in responses
+            )
+    result["fanout_p50_ms"] = round(_percentile(latencies, 50) * 1000, 1)
+    result["fanout_p95_ms"] = round(_percentile(latencies, 95) * 1000, 1)
+    result["fanout_max_ms"] = round(max(latencies) * 1000, 1)
+    result["fanout_failed_hosts"] = failed
+    result.update(fanout_lag.summary("fanout"))
+
+    await async_ssh_handler.close_all_connections()
+    return result
+
+
+def _measure_process(args: argparse.Namespace) -> None:
+    from benchmarks.run import configure_environment
+
+    configure_environment(args)
+    raise_open_file_limit()
+    # Failed hosts are counted in the results instead.
+    logging.disable(logging.CRITICAL)
+    print(json.dumps(asyncio.run(measure(args))))
+
+
+def run_size(args: argparse.Namespace, plesk_hosts: int, port: int) -> dict:
+    dns_hosts = max(1, plesk_hosts // 10)
+    fleet_args = [
+        f"--plesk-hosts={plesk_hosts}",
+        f"--dns-hosts={dns_hosts}",
+        f"--port={port}",
+        f"--latency={args.latency}",
+        f"--jitter={args.jitter}",
+    ]
+    fleet = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_fleet", *fleet_args],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        # The fleet prints its host lists once every server listens.
+        if not fleet.stdout.readline():
+            raise RuntimeError(f"Fake fleet of {plesk_hosts} hosts failed to start")
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.scaling",
+                "--measure",
+                f"--rounds={args.rounds}",
+                *fleet_args,
+            ],
+            stdout=subprocess.PIPE,
+            text=True,
+            check=True,
+        ).stdout
+    finally:
+        fleet.terminate()
+        fleet.wait()
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--json", help="Also write the results to this file")
+    # Internal: measure one size against an already running fleet.
+    parser.add_argument("--measure", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--plesk-hosts", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--dns-hosts", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        _measure_process(args)
+        return
+
+    from benchmarks.load import format_rows
+
+    # A port per size, the previous fleet's closed connections may still
+    # hold its addresses in TIME_WAIT.
+    results = [run_size(args, size, args.port + i) for i, size in enumerate(args.sizes)]
+    print(format_rows(results))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+#!/usr/bin/env bash
+
+set -e
+set -x
+
+# Micro-benchmarks of the per-request CPU hot paths, compared with the
+# baseline committed in benchmarks/baselines and failing when a mean got
+# more than 20% slower. The baseline is per platform directory (e.g.
+# Linux-CPython-3.13-64bit), other platforms only get the report, and it
+# is only meaningful on the hardware that recorded it. After an intended
+# speed change, or to compare on another machine, record a new one:
+#   rm benchmarks/baselines/*/0001_baseline.json
+#   scripts/benchmark.sh --benchmark-save=baseline
+compare=()
+if compgen -G "benchmarks/baselines/*/0001_baseline.json" > /dev/null; then
+    compare=(--benchmark-compare=0001_baseline --benchmark-compare-fail=mean:20%)
+fi
+
+pytest benchmarks/micro \
+    -o python_files='bench_*.py' \
+    --benchmark-only \
+    --benchmark-storage=benchmarks/baselines \
+    "${compare[@]}" \
+    --benchmark-columns=min,mean,median,stddev,ops \
+    "$@"
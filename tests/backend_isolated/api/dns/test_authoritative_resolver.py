@@ -0,0 +1,114 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiodns
+import pycares
+import pytest
+
+from app.dns.authoritative_resolver import AuthoritativeResolver, registered_domain
+
+
+def _ns_record(host: str, ttl: int = 3600):
+    return MagicMock(host=host, ttl=ttl)
+
+
+@pytest.fixture
+def recursive_resolver():
+    resolver = MagicMock()
+    resolver.query = AsyncMock(
+        return_value=[_ns_record("ns1.example.kz."), _ns_record("ns2.example.kz.")]
+    )
+    resolver.resolve_a = AsyncMock(
+        side_effect=lambda name, raise_errors=False: {
+            "ns1.example.kz": ["10.0.0.1"],
+            "ns2.example.kz": ["10.0.0.2"],
+        }[name]
+    )
+    return resolver
+
+
+@pytest.fixture
+def authoritative_channel():
+    channel = MagicMock()
+    channel.query = AsyncMock(
+        return_value=[_ns_record("ns2.example.kz"), _ns_record("ns1.example.kz")]
+    )
+    with patch(
+        "app.dns.authoritative_resolver.RESOLVERS.get", return_value=channel
+    ) as get:
+        yield channel, get
+
+
+@pytest.mark.asyncio
+async def test_delegation_is_cached_per_registered_domain(
+    recursive_resolver, authoritative_channel
+):
+    channel, get_resolver = authoritative_channel
+    resolver = AuthoritativeResolver(recursive_resolver)
+
+    assert await resolver.resolve_ns("example.kz") == [
+        "ns1.example.kz",
+        "ns2.example.kz",
+    ]
+    assert await resolver.resolve_ns("www.example.kz") == [
+        "ns1.example.kz",
+        "ns2.example.kz",
+    ]
+
+    recursive_resolver.query.assert_awaited_once_with("example.kz", "NS")
+    assert recursive_resolver.resolve_a.await_count == 2
+    assert channel.query.await_count == 2
+    get_resolver.assert_called_with(["10.0.0.1", "10.0.0.2"], name="authoritative")
+
+
+@pytest.mark.asyncio
+async def test_stale_delegation_is_refreshed(recursive_resolver, authoritative_channel):
+    channel, _ = authoritative_channel
+    resolver = AuthoritativeResolver(recursive_resolver)
+    await resolver.resolve_ns("example.kz")
+
+    channel.query.side_effect = [
+        aiodns.error.DNSError(pycares.errno.ARES_ETIMEOUT, "Timeout"),
+        [_ns_record("ns1.example.kz")],
+    ]
+    assert await resolver.resolve_ns("example.kz") == ["ns1.example.kz"]
+    assert recursive_resolver.query.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_negative_answers_keep_the_delegation(
+    recursive_resolver, authoritative_channel
+):
+    channel, _ = authoritative_channel
+    resolver = AuthoritativeResolver(recursive_resolver)
+    channel.query.side_effect = aiodns.error.DNSError(
+        pycares.errno.ARES_ENODATA, "DNS server returned answer with no data"
+    )
+
+    for _ in range(3):
+        assert await resolver.resolve_ns("www.example.kz", raise_errors=True) is None
+
+    recursive_resolver.query.assert_awaited_once_with("example.kz", "NS")
+    assert channel.query.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_delegation_timeout_raises_when_asked(
+    recursive_resolver, authoritative_channel
+):
+    channel, _ = authoritative_channel
+    resolver = AuthoritativeResolver(recursive_resolver)
+    recursive_resolver.query.side_effect = aiodns.error.DNSError(
+        pycares.errno.ARES_ETIMEOUT, "Timeout"
+    )
+
+    assert await resolver.resolve_ns("example.kz") is None
+    with pytest.raises(aiodns.error.DNSError):
+        await resolver.resolve_ns("example.kz", raise_errors=True)
+    channel.query.assert_not_awaited()
+
+
+def test_registered_domain_uses_the_bundled_suffix_list():
+    with patch("tldextract.suffix_list.find_first_response") as fetch:
+        assert registered_domain("www.shop.example.co.uk") == "example.co.uk"
+        assert registered_domain("ns1.example.kz") == "example.kz"
+    fetch.assert_not_called()
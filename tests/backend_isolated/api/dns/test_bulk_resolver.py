@@ -0,0 +1,102 @@
+import asyncio
+
+import aiodns
+import pycares
+import pytest
+from pydantic import ValidationError
+
+from app.dns.bulk_resolver import resolve_bulk
+from app.dns.dns_models import BulkDnsQuery, BulkDnsRequest, PropagationStatus
+
+
+def _query(name: str, record_type: str = "A", resolver: str = "google") -> BulkDnsQuery:
+    return BulkDnsQuery(name=name, type=record_type, resolver=resolver)
+
+
+@pytest.mark.asyncio
+async def test_identical_queries_are_resolved_once():
+    calls: list[str] = []
+
+    async def resolve(query: BulkDnsQuery):
+        calls.append(query.name)
+        return ["10.0.0.1"] if query.name.startswith("found") else None
+
+    queries = [
+        _query("found.example.com"),
+        _query("FOUND.example.com."),
+        _query("missing.example.com"),
+    ]
+    results = [result async for result in resolve_bulk(queries, resolve, concurrency=5)]
+
+    assert sorted(calls) == ["found.example.com", "missing.example.com"]
+    statuses = {result.name: result.status for result in results}
+    assert statuses == {
+        "found.example.com": PropagationStatus.RESOLVED,
+        "missing.example.com": PropagationStatus.NOT_FOUND,
+    }
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    in_flight = 0
+    max_in_flight = 0
+
+    async def resolve(query: BulkDnsQuery):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.001)
+        in_flight -= 1
+        return ["10.0.0.1"]
+
+    queries = [_query(f"host{i}.example.com") for i in range(50)]
+    results = [result async for result in resolve_bulk(queries, resolve, concurrency=4)]
+
+    assert len(results) == 50
+    assert max_in_flight == 4
+
+
+@pytest.mark.asyncio
+async def test_failed_lookups_are_not_reported_as_missing():
+    async def resolve(query: BulkDnsQuery):
+        if query.name == "nxdomain.example.com":
+            raise aiodns.error.DNSError(
+                pycares.errno.ARES_ENOTFOUND, "Domain name not found"
+            )
+        if query.name == "timeout.example.com":
+            raise aiodns.error.DNSError(
+                pycares.errno.ARES_ETIMEOUT, "Timeout while contacting DNS servers"
+            )
+        raise KeyError(query.name)
+
+    queries = [
+        _query("nxdomain.example.com"),
+        _query("timeout.example.com"),
+        _query("broken.example.com"),
+    ]
+    results = {
+        result.name: result
+        async for result in resolve_bulk(queries, resolve, concurrency=5)
+    }
+
+    assert results["nxdomain.example.com"].status == PropagationStatus.NOT_FOUND
+    assert results["nxdomain.example.com"].error is None
+    assert results["timeout.example.com"].status == PropagationStatus.ERROR
+    assert (
+        results["timeout.example.com"].error == "Timeout while contacting DNS servers"
+    )
+    assert results["broken.example.com"].status == PropagationStatus.ERROR
+    assert results["broken.example.com"].records is None
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        {"name": "not an ip", "type": "PTR"},
+        {"name": "example..com", "type": "A"},
+        {"name": "example.com", "type": "MX", "resolver": "authoritative"},
+    ],
+)
+def test_invalid_queries_are_rejected(query):
+    with pytest.raises(ValidationError):
+        BulkDnsRequest(queries=[query])
@@ -0,0 +1,100 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiodns
+import pycares
+import pytest
+import pytest_asyncio
+
+from app.dns.dns_cache import DNSCache, TTLCache
+from app.dns.dns_resolver import DNSResolver
+
+TEST_NAMESERVERS = ["8.8.8.8"]
+
+
+def _a_record(host: str, ttl: int):
+    return MagicMock(host=host, ttl=ttl)
+
+
+@pytest_asyncio.fixture
+async def resolver():
+    return DNSResolver(TEST_NAMESERVERS, cache=DNSCache(max_ttl=60, negative_ttl=30))
+
+
+@pytest.mark.asyncio
+async def test_positive_answer_is_served_from_cache(resolver: DNSResolver):
+    with patch.object(
+        resolver.resolver,
+        "query",
+        new=AsyncMock(return_value=[_a_record("10.0.0.1", 120)]),
+    ) as mock_query:
+        assert await resolver.resolve_a("example.com") == ["10.0.0.1"]
+        assert await resolver.resolve_a("EXAMPLE.com.") == ["10.0.0.1"]
+        mock_query.assert_awaited_once()
+
+    key = resolver.cache.make_key(TEST_NAMESERVERS, "example.com", "A")
+    assert resolver.cache._cache.remaining_ttl(key) <= 60
+    stats = resolver.cache.stats()
+    assert stats.hits == 1
+    assert stats.misses == 1
+    assert stats.hit_ratio == 0.5
+
+
+@pytest.mark.asyncio
+async def test_nxdomain_is_cached_negatively(resolver: DNSResolver):
+    error = aiodns.error.DNSError(pycares.errno.ARES_ENOTFOUND, "Domain name not found")
+    with patch.object(
+        resolver.resolver, "query", new=AsyncMock(side_effect=error)
+    ) as mock_query:
+        assert await resolver.resolve_mx("missing.example.com") is None
+        assert await resolver.resolve_mx("missing.example.com") is None
+        mock_query.assert_awaited_once()
+    assert resolver.cache.stats().negative_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_timeouts_are_not_cached(resolver: DNSResolver):
+    error = aiodns.error.DNSError(pycares.errno.ARES_ETIMEOUT, "Timeout")
+    with patch.object(
+        resolver.resolver, "query", new=AsyncMock(side_effect=error)
+    ) as mock_query:
+        assert await resolver.resolve_ns("example.com") is None
+        assert await resolver.resolve_ns("example.com") is None
+        assert mock_query.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_timeouts_raise_when_asked(resolver: DNSResolver):
+    timeout = aiodns.error.DNSError(pycares.errno.ARES_ETIMEOUT, "Timeout")
+    with (
+        patch.object(resolver.resolver, "query", new=AsyncMock(side_effect=timeout)),
+        pytest.raises(aiodns.error.DNSError),
+    ):
+        await resolver.resolve_a("example.com", raise_errors=True)
+
+    nxdomain = aiodns.error.DNSError(
+        pycares.errno.ARES_ENOTFOUND, "Domain name not found"
+    )
+    with patch.object(resolver.resolver, "query", new=AsyncMock(side_effect=nxdomain)):
+        assert (
+            await resolver.resolve_a("missing.example.com", raise_errors=True) is None
+        )
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache: TTLCache[str, int] = TTLCache(max_entries=2)
+    cache.set("a", 1, ttl=10)
+    cache.set("b", 2, ttl=10)
+    cache.get("a")
+    cache.set("c", 3, ttl=10)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.dns.dns_cache.time.monotonic", lambda: now[0])
+    cache: TTLCache[str, int] = TTLCache(max_entries=10)
+    cache.set("a", 1, ttl=5)
+    now[0] += 6
+    assert cache.get("a") is None
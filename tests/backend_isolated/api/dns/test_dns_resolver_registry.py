@@ -0,0 +1,26 @@
+import pytest
+
+from app.dns.dns_resolver import ResolverRegistry
+
+
+@pytest.mark.asyncio
+async def test_registry_reuses_resolver_and_channel():
+    registry = ResolverRegistry()
+    resolver = registry.get(["8.8.8.8", "8.8.4.4"])
+
+    assert registry.get(("8.8.8.8", "8.8.4.4")) is resolver
+    assert resolver.resolver is resolver.resolver
+    assert len(registry) == 1
+    await registry.close()
+    assert len(registry) == 0
+
+
+def test_registry_is_bounded():
+    registry = ResolverRegistry(max_resolvers=2)
+    first = registry.get(["10.0.0.1"])
+    registry.get(["10.0.0.2"])
+    registry.get(["10.0.0.1"])
+    registry.get(["10.0.0.3"])
+
+    assert len(registry) == 2
+    assert registry.get(["10.0.0.1"]) is first
@@ -0,0 +1,122 @@
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import aiodns
+import pycares
+import pytest
+from fastapi import HTTPException
+
+from app.api.dns_router import get_public_ns_propagation
+from app.dns.dns_models import PropagationStatus
+from app.dns.propagation import SLOW_CHECKS_BEFORE_DEMOTION, PropagationChecker
+from app.schemas import DomainName
+
+TEST_RESOLVERS = [
+    {"name": "Fast", "ip": "10.0.0.1"},
+    {"name": "Slow", "ip": "10.0.0.2"},
+    {"name": "Fast duplicate", "ip": "10.0.0.1"},
+]
+RESOLVER_DELAYS = {"10.0.0.1": 0.0, "10.0.0.2": 0.5, "10.0.0.3": 0.0}
+
+
+class FakeResolver:
+    def __init__(self, ip: str):
+        self.ip = ip
+
+    async def resolve_ns(
+        self, domain: str, use_cache: bool = True, raise_errors: bool = False
+    ):
+        await asyncio.sleep(RESOLVER_DELAYS[self.ip])
+        if self.ip == "10.0.0.3":
+            assert raise_errors
+            raise aiodns.error.DNSError(
+                pycares.errno.ARES_EREFUSED, "DNS server refused query"
+            )
+        return ["ns2.example.com.", "ns1.example.com."]
+
+
+@pytest.fixture(autouse=True)
+def fake_resolvers():
+    with patch(
+        "app.dns.propagation.RESOLVERS.get",
+        side_effect=lambda nameservers, name=None: FakeResolver(nameservers[0]),
+    ):
+        yield
+
+
+def test_duplicate_resolvers_are_removed():
+    checker = PropagationChecker(TEST_RESOLVERS)
+    assert [resolver.ip for resolver in checker.resolvers] == ["10.0.0.1", "10.0.0.2"]
+
+
+@pytest.mark.asyncio
+async def test_slow_resolvers_are_pending_after_deadline():
+    checker = PropagationChecker(TEST_RESOLVERS, deadline=0.05)
+    response = await checker.check("example.com")
+
+    statuses = {entry.ip: entry.status for entry in response.results}
+    assert statuses == {
+        "10.0.0.1": PropagationStatus.RESOLVED,
+        "10.0.0.2": PropagationStatus.PENDING,
+    }
+    assert response.results[0].records == ["ns1.example.com", "ns2.example.com"]
+    assert not response.complete
+
+
+@pytest.mark.asyncio
+async def test_consistently_slow_resolver_is_demoted():
+    checker = PropagationChecker(TEST_RESOLVERS, deadline=0.05)
+    for _ in range(SLOW_CHECKS_BEFORE_DEMOTION):
+        checker.latency.record("10.0.0.2", 500)
+
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    response = await checker.check("example.com", deadline=1)
+
+    assert loop.time() - start < 0.5
+    slow_entry = next(entry for entry in response.results if entry.ip == "10.0.0.2")
+    assert slow_entry.demoted
+    assert slow_entry.status is PropagationStatus.PENDING
+
+
+@pytest.mark.asyncio
+async def test_stream_yields_answers_then_pending():
+    checker = PropagationChecker(TEST_RESOLVERS, deadline=0.05)
+    entries = [entry async for entry in checker.stream("example.com")]
+
+    assert [entry.status for entry in entries] == [
+        PropagationStatus.RESOLVED,
+        PropagationStatus.PENDING,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_failing_resolver_is_reported_as_error():
+    checker = PropagationChecker(
+        [TEST_RESOLVERS[0], {"name": "Refusing", "ip": "10.0.0.3"}]
+    )
+    response = await checker.check("example.com")
+
+    refusing = next(entry for entry in response.results if entry.ip == "10.0.0.3")
+    assert refusing.status is PropagationStatus.ERROR
+    assert refusing.error == "DNS server refused query"
+    assert refusing.records is None
+    assert response.complete
+
+
+@pytest.mark.asyncio
+async def test_propagation_route_keeps_resolver_to_records_shape():
+    checker = PropagationChecker(TEST_RESOLVERS, deadline=0.05)
+    service = MagicMock(get_ns_records_from_public_ns=checker.check)
+    domain = DomainName(name="example.com")
+
+    assert await get_public_ns_propagation(domain, service) == {
+        "Fast": ["ns1.example.com", "ns2.example.com"]
+    }
+
+    with (
+        patch.object(checker, "resolvers", checker.resolvers[1:]),
+        pytest.raises(HTTPException) as error,
+    ):
+        await get_public_ns_propagation(domain, service)
+    assert error.value.status_code == 404
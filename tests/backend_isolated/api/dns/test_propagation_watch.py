@@ -0,0 +1,95 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.dns.dns_models import (
+    NsPropagationEntry,
+    NsPropagationResponse,
+    PropagationStatus,
+    WatchJobState,
+)
+from app.dns.propagation_watch import (
+    PropagationWatchManager,
+    TooManyWatchJobs,
+    count_converged,
+)
+
+TEST_DOMAIN = "example.com"
+AUTHORITATIVE_NS = ["ns1.example.com.", "ns2.example.com."]
+
+
+def _propagation_result(*records: list[str] | None) -> NsPropagationResponse:
+    return NsPropagationResponse(
+        domain=TEST_DOMAIN,
+        complete=True,
+        results=[
+            NsPropagationEntry(
+                resolver=f"resolver{i}",
+                ip=f"10.0.0.{i}",
+                status=PropagationStatus.RESOLVED,
+                records=entry,
+            )
+            for i, entry in enumerate(records)
+        ],
+    )
+
+
+def _dns_service(*results: NsPropagationResponse):
+    service = MagicMock()
+    service.propagation.resolvers = [MagicMock(), MagicMock()]
+    service.resolve_authoritative_ns_record = AsyncMock(return_value=AUTHORITATIVE_NS)
+    service.get_ns_records_from_public_ns = AsyncMock(side_effect=list(results))
+    return service
+
+
+@pytest.mark.asyncio
+async def test_watch_polls_until_converged():
+    stale = _propagation_result(["old.ns.kz"], ["ns1.example.com", "ns2.example.com"])
+    converged = _propagation_result(
+        ["ns1.example.com", "ns2.example.com"], ["ns2.example.com", "ns1.example.com"]
+    )
+    service = _dns_service(stale, converged)
+    manager = PropagationWatchManager()
+
+    with patch("app.dns.propagation_watch.INITIAL_POLL_DELAY", 0):
+        job = manager.start(TEST_DOMAIN, service)
+        assert manager.start(TEST_DOMAIN + ".", service) is job
+        updates = [progress async for progress in job.subscribe()]
+
+    assert updates[-1].state is WatchJobState.CONVERGED
+    assert updates[-1].attempt == 2
+    assert updates[-1].converged_resolvers == 2
+    await asyncio.sleep(0)
+    assert manager.get(TEST_DOMAIN) is job
+    assert service.get_ns_records_from_public_ns.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_shutdown_cancels_running_jobs():
+    stale = _propagation_result(["old.ns.kz"])
+    manager = PropagationWatchManager()
+    job = manager.start(TEST_DOMAIN, _dns_service(stale))
+    await asyncio.sleep(0.01)
+
+    await manager.shutdown()
+    assert job.progress.state is WatchJobState.CANCELLED
+
+
+def test_erroring_resolver_does_not_block_convergence():
+    result = _propagation_result(["ns1.example.com", "ns2.example.com"], None)
+    result.results[1].status = PropagationStatus.ERROR
+
+    assert count_converged(result, ["ns1.example.com", "ns2.example.com"]) == (1, 1)
+
+
+@pytest.mark.asyncio
+async def test_running_jobs_are_capped():
+    service = _dns_service(*[_propagation_result(["old.ns.kz"])] * 4)
+    manager = PropagationWatchManager(max_running=1)
+
+    job = manager.start(TEST_DOMAIN, service)
+    assert manager.start(TEST_DOMAIN, service) is job
+    with pytest.raises(TooManyWatchJobs):
+        manager.start("other.example.com", service)
+    await manager.shutdown()
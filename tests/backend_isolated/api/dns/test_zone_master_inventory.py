@@ -0,0 +1,69 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.dns.dns_models import ZoneMaster, ZoneMasterInventoryItem
+from app.dns.zone_master_inventory import ZoneMasterIndex, ZoneMasterInventory
+from app.schemas import ExecutionStatus, SignedExecutorResponse
+
+
+def test_replace_server_drops_removed_zones():
+    index = ZoneMasterIndex()
+    index.replace_server("ns1.internal.kz", {"a.kz": "10.0.0.1", "b.kz": "10.0.0.1"})
+    index.replace_server("ns1.internal.kz", {"a.kz": "10.0.0.2"})
+
+    assert index.get("b.kz") is None
+    assert index.get("A.kz.") == [ZoneMaster(host="ns1.internal.kz", ip="10.0.0.2")]
+
+
+def test_conflicts_list_zones_with_several_masters():
+    index = ZoneMasterIndex()
+    index.replace_server("ns1.internal.kz", {"a.kz": "10.0.0.1", "b.kz": "10.0.0.1"})
+    index.replace_server("ns2.internal.kz", {"a.kz": "10.0.0.2", "b.kz": "10.0.0.1"})
+
+    conflicts = index.conflicts()
+    assert [conflict.zone_name for conflict in conflicts] == ["a.kz"]
+    assert len(conflicts[0].zone_masters) == 2
+
+
+def test_set_zone_replaces_live_answer():
+    index = ZoneMasterIndex()
+    index.replace_server("ns1.internal.kz", {"a.kz": "10.0.0.1"})
+    index.replace_server("ns2.internal.kz", {"a.kz": "10.0.0.1"})
+    index.set_zone("a.kz", [ZoneMaster(host="ns2.internal.kz", ip="10.0.0.3")])
+
+    assert index.get("a.kz") == [ZoneMaster(host="ns2.internal.kz", ip="10.0.0.3")]
+    index.remove_zone("a.kz")
+    assert index.get("a.kz") is None
+    assert len(index) == 0
+
+
+@pytest.mark.asyncio
+async def test_refresh_indexes_every_answering_server():
+    inventory = ZoneMasterInventory(
+        server_list=["ns1.internal.kz", "ns2.internal.kz"], refresh_interval=0
+    )
+    responses = [
+        SignedExecutorResponse(
+            host="ns1.internal.kz",
+            status=ExecutionStatus.OK,
+            code=200,
+            message="",
+            payload=[ZoneMasterInventoryItem(zone="a.kz.", zonemaster_ip="10.0.0.1")],
+        ),
+        SignedExecutorResponse(
+            host="ns2.internal.kz",
+            status=ExecutionStatus.INTERNAL_ERROR,
+            code=500,
+            message="timeout",
+        ),
+    ]
+    inventory._client = AsyncMock()
+    inventory._client.execute_on_servers.return_value = responses
+
+    with patch.object(ZoneMasterInventory, "_store") as store:
+        status = await inventory.refresh()
+
+    store.assert_called_once_with("ns1.internal.kz", {"a.kz": "10.0.0.1"})
+    assert status.zones == 1
+    assert list(status.servers) == ["ns1.internal.kz"]
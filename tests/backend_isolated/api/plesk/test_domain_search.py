@@ -0,0 +1,51 @@
+import pytest
+
+from app.plesk.domain_search import DomainSearchIndex
+from app.plesk.plesk_schemas import SubscriptionSearchMode
+
+
+@pytest.fixture
+def index() -> DomainSearchIndex:
+    index = DomainSearchIndex()
+    for domain in [
+        "example.kz",
+        "shop.example.kz",
+        "mail.shop.example.kz",
+        "notexample.kz",
+        "examples.kz",
+        "kazpost.kz",
+    ]:
+        index.add(domain)
+    return index
+
+
+def test_suffix_matches_zone_and_subdomains(index):
+    expected = ["example.kz", "shop.example.kz", "mail.shop.example.kz"]
+    assert index.search("*.example.kz", SubscriptionSearchMode.SUFFIX) == expected
+    assert index.search("Example.KZ.", SubscriptionSearchMode.SUFFIX) == expected
+
+
+def test_prefix_and_substring(index):
+    assert index.search("example", SubscriptionSearchMode.PREFIX) == [
+        "example.kz",
+        "examples.kz",
+    ]
+    assert index.search("post", SubscriptionSearchMode.SUBSTRING) == ["kazpost.kz"]
+    assert index.search("s.kz", SubscriptionSearchMode.SUBSTRING) == ["examples.kz"]
+
+
+def test_fuzzy_ranks_closest_names_first(index):
+    results = index.search("exampel.kz", SubscriptionSearchMode.FUZZY)
+    assert results[0] == "example.kz"
+    assert "kazpost.kz" not in results
+
+
+def test_remove_drops_domain_from_every_index(index):
+    index.remove("shop.example.kz")
+    assert "shop.example.kz" not in index.search(
+        "example.kz", SubscriptionSearchMode.SUFFIX
+    )
+    assert index.search("shop.example.kz", SubscriptionSearchMode.FUZZY)[0] != (
+        "shop.example.kz"
+    )
+    assert len(index) == 5
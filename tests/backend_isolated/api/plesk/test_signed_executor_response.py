@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from app.plesk.plesk_schemas import LoginLinkData
+from app.schemas import ExecutionStatus, SignedExecutorResponse
+from app.signed_executor.commands.plesk_operation import PleskOperation
+
+
+def _ssh_response(body: dict) -> dict:
+    return {
+        "host": "plesk1.internal.kz",
+        "stdout": json.dumps(body),
+        "stderr": "",
+        "returncode": 0,
+        "execution_time": 0.1,
+    }
+
+
+def test_payload_is_validated_into_operation_type():
+    response = SignedExecutorResponse.from_ssh_response(
+        _ssh_response(
+            {
+                "status": "ok",
+                "code": 200,
+                "message": "",
+                "payload": {"login_link": "https://x", "subscription_name": "a.kz"},
+            }
+        ),
+        PleskOperation.get_login_link().payload_type,
+    )
+
+    assert response.host == "plesk1.internal.kz"
+    assert response.status is ExecutionStatus.OK
+    assert isinstance(response.payload, LoginLinkData)
+
+
+def test_error_payload_of_another_shape_stays_untyped():
+    response = SignedExecutorResponse.from_ssh_response(
+        _ssh_response(
+            {
+                "status": "NOT_FOUND",
+                "code": 404,
+                "message": "no subscription",
+                "payload": {"subscription_id": "7"},
+            }
+        ),
+        LoginLinkData,
+    )
+
+    assert response.status is ExecutionStatus.NOT_FOUND
+    assert response.payload == {"subscription_id": "7"}
+
+
+def test_ok_payload_of_wrong_shape_is_rejected():
+    with pytest.raises(ValueError):
+        SignedExecutorResponse.from_ssh_response(
+            _ssh_response(
+                {"status": "OK", "code": 200, "message": "", "payload": {"x": 1}}
+            ),
+            LoginLinkData,
+        )
+
+
+def test_host_comes_from_the_connection_not_the_output():
+    response = SignedExecutorResponse.from_ssh_response(
+        _ssh_response(
+            {"host": "other.internal.kz", "status": "OK", "code": 200, "message": ""}
+        )
+    )
+
+    assert response.host == "plesk1.internal.kz"
@@ -0,0 +1,106 @@
+import asyncio
+from unittest.mock import MagicMock
+
+import pytest
+
+from app.signed_executor import async_ssh_handler
+from app.signed_executor.ssh_latency import AddressLatency, HostLatency
+
+
+def test_address_latency_prefers_fastest_and_penalizes_failures():
+    latency = AddressLatency()
+    latency.record("10.0.0.1", 0.5)
+    latency.record("10.0.0.2", 0.1)
+    latency.record_failure("10.0.0.3")
+
+    assert latency.order(["10.0.0.1", "10.0.0.2", "10.0.0.3", "10.0.0.4"]) == [
+        "10.0.0.4",
+        "10.0.0.2",
+        "10.0.0.1",
+        "10.0.0.3",
+    ]
+
+
+def test_host_latency_p95_needs_enough_samples():
+    latency = HostLatency(min_samples=20)
+    for i in range(19):
+        latency.record("plesk1", i / 100)
+    assert latency.p95("plesk1") is None
+
+    latency.record("plesk1", 1.0)
+    assert latency.p95("plesk1") == 0.18
+
+
+@pytest.mark.asyncio
+async def test_connect_fastest_does_not_wait_for_a_stalled_address(monkeypatch):
+    connections = {}
+
+    async def connect(ip):
+        if ip == "10.0.0.1":
+            await asyncio.sleep(10)
+        connections[ip] = MagicMock()
+        return ip, connections[ip]
+
+    monkeypatch.setattr(async_ssh_handler, "_connect", connect)
+    monkeypatch.setattr(async_ssh_handler, "HAPPY_EYEBALLS_DELAY", 0.01)
+
+    ip, _ = await asyncio.wait_for(
+        async_ssh_handler._connect_fastest(["10.0.0.1", "10.0.0.2"]), timeout=1
+    )
+    assert ip == "10.0.0.2"
+
+
+@pytest.mark.asyncio
+async def test_slow_read_is_hedged_on_spare_connection(monkeypatch):
+    primary, spare = MagicMock(), MagicMock()
+
+    async def run_streaming(conn, command):
+        if conn is primary:
+            await asyncio.sleep(10)
+        return b"spare", b"", 0
+
+    async def get_hedge_connection(host):
+        return spare
+
+    host_latency = HostLatency(min_samples=1)
+    host_latency.record("plesk1", 0.01)
+    monkeypatch.setattr(async_ssh_handler, "_run_streaming", run_streaming)
+    monkeypatch.setattr(
+        async_ssh_handler, "_get_hedge_connection", get_hedge_connection
+    )
+    monkeypatch.setattr(async_ssh_handler, "HOST_LATENCY", host_latency)
+
+    result = await asyncio.wait_for(
+        async_ssh_handler._run_hedged(primary, "plesk1", "execute token"), timeout=1
+    )
+    assert result == (b"spare", b"", 0)
+    await asyncio.sleep(0)
+    # The hedge's run time is not a sample for the host's p95, the cancelled
+    # primary's is, censored at the hedge delay.
+    first, censored = host_latency._samples["plesk1"]
+    assert first == 0.01
+    assert censored >= async_ssh_handler.MIN_HEDGE_DELAY
+
+
+@pytest.mark.asyncio
+async def test_concurrent_hedges_share_one_spare_connection(monkeypatch):
+    connects = []
+
+    async def connect_fastest(addresses):
+        connects.append(addresses)
+        await asyncio.sleep(0.01)
+        return addresses[0], MagicMock(is_closed=lambda: False)
+
+    monkeypatch.setattr(async_ssh_handler, "_connect_fastest", connect_fastest)
+    monkeypatch.setattr(
+        async_ssh_handler, "_host_addresses", lambda host, avoid: ["10.0.0.1"]
+    )
+    monkeypatch.setattr(async_ssh_handler, "_hedge_pool", {})
+
+    first, second = await asyncio.gather(
+        async_ssh_handler._get_hedge_connection("plesk1"),
+        async_ssh_handler._get_hedge_connection("plesk1"),
+    )
+
+    assert first is second
+    assert len(connects) == 1
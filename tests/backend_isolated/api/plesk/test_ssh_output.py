@@ -0,0 +1,97 @@
+import asyncio
+import gzip
+import tracemalloc
+from unittest.mock import MagicMock, patch
+
+import pytest
+import zstandard
+
+from app.signed_executor import async_ssh_handler
+from app.signed_executor.async_ssh_handler import (
+    OutputBuffer,
+    OutputLimitExceeded,
+    _filter_stderr,
+    _read_stream,
+    _run_streaming,
+)
+
+
+def _stream(data: bytes) -> asyncio.StreamReader:
+    stream = asyncio.StreamReader()
+    stream.feed_data(data)
+    stream.feed_eof()
+    return stream
+
+
+@pytest.mark.asyncio
+async def test_gzip_output_is_decoded_while_reading():
+    payload = b'{"status": "OK"}' * 10000
+    output = await _read_stream(
+        _stream(gzip.compress(payload)), OutputBuffer(len(payload), "gzip")
+    )
+    assert output == payload
+
+
+@pytest.mark.asyncio
+async def test_output_over_limit_is_rejected():
+    with pytest.raises(OutputLimitExceeded):
+        await _read_stream(_stream(b"x" * 1000), OutputBuffer(999))
+
+    # The limit applies to the decompressed size.
+    with pytest.raises(OutputLimitExceeded):
+        await _read_stream(
+            _stream(gzip.compress(b"x" * 1_000_000)), OutputBuffer(1000, "gzip")
+        )
+
+
+@pytest.mark.asyncio
+async def test_zstd_output_stops_inflating_at_the_limit():
+    compressor = zstandard.ZstdCompressor().compressobj()
+    bomb = b"".join(compressor.compress(bytes(1_000_000)) for _ in range(200))
+    bomb += compressor.flush()
+    assert len(bomb) < 100_000
+
+    tracemalloc.start()
+    try:
+        with pytest.raises(OutputLimitExceeded):
+            await _read_stream(_stream(bomb), OutputBuffer(1000, "zstd"))
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    assert peak < 10_000_000
+
+
+@pytest.mark.asyncio
+async def test_compressed_command_keeps_the_executor_exit_status():
+    process = MagicMock(exit_status=3)
+    process.stdout = _stream(gzip.compress(b"{}"))
+    process.stderr = _stream(b"")
+
+    async def wait():
+        pass
+
+    process.wait = wait
+    conn = MagicMock()
+    conn.create_process.return_value.__aenter__.return_value = process
+    async_ssh_handler._output_compression.cache_clear()
+    try:
+        with patch.object(async_ssh_handler.settings, "SSH_OUTPUT_COMPRESSION", "gzip"):
+            stdout, _, returncode = await _run_streaming(conn, "executor token")
+    finally:
+        async_ssh_handler._output_compression.cache_clear()
+
+    command = conn.create_process.call_args.args[0]
+    assert command == "bash -c 'set -o pipefail; executor token | gzip -1 -c'"
+    assert (stdout, returncode) == (b"{}", 3)
+
+
+@pytest.mark.asyncio
+async def test_truncated_output_keeps_the_beginning():
+    output = await _read_stream(_stream(b"abcdef"), OutputBuffer(3, truncate=True))
+    assert output == b"abc"
+
+
+def test_filter_stderr_drops_known_hosts_warning():
+    stderr = b"Warning: Permanently added 'x' (ED25519) to the list\nboom\n"
+    assert _filter_stderr(stderr) == "boom"
+    assert _filter_stderr(b"Warning: Permanently added 'x'\n") is None
@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+from fastapi import Depends, FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.core.dependencies import ssh_work_context
+from app.signed_executor.ssh_scheduler import (
+    SshOverloaded,
+    SshPriority,
+    SshScheduler,
+    current_principal,
+    ssh_principal,
+    ssh_priority,
+)
+
+
+def _scheduler(**kwargs) -> SshScheduler:
+    limits = {"max_concurrency": 1, "max_per_host": 10, "max_per_principal": 10}
+    limits.update(kwargs)
+    return SshScheduler(**limits, max_queued={priority: 2 for priority in SshPriority})
+
+
+async def _run(scheduler, host, priority, order, hold: asyncio.Event | None = None):
+    ssh_priority.set(priority)
+    async with scheduler.slot(host):
+        order.append(priority)
+        if hold is not None:
+            await hold.wait()
+
+
+@pytest.mark.asyncio
+async def test_waiters_start_in_priority_order():
+    scheduler = _scheduler()
+    order = []
+    hold = asyncio.Event()
+    first = asyncio.create_task(_run(scheduler, "a", SshPriority.BULK, order, hold))
+    await asyncio.sleep(0)
+    waiters = [
+        asyncio.create_task(_run(scheduler, "a", priority, order))
+        for priority in (SshPriority.BULK, SshPriority.WRITE, SshPriority.INTERACTIVE)
+    ]
+    await asyncio.sleep(0)
+
+    hold.set()
+    await asyncio.gather(first, *waiters)
+    assert order == [
+        SshPriority.BULK,
+        SshPriority.INTERACTIVE,
+        SshPriority.WRITE,
+        SshPriority.BULK,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_busy_host_does_not_block_other_hosts():
+    scheduler = _scheduler(max_concurrency=10, max_per_host=1)
+    order = []
+    hold = asyncio.Event()
+    busy = asyncio.create_task(_run(scheduler, "a", SshPriority.BULK, order, hold))
+    blocked = asyncio.create_task(_run(scheduler, "a", SshPriority.BULK, order))
+    await asyncio.sleep(0)
+
+    await asyncio.wait_for(_run(scheduler, "b", SshPriority.INTERACTIVE, order), 1)
+    assert not blocked.done()
+    hold.set()
+    await asyncio.gather(busy, blocked)
+
+
+@pytest.mark.asyncio
+async def test_per_principal_limit():
+    scheduler = _scheduler(max_concurrency=10, max_per_principal=1)
+    ssh_principal.set("user:1")
+    order = []
+    hold = asyncio.Event()
+    first = asyncio.create_task(_run(scheduler, "a", SshPriority.BULK, order, hold))
+    second = asyncio.create_task(_run(scheduler, "b", SshPriority.BULK, order))
+    await asyncio.sleep(0)
+    assert len(order) == 1
+
+    hold.set()
+    await asyncio.gather(first, second)
+    assert len(order) == 2
+
+
+@pytest.mark.asyncio
+async def test_full_queue_sheds_and_cancelled_waiter_leaves_it():
+    scheduler = _scheduler()
+    hold = asyncio.Event()
+    ssh_priority.set(SshPriority.WRITE)
+    running = asyncio.create_task(_run(scheduler, "a", SshPriority.WRITE, [], hold))
+    queued = [
+        asyncio.create_task(_run(scheduler, "a", SshPriority.WRITE, []))
+        for _ in range(2)
+    ]
+    await asyncio.sleep(0)
+
+    with pytest.raises(SshOverloaded):
+        scheduler.admit()
+
+    queued[0].cancel()
+    await asyncio.gather(queued[0], return_exceptions=True)
+    scheduler.admit()
+
+    hold.set()
+    await asyncio.gather(running, queued[1])
+    assert scheduler.stats() == {
+        "running": 0,
+        "queued": {"interactive": 0, "write": 0, "bulk": 0},
+    }
+
+
+def test_request_principal_is_the_authenticated_user_or_client():
+    def authenticate(request: Request):
+        # What get_current_user records once it decoded the token.
+        request.state.user_id = "42"
+
+    app = FastAPI(dependencies=[Depends(ssh_work_context)])
+
+    @app.get("/anonymous")
+    async def anonymous():
+        return current_principal()
+
+    @app.get("/authenticated", dependencies=[Depends(authenticate)])
+    async def authenticated():
+        return current_principal()
+
+    client = TestClient(app)
+    assert client.get("/anonymous").json() == "testclient"
+    assert client.get("/authenticated").json() == "user:42"
@@ -0,0 +1,130 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.plesk.plesk_schemas import (
+    SubscriptionDetailsModel,
+    SubscriptionInventoryPayload,
+    SubscriptionSearchMode,
+)
+from app.plesk.subscription_inventory import (
+    SubscriptionInventorySync,
+    SubscriptionStore,
+)
+from app.schemas import ExecutionStatus, HostIpData, SignedExecutorResponse
+
+HOST = "plesk1.internal.kz"
+
+
+def _item(subscription_id: str, *domains: str) -> dict:
+    return {
+        "id": subscription_id,
+        "name": domains[0],
+        "username": "owner",
+        "userlogin": "owner",
+        "domains": [{"name": domain} for domain in domains],
+        "domain_states": [],
+        "is_space_overused": False,
+        "subscription_size_mb": 10,
+        "subscription_status": "online",
+    }
+
+
+def _subscription(subscription_id: str, *domains: str) -> SubscriptionDetailsModel:
+    return SubscriptionDetailsModel(
+        host=HostIpData(name=HOST, ips=["10.0.0.1"]),
+        **_item(subscription_id, *domains),
+    )
+
+
+def test_search_modes():
+    store = SubscriptionStore()
+    store.replace_host(
+        HOST,
+        [
+            _subscription("1", "shop.kz", "blog.shop.kz"),
+            _subscription("2", "shopping.kz"),
+            _subscription("3", "myshop.kz"),
+        ],
+    )
+
+    def ids(query, mode):
+        return [subscription.id for subscription in store.search(query, mode)]
+
+    assert ids("SHOP.kz.", SubscriptionSearchMode.EXACT) == ["1"]
+    assert ids("shop", SubscriptionSearchMode.PREFIX) == ["1", "2"]
+    assert ids("shop", SubscriptionSearchMode.SUBSTRING) == ["1", "3", "2"]
+    assert store.domain_count == 4
+
+
+def test_apply_changes_reindexes_domains():
+    store = SubscriptionStore()
+    store.replace_host(HOST, [_subscription("1", "a.kz"), _subscription("2", "b.kz")])
+    store.apply_changes(HOST, [_subscription("1", "c.kz")], removed_ids=["2"])
+
+    assert store.search("a.kz", SubscriptionSearchMode.EXACT) == []
+    assert store.search("b.kz", SubscriptionSearchMode.EXACT) == []
+    assert [s.id for s in store.search("c.kz", SubscriptionSearchMode.EXACT)] == ["1"]
+    assert len(store) == 1
+
+
+@pytest.mark.asyncio
+async def test_sync_host_is_incremental_after_first_full_sync():
+    inventory = SubscriptionInventorySync(server_list=[HOST], sync_interval=0)
+    inventory._client = AsyncMock()
+    inventory._client.execute_on_server.side_effect = [
+        SignedExecutorResponse(
+            host=HOST,
+            status=ExecutionStatus.OK,
+            code=200,
+            message="",
+            payload={
+                "server_time": 100,
+                "subscriptions": [_item("1", "a.kz"), _item("2", "b.kz")],
+            },
+        ),
+        SignedExecutorResponse(
+            host=HOST,
+            status=ExecutionStatus.OK,
+            code=200,
+            message="",
+            payload={"server_time": 200, "subscriptions": [], "removed_ids": ["2"]},
+        ),
+    ]
+
+    with patch.object(SubscriptionInventorySync, "_store") as store:
+        await inventory.sync()
+        await inventory.sync()
+
+    first_call, second_call = inventory._client.execute_on_server.call_args_list
+    assert first_call.args[2:] == ()
+    assert second_call.args[2:] == ("100",)
+    assert [call.args[2] for call in store.call_args_list] == [True, False]
+    assert len(inventory.store) == 1
+    assert inventory.status().servers.keys() == {HOST}
+
+
+def test_store_passes_plain_rows_to_the_database():
+    payload = SubscriptionInventoryPayload(
+        server_time=100, subscriptions=[_item("1", "Shop.kz", "blog.shop.kz")]
+    )
+    with (
+        patch("app.plesk.subscription_inventory.Session"),
+        patch(
+            "app.plesk.subscription_inventory.db_apply_subscription_inventory"
+        ) as apply,
+    ):
+        SubscriptionInventorySync._store(HOST, payload, full_sync=True)
+
+    (row,) = apply.call_args.kwargs["subscriptions"]
+    assert row == {
+        "subscription_id": "1",
+        "name": "Shop.kz",
+        "username": "owner",
+        "userlogin": "owner",
+        "domains": ["Shop.kz", "blog.shop.kz"],
+        "domain_states": [],
+        "is_space_overused": False,
+        "subscription_size_mb": 10,
+        "subscription_status": "online",
+    }
@@ -0,0 +1,63 @@
+import logging
+from datetime import datetime
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core_utils.loggers import (
+    CompactDockerFormatter,
+    LoggingMiddleware,
+    TimestampClock,
+    round_up_seconds,
+)
+
+
+def test_streamed_response_is_logged_with_structured_fields(caplog):
+    app = FastAPI()
+    app.add_middleware(LoggingMiddleware)
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            yield b"a"
+            yield b"b"
+
+        return StreamingResponse(chunks(), status_code=202)
+
+    with caplog.at_level(logging.INFO, logger="app.access"):
+        response = TestClient(app).get(
+            "/stream", headers={"X-Forwarded-For": "192.0.2.1"}
+        )
+
+    assert response.content == b"ab"
+    [record] = [r for r in caplog.records if r.name == "app.access"]
+    assert (record.client, record.method, record.path, record.status_code) == (
+        "192.0.2.1",
+        "GET",
+        "/stream",
+        202,
+    )
+
+    line = CompactDockerFormatter().format(record)
+    assert 'client=192.0.2.1 status=202 req="GET /stream HTTP/1.1"' in line
+    assert line.endswith(f"time={record.duration_ms:.2f}ms")
+
+
+def test_formatter_falls_back_to_message_for_other_records():
+    record = logging.LogRecord("app.access", logging.INFO, "", 0, "started", (), None)
+
+    line = CompactDockerFormatter().format(record)
+
+    assert line.endswith('client=- status=- req="started" time=-')
+
+
+def test_clock_rounds_up_like_round_up_seconds_and_reuses_the_second():
+    clock = TimestampClock()
+    base = datetime(2024, 5, 1, 12, 30, 15).timestamp()
+
+    for offset in (0, 0.000001, 0.5, 0.999999, 1):
+        expected = round_up_seconds(datetime.fromtimestamp(base + offset))
+        assert clock.format(base + offset) == expected.isoformat()
+
+    assert clock.format(base + 0.2) is clock.format(base + 0.7)
@@ -0,0 +1,75 @@
+import logging
+import threading
+from logging.handlers import QueueHandler
+from unittest.mock import patch
+
+from app.core_utils.loggers import LogQueue, setup_app_logger
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self, release: threading.Event | None = None):
+        super().__init__()
+        self.unblocked = release
+        self.messages: list[str] = []
+        self.threads: set[int] = set()
+
+    def emit(self, record):
+        if self.unblocked is not None:
+            self.unblocked.wait()
+        self.messages.append(record.getMessage())
+        self.threads.add(threading.get_ident())
+
+
+def test_handlers_run_on_writer_thread_and_stop_flushes():
+    log_queue = LogQueue(maxsize=100)
+    logger = logging.getLogger("tests.log_queue.writer")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = RecordingHandler()
+    log_queue.add_handler(logger, handler)
+
+    for i in range(10):
+        logger.info("record %d", i)
+    log_queue.stop()
+
+    assert handler.messages == [f"record {i}" for i in range(10)]
+    assert threading.get_ident() not in handler.threads
+
+
+def test_full_queue_drops_records_without_blocking():
+    log_queue = LogQueue(maxsize=1)
+    logger = logging.getLogger("tests.log_queue.full")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    release = threading.Event()
+    handler = RecordingHandler(release)
+    log_queue.add_handler(logger, handler)
+
+    for i in range(5):
+        logger.info("record %d", i)
+    dropped = log_queue.dropped["tests.log_queue.full"]
+    release.set()
+    log_queue.stop()
+
+    # One record is in the stalled handler and one waits in the queue.
+    assert dropped >= 3
+    assert len(handler.messages) + dropped == 5
+
+
+def test_module_loggers_write_through_the_queue(capsys):
+    log_queue = LogQueue(maxsize=100)
+    app_logger = logging.getLogger("app")
+    handlers, propagate = list(app_logger.handlers), app_logger.propagate
+    try:
+        with patch("app.core_utils.loggers.LOG_QUEUE", log_queue):
+            setup_app_logger()
+        queue_handler = app_logger.handlers[-1]
+        assert isinstance(queue_handler, QueueHandler)
+
+        logging.getLogger("app.dns.example").warning("zone %s refreshed", "a.kz")
+        log_queue.stop()
+    finally:
+        app_logger.handlers[:] = handlers
+        app_logger.propagate = propagate
+
+    assert "WARNING:app.dns.example:zone a.kz refreshed" in capsys.readouterr().err
@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+from app.core_utils.loop_monitor import EVENT_LOOP_LAG, LOOP_MONITOR, LoopMonitor
+
+
+def blocking_handler():
+    time.sleep(0.3)
+
+
+def test_stall_is_attributed_to_the_blocking_frame():
+    monitor = LoopMonitor(interval=0.01, slow_threshold=0.1)
+
+    async def main():
+        await monitor.start()
+        await asyncio.sleep(0.05)
+        blocking_handler()
+        await asyncio.sleep(0.05)
+        await monitor.shutdown()
+
+    asyncio.run(main())
+
+    snapshot = monitor.snapshot()
+    assert snapshot["slow_callbacks"] == 1
+    assert snapshot["lag"]["count"] > 1
+    [offender] = snapshot["top_offenders"]
+    assert offender["count"] == 1
+    assert offender["max_ms"] >= 250
+    assert offender["stack"][-1].endswith("in blocking_handler")
+    assert "in main" in offender["stack"][-2]
+
+
+def test_stall_without_stack_counts_as_unknown():
+    monitor = LoopMonitor(interval=0.01, slow_threshold=0.1)
+
+    monitor.observe(0.005)
+    monitor.observe(0.2)
+
+    assert monitor.lag.count == 2
+    assert [o["location"] for o in monitor.top_offenders()] == ["unknown"]
+
+
+def test_process_monitor_feeds_the_lag_metric():
+    before = EVENT_LOOP_LAG.values().get("[]", [0] * 13)
+
+    LOOP_MONITOR.observe(0.02)
+
+    after = EVENT_LOOP_LAG.values()["[]"]
+    assert after[3] == before[3] + 1
+    assert LOOP_MONITOR.snapshot()["lag"]["buckets"]["25"] == after[3]
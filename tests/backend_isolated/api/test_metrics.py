@@ -0,0 +1,106 @@
+import time
+from unittest.mock import patch
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.dependencies import verify_metrics_token
+from app.core_utils.metrics import (
+    HTTP_REQUESTS,
+    REGISTRY,
+    Counter,
+    Histogram,
+    MetricsMiddleware,
+    merge_snapshots,
+    render,
+)
+from app.main import app as main_app
+
+
+def test_render_counter_and_cumulative_histogram():
+    requests = Counter("test_render_total", "Test counter.", ("host",))
+    duration = Histogram(
+        "test_render_seconds", "Test histogram.", ("host",), buckets=(0.1, 1)
+    )
+    requests.inc("a")
+    requests.inc("a", amount=2)
+    for value in (0.05, 0.5, 3):
+        duration.observe(value, "a")
+
+    snapshot = REGISTRY.snapshot()
+    text = render(
+        {name: snapshot[name] for name in ("test_render_total", "test_render_seconds")}
+    )
+
+    assert 'test_render_total{host="a"} 3' in text
+    assert 'test_render_seconds_bucket{host="a",le="0.1"} 1' in text
+    assert 'test_render_seconds_bucket{host="a",le="1"} 2' in text
+    assert 'test_render_seconds_bucket{host="a",le="+Inf"} 3' in text
+    assert 'test_render_seconds_sum{host="a"} 3.55' in text
+    assert 'test_render_seconds_count{host="a"} 3' in text
+
+
+def test_merge_adds_up_workers_and_drops_stale_gauges():
+    def worker(age: float, requests: float, connections: float) -> dict:
+        return {
+            "time": time.time() - age,
+            "metrics": {
+                "requests_total": {
+                    "type": "counter",
+                    "help": "",
+                    "labelnames": [],
+                    "values": {"[]": requests},
+                },
+                "connections": {
+                    "type": "gauge",
+                    "help": "",
+                    "labelnames": [],
+                    "values": {"[]": connections},
+                },
+            },
+        }
+
+    merged = merge_snapshots([worker(0, 2, 5), worker(100, 3, 7)], stale_after=30)
+
+    assert merged["requests_total"]["values"] == {"[]": 5}
+    assert merged["connections"]["values"] == {"[]": 5}
+
+
+def test_middleware_labels_requests_by_route_unique_id():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get("/items/{item_id}", operation_id="get_item")
+    async def get_item(item_id: int):
+        return {}
+
+    client = TestClient(app)
+    before = HTTP_REQUESTS._values.get(("get_item", "GET", "200"), 0)
+    client.get("/items/1")
+    client.get("/items/2")
+
+    assert HTTP_REQUESTS._values[("get_item", "GET", "200")] == before + 2
+
+
+def test_metrics_need_authentication():
+    response = TestClient(main_app).get("/metrics")
+
+    assert response.status_code == 401
+
+
+def test_metrics_token_is_checked():
+    app = FastAPI()
+
+    @app.get("/metrics", dependencies=[Depends(verify_metrics_token)])
+    async def metrics():
+        return {}
+
+    client = TestClient(app)
+    with patch("app.core.dependencies.settings.METRICS_TOKEN", "scrape-secret"):
+        wrong = client.get("/metrics", headers={"Authorization": "Bearer nope"})
+        right = client.get(
+            "/metrics", headers={"Authorization": "Bearer scrape-secret"}
+        )
+
+    assert wrong.status_code == 401
+    assert right.status_code == 200
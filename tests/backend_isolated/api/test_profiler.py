@@ -0,0 +1,65 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core_utils.profiler import Profiler, ProfilerBusy
+
+THIS_FILE = "tests/backend_isolated/api/test_profiler.py"
+
+
+def parse(profile: str) -> dict[str, int]:
+    stacks = {}
+    for line in profile.splitlines():
+        stack, weight = line.rsplit(" ", 1)
+        stacks[stack] = int(weight)
+    return stacks
+
+
+def busy_worker(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_cpu_profile_collapses_stacks_of_other_threads():
+    stop = threading.Event()
+    worker = threading.Thread(target=busy_worker, args=(stop,), name="busy")
+    worker.start()
+    try:
+        profile = asyncio.run(Profiler().cpu(duration=0.2, interval=0.005))
+    finally:
+        stop.set()
+        worker.join()
+
+    busy = {
+        stack: weight
+        for stack, weight in parse(profile).items()
+        if stack.startswith("busy;")
+    }
+    assert sum(busy.values()) >= 10
+    assert all(f"busy_worker ({THIS_FILE})" in stack for stack in busy)
+
+
+def test_memory_profile_reports_allocations_still_held():
+    held = []
+
+    def allocate():
+        held.extend(bytearray(1000) for _ in range(1000))
+
+    async def main():
+        profiler = Profiler()
+        profile = asyncio.create_task(profiler.memory(duration=0.1))
+        await asyncio.sleep(0.01)
+        with pytest.raises(ProfilerBusy):
+            await profiler.cpu(duration=0.1, interval=0.01)
+        allocate()
+        return await profile
+
+    stacks = parse(asyncio.run(main()))
+
+    allocated = sum(
+        weight
+        for stack, weight in stacks.items()
+        if stack.split(";")[-1].startswith(THIS_FILE)
+    )
+    assert allocated >= 1000 * 1000
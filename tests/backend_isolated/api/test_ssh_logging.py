@@ -0,0 +1,55 @@
+import json
+import logging
+
+from app.core.config import settings
+from app.core_utils.loggers import JsonFormatter, log_ssh_fanout, log_ssh_response
+from app.schemas import ExecutionStatus, SignedExecutorResponse
+
+
+def make_response(host: str, status: ExecutionStatus) -> SignedExecutorResponse:
+    return SignedExecutorResponse(
+        host=host,
+        status=status,
+        code=status.code,
+        message=status.value.lower(),
+        payload=None,
+    )
+
+
+def test_fanout_is_one_record_with_all_failures_and_sampled_successes(
+    caplog, monkeypatch
+):
+    monkeypatch.setattr(settings, "SSH_LOG_SUCCESS_SAMPLE_RATE", 0.0)
+    results = [
+        (make_response(f"ok{i}.example.com", ExecutionStatus.OK), 0.1 * i)
+        for i in range(3)
+    ] + [(make_response("bad.example.com", ExecutionStatus.INTERNAL_ERROR), 2.0)]
+
+    with caplog.at_level(logging.INFO, logger="app.ssh_operations"):
+        log_ssh_fanout("execute token", results)
+
+    [record] = caplog.records
+    assert record.levelno == logging.ERROR
+    assert record.statuses == {"OK": 3, "INTERNAL_ERROR": 1}
+    assert [failed["host"] for failed in record.failed] == ["bad.example.com"]
+    assert record.sampled == []
+    assert record.slowest_host == "bad.example.com"
+    assert record.getMessage() == (
+        "4 hosts executed 'execute token': INTERNAL_ERROR=1, OK=3"
+        " | bad.example.com INTERNAL_ERROR: internal_error"
+    )
+
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["level"] == "ERROR"
+    assert entry["host_count"] == 4
+    assert entry["failed"][0]["code"] == ExecutionStatus.INTERNAL_ERROR.code
+
+
+def test_unsampled_response_is_only_logged_on_error(caplog):
+    with caplog.at_level(logging.INFO, logger="app.ssh_operations"):
+        log_ssh_response(make_response("a.example.com", ExecutionStatus.OK), 0.5, False)
+        log_ssh_response(
+            make_response("b.example.com", ExecutionStatus.NOT_FOUND), 0.5, False
+        )
+
+    assert [record.host for record in caplog.records] == ["b.example.com"]
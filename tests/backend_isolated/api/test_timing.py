@@ -0,0 +1,51 @@
+import asyncio
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app.core_utils.timing import (
+    SPAN_HISTOGRAMS,
+    Histogram,
+    ServerTimingMiddleware,
+    span,
+)
+
+
+def test_histogram_quantiles_use_bucket_bounds():
+    histogram = Histogram(buckets=(1, 10, 100))
+    for value in [0.5] * 90 + [50] * 9 + [500]:
+        histogram.observe(value)
+
+    assert histogram.quantile(0.5) == 1
+    assert histogram.quantile(0.95) == 100
+    assert histogram.quantile(0.999) is None
+    assert histogram.snapshot()["buckets"] == {"1": 90, "10": 0, "100": 9, "+Inf": 1}
+
+
+def test_spans_from_dependencies_threads_and_endpoint_reach_header():
+    SPAN_HISTOGRAMS.clear()
+
+    def sync_dependency():
+        with span("auth"):
+            pass
+
+    app = FastAPI()
+    app.add_middleware(ServerTimingMiddleware)
+
+    @app.get("/", dependencies=[Depends(sync_dependency)])
+    async def endpoint():
+        for _ in range(2):
+            with span("ssh_exec"):
+                await asyncio.sleep(0)
+        return {}
+
+    response = TestClient(app).get("/")
+
+    names = [
+        metric.split(";")[0].strip()
+        for metric in response.headers["Server-Timing"].split(",")
+    ]
+    assert names == ["auth", "ssh_exec", "total"]
+    snapshot = SPAN_HISTOGRAMS.snapshot()
+    assert snapshot["ssh_exec"]["count"] == 2
+    assert snapshot["total"]["count"] == 1
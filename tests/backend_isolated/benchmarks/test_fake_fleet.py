@@ -0,0 +1,65 @@
+import struct
+
+from app.dns.dns_models import ZoneMasterInventoryItem, ZoneMasterPayload
+from app.plesk.plesk_schemas import SubscriptionInventoryPayload, SubscriptionItem
+from app.schemas import ExecutionStatus, SignedExecutorResponse
+from benchmarks.dns_stub import TYPE_A, _encode_name, build_response
+from benchmarks.fake_fleet import ExecutorBehaviour, FakeExecutor, fleet_address
+
+
+def parse(stdout: str, payload_type=None) -> SignedExecutorResponse:
+    return SignedExecutorResponse.from_ssh_response(
+        {"host": "plesk1.bench.test", "stdout": stdout}, payload_type
+    )
+
+
+def test_fake_executor_answers_fit_the_operation_payload_types():
+    executor = FakeExecutor(
+        plesk_count=4,
+        dns_count=2,
+        behaviour=ExecutorBehaviour(
+            subscriptions_per_host=3, domains_per_subscription=2
+        ),
+    )
+
+    owned = parse(
+        executor.answer(1, "PLESK.FETCH_SUBSCRIPTION_INFO site5.bench.test"),
+        list[SubscriptionItem],
+    )
+    elsewhere = parse(
+        executor.answer(2, "PLESK.FETCH_SUBSCRIPTION_INFO site5.bench.test"),
+        list[SubscriptionItem],
+    )
+    inventory = parse(
+        executor.answer(1, "PLESK.FETCH_SUBSCRIPTION_INVENTORY"),
+        SubscriptionInventoryPayload,
+    )
+    zone_master = parse(
+        executor.answer(0, "DNS.GET_ZONE_MASTER site5.bench.test"), ZoneMasterPayload
+    )
+    zones = parse(
+        executor.answer(0, "DNS.GET_ZONE_MASTER_INVENTORY"),
+        list[ZoneMasterInventoryItem],
+    )
+
+    assert owned.payload[0].name == "site5.bench.test"
+    assert elsewhere.status is ExecutionStatus.NOT_FOUND
+    assert [s.id for s in inventory.payload.subscriptions] == ["1", "5", "9"]
+    assert len(inventory.payload.subscriptions[0].domains) == 2
+    assert str(zone_master.payload.zonemaster_ip) == fleet_address(1, 1)
+    assert len(zones.payload) == 12
+
+
+def test_dns_stub_answers_zone_names_and_refuses_others():
+    def query(name: str) -> bytes:
+        header = struct.pack("!HHHHHH", 0x1234, 0x0100, 1, 0, 0, 0)
+        return header + _encode_name(name) + struct.pack("!HH", TYPE_A, 1)
+
+    answer = build_response(query("site1.bench.test"))
+    refused = build_response(query("example.com"))
+
+    query_id, flags, _, answers, _, _ = struct.unpack_from("!HHHHHH", answer)
+    assert (query_id, flags & 0x000F, answers) == (0x1234, 0, 1)
+    assert answer[-4:-1] == bytes([198, 51, 100])
+    _, flags, _, answers, _, _ = struct.unpack_from("!HHHHHH", refused)
+    assert (flags & 0x000F, answers) == (3, 0)
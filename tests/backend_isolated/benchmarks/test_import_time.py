@@ -0,0 +1,9 @@
+from benchmarks.import_time import LAZY_MODULES, by_package, import_times
+
+
+def test_rarely_used_modules_are_not_imported_at_startup():
+    times = import_times("app.main")
+
+    assert "app.main" in times
+    assert [name for name in LAZY_MODULES if name in times] == []
+    assert by_package(times)["app"] > 0
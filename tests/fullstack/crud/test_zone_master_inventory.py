@@ -0,0 +1,41 @@
+from unittest.mock import patch
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app.db import crud
+from app.db.models import DnsZoneMasterInventory
+
+
+def _zones(db: Session, dns_server: str) -> dict[str, str]:
+    return {
+        row.zone: str(row.zonemaster_ip)
+        for row in crud.db_get_zone_master_inventory(db)
+        if row.dns_server == dns_server
+    }
+
+
+def test_replace_zone_master_inventory_upserts_and_prunes(db: Session) -> None:
+    dns_server = "ns-test.example.kz"
+    crud.db_replace_zone_master_inventory(
+        db, dns_server, {"a.kz": "10.0.0.1", "b.kz": "10.0.0.2"}
+    )
+    crud.db_replace_zone_master_inventory(
+        db, dns_server, {"a.kz": "10.0.0.3", "c.kz": "10.0.0.4"}
+    )
+    assert _zones(db, dns_server) == {"a.kz": "10.0.0.3", "c.kz": "10.0.0.4"}
+
+    zones = {f"zone{i}.kz": "10.0.0.5" for i in range(5)}
+    with patch.object(crud, "INVENTORY_BATCH_SIZE", 2):
+        crud.db_replace_zone_master_inventory(db, dns_server, zones)
+    assert _zones(db, dns_server) == zones
+
+    crud.db_replace_zone_master_inventory(db, dns_server, {})
+    assert _zones(db, dns_server) == {}
+
+    db.execute(
+        delete(DnsZoneMasterInventory).where(
+            DnsZoneMasterInventory.dns_server == dns_server
+        )
+    )
+    db.commit()